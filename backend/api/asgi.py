@@ -9,8 +9,21 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from configurations import importer
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+os.environ.setdefault('DJANGO_CONFIGURATION', 'Local')
+# Serve the GraphQL API with the async view
+os.environ.setdefault('GRAPHQL_ASYNC', 'true')
+importer.install()
 
-application = get_asgi_application()
+from django.core.asgi import get_asgi_application  # noqa: E402
+
+# Set up Django before importing the schema, which imports the models
+django_application = get_asgi_application()
+
+from api.base.websockets import GraphQLWebSocketRouter  # noqa: E402
+from api.schemas import schema  # noqa: E402
+
+# The subscriptions are served through the WebSockets of the GraphQL endpoint
+application = GraphQLWebSocketRouter(django_application, schema, path='/api/graphql/')
@@ -0,0 +1,152 @@
+import collections
+import hashlib
+import json
+import re
+from typing import Callable, Iterable
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from graphql import FieldNode
+from strawberry.http import GraphQLHTTPResponse, GraphQLRequestData
+from strawberry.types import Info
+
+# The functions looking up the current versions of the objects of each kind, by their ids
+_lookups: dict[str, Callable[[list[int]], dict[int, int]]] = {}
+
+_etag_re = re.compile(r'^(?:W/)?"([0-9a-f]+)((?:\.\w+-\d+-\d+)+)"$')
+
+Version = tuple[str, int, int]
+
+
+def versioned(kind: str):
+    """Register the function looking up the current versions of the objects of a kind"""
+
+    def wrapper(f: Callable[[list[int]], dict[int, int]]):
+        _lookups[kind] = f
+        return f
+
+    return wrapper
+
+
+def record_version(info: Info, kind: str, pk: int, version: int):
+    """Record the version of the object read by a root field, for the ETag of the response.
+
+    The response is only tagged when each of its root fields recorded the version it read,
+    so it can't change unless they do. Only what bumps the versions is covered: the
+    fields of other objects nested in the response, like the users of a list, may have
+    changed meanwhile without it.
+    """
+    request = info.context.request
+    request_hash = getattr(request, "graphql_request_hash", None)
+    if request_hash is None:
+        return
+
+    versions: dict[str, Version] = request.__dict__.setdefault("_graphql_versions", {})
+    versions[info.path.key] = (kind, pk, version)
+
+    selections = info.operation.selection_set.selections
+    if all(isinstance(s, FieldNode) for s in selections) and len(selections) == len(versions):
+        info.context.response["ETag"] = _etag(_session_hash(request), versions.values())
+
+
+class NotModified(Exception):
+    """The objects read by the request didn't change since the client got its ETag"""
+
+    def __init__(self, etag: str):
+        super().__init__(etag)
+        self.etag = etag
+
+    def as_response(self) -> HttpResponse:
+        response = HttpResponseNotModified()
+        response["ETag"] = self.etag
+        return response
+
+
+def _request_hash(data: GraphQLRequestData) -> str:
+    value = json.dumps(
+        [data.query, data.variables, data.operation_name],
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+    )
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+def _session_hash(request: HttpRequest) -> str:
+    # The hash of the request for the session sending it, so nobody can tell from the
+    # validators of the others what changed in the objects they can't read. Logging in or
+    # out starts another session. Its key is known without loading the session or the user
+    session = getattr(request, "session", None)
+    value = json.dumps(
+        [request.graphql_request_hash, getattr(session, "session_key", None)]  # type: ignore
+    )
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+def _etag(request_hash: str, versions: Iterable[Version]) -> str:
+    tags = "".join(f".{kind}-{pk}-{version}" for kind, pk, version in sorted(set(versions)))
+    return f'W/"{request_hash}{tags}"'
+
+
+def _parse_etag(etag: str) -> tuple[str, list[Version]] | None:
+    match = _etag_re.match(etag.strip())
+    if match is None:
+        return None
+
+    versions = []
+    for tag in match[2][1:].split("."):
+        kind, pk, version = tag.split("-")
+        versions.append((kind, int(pk), int(version)))
+    return match[1], versions
+
+
+def _is_current(versions: list[Version]) -> bool:
+    by_kind: dict[str, dict[int, int]] = collections.defaultdict(dict)
+    for kind, pk, version in versions:
+        by_kind[kind][pk] = version
+
+    for kind, expected in by_kind.items():
+        lookup = _lookups.get(kind)
+        if lookup is None or lookup(list(expected)) != expected:
+            return False
+    return True
+
+
+class _ConditionalViewMixin:
+    """Answer the requests with `If-None-Match` with a 304 while their ETag is current.
+
+    Checking the ETag only looks up the versions of the objects it was computed from,
+    before the request is executed. The clients which need the latest fields of the
+    nested objects which aren't versioned should not send `If-None-Match`.
+    """
+
+    def get_request_data(self, request: HttpRequest) -> GraphQLRequestData:
+        data = super().get_request_data(request)  # type: ignore
+        request.graphql_request_hash = _request_hash(data)  # type: ignore
+        return data
+
+    def check_not_modified(self, request: HttpRequest):
+        """Raise `NotModified` when an ETag of `If-None-Match` is still current"""
+        header = request.META.get("HTTP_IF_NONE_MATCH")
+        if not header or request.method not in ("GET", "POST"):
+            return
+        if self.should_render_graphiql(request):  # type: ignore
+            return
+
+        # Parsed again when the request is executed, only the conditional requests pay for it
+        self.get_request_data(request)
+        request_hash = _session_hash(request)
+        for etag in header.split(","):
+            parsed = _parse_etag(etag)
+            if parsed is not None and parsed[0] == request_hash and _is_current(parsed[1]):
+                raise NotModified(etag.strip())
+
+    def _create_response(
+        self,
+        response_data: GraphQLHTTPResponse,
+        sub_response: HttpResponse,
+    ) -> HttpResponse:
+        response = super()._create_response(response_data, sub_response)  # type: ignore
+        if response_data.get("errors") and response.has_header("ETag"):
+            # The errors may not happen again, the next response must not be skipped
+            del response["ETag"]
+        return response
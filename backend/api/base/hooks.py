@@ -1,16 +1,194 @@
-from typing import Any, Callable, Generic, TypeVar, overload
+import collections
+import contextlib
+import datetime
+import functools
+import hashlib
+import json
+import time
+import traceback
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    Protocol,
+    TypeVar,
+    overload,
+)
+import uuid
+import weakref
 
+from django.apps import apps
 from django.conf import settings
-from django.db import models, transaction
-from django.db.models import signals
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, models, transaction
+from django.db.models import F, Subquery, signals
+from django.utils import timezone
 from typing_extensions import Concatenate, ParamSpec
 
+if TYPE_CHECKING:
+    from .models import HookJob
+
 _S = TypeVar("_S", bound="ModelHookField[Any, Any, Any]")
 _T = TypeVar("_T", bound=models.Model)
 _R = TypeVar("_R")
 _P = ParamSpec("_P")
 _hooks_cache: dict[Callable, Callable] = {}
 
+# The hooks of each model by signal
+_registry: dict[type[models.Model], dict[signals.ModelSignal, list["ModelHookField"]]] = {}
+# The signals `BaseModel.save` dispatches to the hooks by itself, unless told to use signals
+_direct_signals = (signals.pre_save, signals.post_save)
+_use_signals = getattr(settings, "MODEL_HOOKS_USE_SIGNALS", False)
+
+
+def _dispatches_directly(model: type[models.Model], signal: signals.ModelSignal) -> bool:
+    return (
+        not _use_signals and signal in _direct_signals and getattr(model, "dispatches_hooks", False)
+    )
+
+
+def _receiver(sender: type[models.Model], instance: models.Model, **kwargs):
+    for hook in _registry[sender][kwargs["signal"]]:
+        hook._callback(sender, instance, **kwargs)
+
+
+def send(signal: signals.ModelSignal, sender: type[models.Model], instance: models.Model, **kwargs):
+    """Run the hooks of the model for the signal, unless the signal runs them instead"""
+    if not _dispatches_directly(sender, signal):
+        return
+
+    for hook in _registry.get(sender, {}).get(signal, ()):
+        hook._callback(sender, instance, signal=signal, **kwargs)
+
+
+def send_batch(
+    signal: signals.ModelSignal,
+    sender: type[models.Model],
+    instances: Iterable[models.Model],
+    **kwargs,
+):
+    """Run the hooks of the model for the instances saved together, like by `bulk_create`.
+
+    The batched hooks run once for all of them, and the deferred ones are queued together.
+    When the hooks are dispatched through the signals, the signal is sent for each one.
+    """
+    instances = list(instances)
+    if not instances:
+        return
+
+    if not _dispatches_directly(sender, signal):
+        for instance in instances:
+            signal.send(sender=sender, instance=instance, **kwargs)
+        return
+
+    for hook in _registry.get(sender, {}).get(signal, ()):
+        hook._dispatch(sender, instances, {"signal": signal, **kwargs})
+
+
+def _connect(model: type[models.Model], signal: signals.ModelSignal):
+    # A single receiver per model and signal, running all its hooks
+    if _dispatches_directly(model, signal):
+        signal.disconnect(_receiver, sender=model)
+    else:
+        signal.connect(_receiver, sender=model)
+
+
+def _connect_all():
+    for model, hooks in _registry.items():
+        for signal in hooks:
+            _connect(model, signal)
+
+
+@contextlib.contextmanager
+def use_signals(enabled: bool = True) -> Iterator[None]:
+    """Dispatch the save hooks through the Django signals inside the block"""
+    global _use_signals
+
+    previous, _use_signals = _use_signals, enabled
+    _connect_all()
+    try:
+        yield
+    finally:
+        _use_signals = previous
+        _connect_all()
+
+
+class _Flushable(Protocol):
+    def flush(self):
+        ...
+
+
+_B = TypeVar("_B", bound=_Flushable)
+
+
+class _CommitCallback(Generic[_B]):
+    """Flushes the batch on commit.
+
+    Only the transaction keeps it alive: it is released once it runs, or when the
+    savepoint or transaction registering it is rolled back.
+    """
+
+    def __init__(self, batch: _B):
+        super().__init__()
+        self.batch = batch
+
+    def __call__(self):
+        self.batch.flush()
+
+
+def commit_batch(
+    key: Hashable,
+    factory: Callable[[], _B],
+    *,
+    using: str | None = None,
+) -> _B | None:
+    """The batch collecting the work of `key` in the current transaction, flushed on commit.
+
+    There is one batch per savepoint, so the work done in a savepoint rolled back is
+    discarded together with its commit callback. Outside of the transactions, and while
+    running the tests, there is no batch and the work should be done right away.
+    """
+    connection = transaction.get_connection(using or DEFAULT_DB_ALIAS)
+    if settings.RUNNING_TESTS or not connection.in_atomic_block:
+        return None
+
+    # Weak, so the batches whose callbacks were run or discarded are forgotten
+    callbacks: weakref.WeakValueDictionary[tuple, _CommitCallback] = connection.__dict__.setdefault(
+        "_hook_batches", weakref.WeakValueDictionary()
+    )
+    key = (key, tuple(connection.savepoint_ids))
+    callback = callbacks.get(key)
+    if callback is None:
+        callback = callbacks[key] = _CommitCallback(factory())
+        transaction.on_commit(callback, using=connection.alias)
+
+    return callback.batch
+
+
+class _Batch:
+    """The instances a batched hook saw in a transaction, grouped by the signal arguments"""
+
+    def __init__(self, f: Callable[..., Any]):
+        super().__init__()
+        self._f = f
+        self._groups: dict[tuple, dict[Any, models.Model]] = {}
+
+    def add(self, instance: models.Model, kwargs: dict[str, Any]):
+        group = self._groups.setdefault(tuple(sorted(kwargs.items())), {})
+        # Coalesce the saves of the same row, keeping the latest instance
+        key = instance.pk if instance.pk is not None else id(instance)
+        group.pop(key, None)
+        group[key] = instance
+
+    def flush(self):
+        groups, self._groups = self._groups, {}
+        for kwargs, instances in groups.items():
+            self._f(list(instances.values()), **dict(kwargs))
+
 
 class ModelHook(Generic[_T, _P, _R]):
     """Model hook."""
@@ -33,18 +211,26 @@ class ModelHookField(Generic[_T, _P, _R]):
         signal: signals.ModelSignal,
         *,
         on_commit: bool = False,
+        batch: bool = False,
+        deferred: bool = False,
+        fields: Iterable[str] | None = None,
     ):
         super().__init__()
+        if deferred and signal is not signals.post_save:
+            raise ValueError("Only the post_save hooks can be deferred")
+
         self._f = f
         self._name = None
         self._signal = signal
         self._on_commit = on_commit
+        self._batch = batch
+        self._deferred = deferred
+        self._fields = frozenset(fields) if fields is not None else None
         self._registered = set()
 
     def __set_name__(self, owner: type[_T], name: str):
         self._name = name
-        self._signal.connect(self._callback, sender=owner)
-        self._registered.add(owner)
+        self.register(owner)
 
     @overload
     def __get__(self, obj: _T, cls: type[_T]) -> ModelHook[_T, _P, _R]:
@@ -60,22 +246,91 @@ class ModelHookField(Generic[_T, _P, _R]):
 
         c = obj.__dict__.get(self._name, None)
         if c is None:
-            c = ModelHook(f=self._f, obj=obj)
+            f = self._f
+            if self._batch:
+                f = self._batched
+            c = ModelHook(f=f, obj=obj)
             obj.__dict__[self._name] = c
 
         return c
 
-    def _callback(self, sender: type[_T], instance: _T, *args, **kwargs):
-        if self._on_commit and not settings.RUNNING_TESTS:
-            transaction.on_commit(lambda: self._f(instance, *args, **kwargs))
+    def _batched(self, instance: _T, *args, **kwargs):
+        return self._f([instance], *args, **kwargs)
+
+    def _callback(self, sender: type[_T], instance: _T, **kwargs):
+        self._dispatch(sender, [instance], kwargs)
+
+    def _dispatch(self, sender: type[_T], instances: list[_T], kwargs: dict[str, Any]):
+        update_fields = kwargs.get("update_fields")
+        if self._fields is not None and update_fields is not None:
+            if not self._fields & update_fields:
+                return
+
+        if self._deferred and not settings.RUNNING_TESTS:
+            self._enqueue(sender, instances, kwargs)
+        elif self._batch:
+            self._batch_callback(instances, kwargs)
+        elif self._on_commit and not settings.RUNNING_TESTS:
+            for instance in instances:
+                transaction.on_commit(functools.partial(self._f, instance, **kwargs))
+        else:
+            for instance in instances:
+                self._f(instance, **kwargs)
+
+    def _batch_callback(self, instances: list[_T], kwargs: dict[str, Any]):
+        batch = None
+        if self._on_commit:
+            batch = commit_batch(id(self), lambda: _Batch(self._f), using=kwargs.get("using"))
+
+        if batch is None:
+            self._f(instances, **kwargs)
+        else:
+            for instance in instances:
+                batch.add(instance, kwargs)
+
+    def _enqueue(self, sender: type[_T], instances: list[_T], kwargs: dict[str, Any]):
+        from .models import HookJob
+
+        hook = f"{sender._meta.label}.{self._name}"
+        kwargs = {
+            k: sorted(v) if isinstance(v, frozenset) else v
+            for k, v in kwargs.items()
+            if k != "signal"
+        }
+        jobs = []
+        for instance in instances:
+            key = hashlib.sha256(
+                json.dumps(
+                    [hook, instance.pk, kwargs], sort_keys=True, cls=DjangoJSONEncoder
+                ).encode()
+            ).hexdigest()
+            jobs.append(HookJob(key=key, hook=hook, object_id=instance.pk, kwargs=kwargs))
+
+        # In the transaction of the save, so the jobs exist only if the save commits
+        HookJob.objects.using(instances[0]._state.db).bulk_create(jobs, ignore_conflicts=True)
+
+    def _run_deferred(self, model: type[_T], ids: list[int], kwargs: dict[str, Any], using: str):
+        kwargs = {**kwargs, "signal": self._signal}
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = frozenset(kwargs["update_fields"])
+
+        # The instances deleted since they were saved have nothing left to do
+        objs = model._default_manager.using(using).in_bulk(ids)
+        instances = [objs[pk] for pk in ids if pk in objs]
+        if self._batch:
+            if instances:
+                self._f(instances, **kwargs)
         else:
-            self._f(instance, *args, **kwargs)
+            for instance in instances:
+                self._f(instance, **kwargs)
 
     def register(self, cls: type[_T]):
         if cls in self._registered:
             return
 
-        self._signal.connect(self._callback, sender=cls)
+        hooks = _registry.setdefault(cls, collections.defaultdict(list))
+        hooks[self._signal].append(self)
+        _connect(cls, self._signal)
         self._registered.add(cls)
 
 
@@ -88,12 +343,34 @@ def _hook(signal: signals.ModelSignal):
     def hook(
         f: None = ...,
         on_commit: bool = False,
+        batch: bool = False,
+        deferred: bool = False,
+        fields: Iterable[str] | None = None,
     ) -> Callable[[Callable[Concatenate[_T, _P], _R]], ModelHookField[_T, _P, _R]]:
         ...
 
-    def hook(f=None, /, on_commit=False) -> Any:
+    def hook(f=None, /, on_commit=False, batch=False, deferred=False, fields=None) -> Any:
+        """Run the decorated method when the signal is sent for an instance of its model.
+
+        With `on_commit` it runs after the transaction commits. With `batch` too, it runs
+        once per transaction with the list of the instances saved in it, instead of once
+        for each one.
+
+        A `deferred` hook is queued in the transaction of the save and run later by the
+        hook worker, with the instance as it is then. It may run more than once, so it
+        must be idempotent. The saves which only update other than the given `fields`
+        don't run the hook.
+        """
+
         def wrapper(f):
-            return ModelHookField(f, signal, on_commit=on_commit)
+            return ModelHookField(
+                f,
+                signal,
+                on_commit=on_commit,
+                batch=batch,
+                deferred=deferred,
+                fields=fields,
+            )
 
         if f is not None:
             return wrapper(f)
@@ -107,3 +384,105 @@ pre_save = _hook(signals.pre_save)
 post_save = _hook(signals.post_save)
 pre_delete = _hook(signals.pre_delete)
 post_delete = _hook(signals.post_delete)
+m2m_changed = _hook(signals.m2m_changed)
+
+
+def _claim(limit: int, lease: datetime.timedelta, using: str) -> list["HookJob"]:
+    from .models import HookJob
+
+    now = timezone.now()
+    leased_until = now + lease
+    due = HookJob.objects.using(using).filter(
+        status__in=["pending", "running"],
+        run_after__lte=now,
+    )
+    qs = due.order_by("run_after", "pk")
+    if connections[using].features.has_select_for_update_skip_locked:
+        qs = qs.select_for_update(skip_locked=True)
+
+    # Tells apart the jobs claimed here from the ones other workers claim at the same time
+    claim = uuid.uuid4()
+    with transaction.atomic(using=using):
+        # Claimed by a single update, which takes the write lock of the databases without
+        # row locks right away. The running jobs whose worker died become due again once
+        # their lease expires
+        due.filter(pk__in=Subquery(qs.values("pk")[:limit])).update(
+            status="running",
+            run_after=leased_until,
+            claimed_by=claim,
+            attempts=F("attempts") + 1,
+        )
+        return list(HookJob.objects.using(using).filter(claimed_by=claim, status="running"))
+
+
+def _retry(jobs: list["HookJob"], error: str, max_attempts: int, using: str):
+    from .models import HookJob
+
+    now = timezone.now()
+    for job in jobs:
+        try:
+            with transaction.atomic(using=using):
+                HookJob.objects.using(using).filter(pk=job.pk).update(
+                    status="failed" if job.attempts >= max_attempts else "pending",
+                    claimed_by=None,
+                    run_after=now + datetime.timedelta(seconds=min(2**job.attempts, 3600)),
+                    last_error=error,
+                )
+        except IntegrityError:
+            # Saved again while running, the pending job will run the hook anyway
+            HookJob.objects.using(using).filter(pk=job.pk).delete()
+
+
+def run_deferred(
+    *,
+    limit: int = 100,
+    max_attempts: int = 5,
+    lease: datetime.timedelta = datetime.timedelta(minutes=5),
+    using: str = DEFAULT_DB_ALIAS,
+) -> int:
+    """Run the due deferred hooks, returning how many jobs were claimed.
+
+    Each hook runs in a transaction with the deletion of its jobs, so their changes are
+    committed only once. The failed ones are retried with an exponential backoff until
+    `max_attempts`, and then kept as failed.
+    """
+    from .models import HookJob
+
+    groups: dict[tuple[str, str], list[HookJob]] = collections.defaultdict(list)
+    jobs = _claim(limit, lease, using)
+    for job in jobs:
+        groups[(job.hook, json.dumps(job.kwargs, sort_keys=True))].append(job)
+
+    for (hook, kwargs), group in groups.items():
+        label, name = hook.rsplit(".", 1)
+        model = apps.get_model(label)
+        field: ModelHookField = getattr(model, name)
+
+        # The batched hooks run once for all the jobs claimed with the same arguments
+        chunks = [group] if field._batch else [[job] for job in group]
+        for chunk in chunks:
+            try:
+                with transaction.atomic(using=using):
+                    HookJob.objects.using(using).filter(pk__in=[job.pk for job in chunk]).delete()
+                    field._run_deferred(
+                        model,
+                        [job.object_id for job in chunk],
+                        json.loads(kwargs),
+                        using,
+                    )
+            except Exception:
+                _retry(chunk, traceback.format_exc(), max_attempts, using)
+
+    return len(jobs)
+
+
+def work(*, once: bool = False, poll_interval: float = 1.0, **kwargs) -> int:
+    """Keep running the deferred hooks, until none is due if `once`"""
+    processed = 0
+    while True:
+        claimed = run_deferred(**kwargs)
+        processed += claimed
+        if not claimed:
+            if once:
+                return processed
+            time.sleep(poll_interval)
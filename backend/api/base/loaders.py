@@ -0,0 +1,69 @@
+from typing import Callable, Generic, Hashable, Iterable, Mapping, TypeVar
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+
+class BatchLoader(Generic[_K, _V]):
+    """Synchronous data loader.
+
+    Keys are collected with `prime` while their parent objects get resolved, and all
+    the pending keys are loaded in a single batch the first time one of them is
+    requested. Loaded values are memoized, so a loader should live for a single
+    request only.
+    """
+
+    def __init__(
+        self,
+        batch_load_fn: Callable[[list[_K]], Mapping[_K, _V]],
+        *,
+        default: Callable[[], _V] | None = None,
+    ):
+        super().__init__()
+        self._batch_load_fn = batch_load_fn
+        self._default = default
+        self._pending: set[_K] = set()
+        self._cache: dict[_K, _V] = {}
+
+    def prime(self, keys: Iterable[_K]):
+        """Schedule the keys to be loaded in the next batch"""
+        self._pending.update(key for key in keys if key not in self._cache)
+
+    def set(self, key: _K, value: _V):  # noqa: A003
+        """Memoize an already loaded value"""
+        self._cache[key] = value
+        self._pending.discard(key)
+
+    def load(self, key: _K) -> _V:
+        if key not in self._cache:
+            self._pending.add(key)
+            self._dispatch()
+
+        return self._cache[key]
+
+    def load_many(self, keys: Iterable[_K]) -> list[_V]:
+        keys = list(keys)
+        self.prime(keys)
+        self._dispatch()
+
+        return [self._cache[key] for key in keys]
+
+    def clear(self):
+        self._pending.clear()
+        self._cache.clear()
+
+    def _dispatch(self):
+        if not self._pending:
+            return
+
+        keys = list(self._pending)
+        self._pending.clear()
+
+        values = self._batch_load_fn(keys)
+        for key in keys:
+            if key in values:
+                self._cache[key] = values[key]
+            elif self._default is not None:
+                self._cache[key] = self._default()
+            else:
+                raise KeyError(key)
@@ -1,4 +1,36 @@
-from django.db import models
+import contextlib
+import contextvars
+from typing import Iterable, Iterator, Literal, TypeVar
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router
+from django.db.models import DEFERRED, signals
+from django.utils import timezone
+
+from . import hooks
+
+_T = TypeVar("_T", bound=models.Model)
+
+ValidationMode = Literal["full", "changed", "none"]
+_validation_mode: contextvars.ContextVar[ValidationMode | None] = contextvars.ContextVar(
+    "validation_mode",
+    default=None,
+)
+
+
+@contextlib.contextmanager
+def validation(mode: ValidationMode) -> Iterator[None]:
+    """Override the validation mode of every model saved inside the block"""
+    token = _validation_mode.set(mode)
+    try:
+        yield
+    finally:
+        _validation_mode.reset(token)
+
+
+def skip_validation():
+    """Save without validating, for trusted internal batch jobs"""
+    return validation("none")
 
 
 class BaseModel(models.Model):
@@ -7,24 +39,236 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+    # How `save` validates the instance: all its fields, only the changed ones or none
+    validation_mode: ValidationMode = "full"
+    # The save hooks are run by `save_base` instead of the signals
+    dispatches_hooks = True
+
     id = models.BigAutoField(primary_key=True)  # noqa: A003
 
-    def save(self, *, full_clean: bool = True, update_fields: list[str] | None = None, **kwargs):
-        """Save the model in the database."""
-        if full_clean:
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # The values as loaded, in the order of the concrete fields. They are converted
+        # by the database already and immutable, so they are kept as they are
+        fields = cls._meta.concrete_fields
+        if len(values) != len(fields):
+            loaded = iter(values)
+            values = [next(loaded) if f.attname in field_names else DEFERRED for f in fields]
+        instance._snapshot = tuple(values)
+
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._take_snapshot(fields)
+
+    def save(
+        self,
+        *,
+        full_clean: bool = True,
+        update_fields: Iterable[str] | None = None,
+        **kwargs,
+    ):
+        """Save the model in the database.
+
+        When `update_fields` is given only those columns are validated and updated.
+        Otherwise, instances loaded from the database only update the columns which
+        changed, and skip the update when none did.
+        """
+        if update_fields is not None:
+            update_fields = {self._meta.get_field(name).name for name in update_fields}
+
+        mode = _validation_mode.get() or self.validation_mode
+        if full_clean and mode != "none":
+            fields = update_fields
+            if fields is None and mode == "changed" and not self._state.adding:
+                fields = self.changed_fields
+            self._validate(fields)
+
+        if update_fields is None and not self._state.adding and "_snapshot" in self.__dict__:
+            changed = self.changed_fields
+            if not changed:
+                return
+            if self._meta.pk.name not in changed:
+                update_fields = changed | {
+                    f.name for f in self._meta.concrete_fields if getattr(f, "auto_now", False)
+                }
+
+        super().save(update_fields=update_fields, **kwargs)
+        self._take_snapshot(update_fields)
+
+    def save_base(
+        self, raw=False, force_insert=False, force_update=False, using=None, update_fields=None
+    ):
+        """Run the save hooks of the model around the save, without going through the signals"""
+        cls = type(self)
+        using = using or router.db_for_write(cls, instance=self)
+        # Before saving it, which marks it as no longer being added
+        created = self._state.adding
+        hooks.send(
+            signals.pre_save,
+            cls,
+            self,
+            raw=raw,
+            using=using,
+            update_fields=update_fields,
+        )
+
+        super().save_base(
+            raw=raw,
+            force_insert=force_insert,
+            force_update=force_update,
+            using=using,
+            update_fields=update_fields,
+        )
+
+        hooks.send(
+            signals.post_save,
+            cls,
+            self,
+            created=created,
+            update_fields=update_fields,
+            raw=raw,
+            using=using,
+        )
+
+    save_base.alters_data = True  # type: ignore[attr-defined]
+
+    @property
+    def changed_fields(self) -> set[str]:
+        """The fields changed since the instance was loaded, all of them if it wasn't"""
+        fields = self._meta.concrete_fields
+        snapshot = self.__dict__.get("_snapshot")
+        if snapshot is None:
+            return {field.name for field in fields}
+
+        current = self.__dict__
+        return {
+            field.name
+            for field, value in zip(fields, snapshot)
+            if field.attname in current and (value is DEFERRED or value != current[field.attname])
+        }
+
+    def _take_snapshot(self, fields: Iterable[str] | None = None):
+        """Mark the fields as saved, all the loaded ones by default"""
+        names = None if fields is None else set(fields)
+        snapshot = self.__dict__.get("_snapshot") or (DEFERRED,) * len(self._meta.concrete_fields)
+        current = self.__dict__
+        self._snapshot = tuple(
+            current.get(field.attname, DEFERRED)
+            if names is None or field.name in names or field.attname in names
+            else value
+            for field, value in zip(self._meta.concrete_fields, snapshot)
+        )
+
+    def _validate(self, fields: set[str] | None):
+        if fields is None:
             self.full_clean()
-        return super().save(**kwargs)
+            return
+
+        # The unique checks are skipped when any of their fields are excluded
+        unique_checks, _ = self._get_unique_checks()
+        for _, check in unique_checks:
+            if fields.intersection(check):
+                fields = fields.union(check)
+
+        self.full_clean(exclude=[f.name for f in self._meta.fields if f.name not in fields])
+
+
+class TimestampedQuerySet(models.QuerySet[_T]):
+    """Queryset of the timestamped models, which also stamps their bulk updates"""
+
+    def update(self, **kwargs) -> int:
+        kwargs.setdefault("updated_at", timezone.now())
+        return super().update(**kwargs)
+
+    update.alters_data = True  # type: ignore[attr-defined]
 
 
 class TimestampedMixin(models.Model):
     class Meta:
         abstract = True
 
+    objects = TimestampedQuerySet.as_manager()
+
     created_at = models.DateTimeField(
         verbose_name="Created at",
         auto_now_add=True,
     )
     updated_at = models.DateTimeField(
         verbose_name="Updated at",
-        auto_now_add=True,
+        auto_now=True,
+        # Changes since a given time are looked up by it
+        db_index=True,
+    )
+
+
+class HookJob(BaseModel, TimestampedMixin):
+    """A call of a deferred hook, waiting to be run by the hook worker"""
+
+    class Meta:
+        verbose_name = "hook job"
+        verbose_name_plural = "hook jobs"
+        constraints = [
+            # Saving an instance again before its job runs doesn't enqueue it again
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=models.Q(status="pending"),
+                name="hook_job_pending_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["run_after"], name="hook_job_due_idx"),
+        ]
+
+    key = models.CharField(
+        verbose_name="Idempotency key",
+        max_length=255,
+    )
+    hook = models.CharField(
+        verbose_name="Hook",
+        max_length=255,
+    )
+    object_id = models.BigIntegerField(
+        verbose_name="Object id",
+    )
+    kwargs = models.JSONField(
+        verbose_name="Arguments",
+        encoder=DjangoJSONEncoder,
+        default=dict,
+    )
+    status = models.CharField(
+        verbose_name="Status",
+        max_length=16,
+        choices=[("pending", "Pending"), ("running", "Running"), ("failed", "Failed")],
+        default="pending",
     )
+    attempts = models.PositiveIntegerField(
+        verbose_name="Attempts",
+        default=0,
+    )
+    run_after = models.DateTimeField(
+        verbose_name="Run after",
+        help_text="When the job is due, or when the lease of the worker running it expires",
+        default=timezone.now,
+    )
+    claimed_by = models.UUIDField(
+        verbose_name="Claimed by",
+        help_text="The claim of the worker running the job",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    last_error = models.TextField(
+        verbose_name="Last error",
+        blank=True,
+    )
+
+    #
+    #   Private
+    #
+
+    def __repr__(self) -> str:
+        return f"HookJob: ({self.hook}, {self.object_id}, {self.status})"
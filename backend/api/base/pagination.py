@@ -0,0 +1,209 @@
+import base64
+import dataclasses
+import functools
+import json
+from typing import Any, Callable, Generic, Sequence, TypeVar
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from strawberry.utils.await_maybe import AwaitableOrValue
+from strawberry_django_plus.relay import Connection, Edge, PageInfo
+from strawberry_django_plus.settings import config
+
+from .resolvers import async_safe
+
+_M = TypeVar("_M", bound=models.Model)
+
+_cursor_type = "keyset"
+
+
+@dataclasses.dataclass(frozen=True)
+class PageArgs:
+    """The relay pagination arguments of a connection"""
+
+    before: str | None = None
+    after: str | None = None
+    first: int | None = None
+    last: int | None = None
+
+    def __post_init__(self):
+        max_results = config.RELAY_MAX_RESULTS
+        for name in ["first", "last"]:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if value < 0:
+                raise ValueError(f"Argument '{name}' must be a non-negative integer.")
+            if max_results is not None and value > max_results:
+                raise ValueError(f"Argument '{name}' cannot be higher than {max_results}.")
+
+        if self.first is not None and self.last is not None:
+            raise ValueError("Arguments 'first' and 'last' cannot be used together.")
+
+    @property
+    def backwards(self) -> bool:
+        """Whether the page is taken from the end of the results"""
+        return self.last is not None
+
+    @property
+    def limit(self) -> int | None:
+        if self.first is not None:
+            return self.first
+        if self.last is not None:
+            return self.last
+        return config.RELAY_MAX_RESULTS
+
+
+class KeysetConnection(Connection):
+    """Connection that only counts its nodes when the total count is requested"""
+
+    def __init__(self, *, edges: list[Edge], page_info: PageInfo, total_count: Callable[[], int]):
+        self.edges = edges
+        self.page_info = page_info
+        self._total_count = total_count
+
+    @functools.cached_property
+    def total_count(self) -> AwaitableOrValue[int]:  # type: ignore[override]
+        return async_safe(self._total_count)()
+
+
+class Keyset(Generic[_M]):
+    """Paginate a model by the values of an unique ordering instead of offsets.
+
+    Each page seeks straight to its cursor, so with an index over the ordering the
+    page N costs the same as the first one.
+    """
+
+    def __init__(self, model: type[_M], ordering: Sequence[str]):
+        super().__init__()
+        self.fields = [model._meta.get_field(name) for name in ordering]
+
+    def cursor(self, obj: _M) -> str:
+        values = [field.value_to_string(obj) for field in self.fields]
+        return base64.b64encode(f"{_cursor_type}:{json.dumps(values)}".encode()).decode()
+
+    def parse(self, cursor: str) -> list[Any]:
+        try:
+            cursor_type, _, raw = base64.b64decode(cursor).decode().partition(":")
+            values = json.loads(raw)
+            if cursor_type != _cursor_type or len(values) != len(self.fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    def order_by(self, *, reverse: bool = False) -> list[str]:
+        prefix = "-" if reverse else ""
+        return [f"{prefix}{field.name}" for field in self.fields]
+
+    def seek(self, qs: models.QuerySet[_M], cursor: str, *, reverse: bool = False):
+        """Filter the rows after the cursor, or before it when `reverse` is set"""
+        values = self.parse(cursor)
+        lookup = "lt" if reverse else "gt"
+
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            equals = {f.name: v for f, v in zip(self.fields[:i], values)}
+            condition |= Q(**equals, **{f"{field.name}__{lookup}": values[i]})
+
+        # Also bound the leading field alone, so the database can range scan the index
+        return qs.filter(condition, **{f"{self.fields[0].name}__{lookup}e": values[0]})
+
+    def filter(self, qs: models.QuerySet[_M], page: PageArgs) -> models.QuerySet[_M]:
+        """The rows of the page, ordered from the side it is taken"""
+        if page.after:
+            qs = self.seek(qs, page.after)
+        if page.before:
+            qs = self.seek(qs, page.before, reverse=True)
+
+        return qs.order_by(*self.order_by(reverse=page.backwards))
+
+    def paginate(self, qs: models.QuerySet[_M], page: PageArgs) -> list[_M]:
+        """Fetch the page, plus one row to tell if there are more"""
+        qs = self.filter(qs, page)
+        if page.limit is not None:
+            qs = qs[: page.limit + 1]
+
+        return list(qs)
+
+    def paginate_rows(self, rows: Sequence[_M], page: PageArgs) -> list[_M]:
+        """Take the page out of rows already fetched in the keyset order, like `paginate`"""
+
+        def values(obj: _M) -> list[Any]:
+            return [getattr(obj, field.attname) for field in self.fields]
+
+        if page.after:
+            after = self.parse(page.after)
+            rows = [obj for obj in rows if values(obj) > after]
+        if page.before:
+            before = self.parse(page.before)
+            rows = [obj for obj in rows if values(obj) < before]
+        if page.backwards:
+            rows = rows[::-1]
+        if page.limit is not None:
+            rows = rows[: page.limit + 1]
+
+        return list(rows)
+
+    def paginate_partitioned(
+        self,
+        qs: models.QuerySet[_M],
+        page: PageArgs,
+        *,
+        partition_by: str,
+    ) -> dict[Any, list[_M]]:
+        """Fetch the same page of each partition of the rows in a single query"""
+        field = qs.model._meta.get_field(partition_by)
+        qs = self.filter(qs, page)
+        if page.limit is None:
+            pages: dict[Any, list[_M]] = {}
+            for obj in qs:
+                pages.setdefault(getattr(obj, field.attname), []).append(obj)
+            return pages
+
+        qs = qs.annotate(
+            _page_row=Window(
+                RowNumber(),
+                partition_by=F(partition_by),
+                order_by=[
+                    F(f.name).desc() if page.backwards else F(f.name).asc() for f in self.fields
+                ],
+            ),
+        )
+        # Django can't filter by window functions, so the page is sliced by a wrapping query
+        sql, params = qs.query.sql_with_params()
+        raw = qs.model._default_manager.raw(
+            f"SELECT * FROM ({sql}) page WHERE page._page_row <= %s "
+            f"ORDER BY page.{field.column}, page._page_row",
+            [*params, page.limit + 1],
+        )
+
+        pages = {}
+        for obj in raw:
+            pages.setdefault(getattr(obj, field.attname), []).append(obj)
+        return pages
+
+    def connection(
+        self,
+        rows: list[_M],
+        page: PageArgs,
+        *,
+        total_count: Callable[[], int],
+    ) -> Connection[Any]:
+        """Build the connection of a page fetched by `paginate`"""
+        has_more = page.limit is not None and len(rows) > page.limit
+        rows = rows[: page.limit]
+        if page.backwards:
+            rows.reverse()
+
+        edges = [Edge(cursor=self.cursor(obj), node=obj) for obj in rows]
+        page_info = PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=has_more if page.backwards else page.after is not None,
+            has_next_page=page.before is not None if page.backwards else has_more,
+        )
+
+        return KeysetConnection(edges=edges, page_info=page_info, total_count=total_count)
@@ -0,0 +1,251 @@
+from collections import OrderedDict
+import functools
+import hashlib
+import json
+import pathlib
+import threading
+from typing import Any, Mapping
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.exceptions import SuspiciousOperation
+from django.http import HttpRequest, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from graphql import DocumentNode
+from strawberry.django.views import AsyncGraphQLView, GraphQLView
+from strawberry.exceptions import MissingQueryError
+from strawberry.extensions import Extension
+from strawberry.http import GraphQLRequestData, parse_request_data
+
+from .conditional import NotModified, _ConditionalViewMixin
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueryError(Exception):
+    code: str
+    status = 200
+
+    def as_response(self) -> JsonResponse:
+        return JsonResponse(
+            {"errors": [{"message": str(self), "extensions": {"code": self.code}}]},
+            status=self.status,
+        )
+
+
+class PersistedQueryNotFound(PersistedQueryError):
+    """The hash is unknown, the client should send it again with the query"""
+
+    code = "PERSISTED_QUERY_NOT_FOUND"
+
+
+class PersistedQueryNotAllowed(PersistedQueryError):
+    """The query is not in the allowlist"""
+
+    code = "PERSISTED_QUERY_NOT_ALLOWED"
+    status = 400
+
+
+class PersistedQueryStore:
+    """The allowlist of persisted queries, keyed by their SHA-256 hash.
+
+    The allowlist is the manifest shipped with the clients plus, when `auto_register`
+    is set, the queries the clients registered by sending them with their hash.
+    The parsed and validated documents of the most used queries are kept in memory.
+    """
+
+    def __init__(
+        self,
+        *,
+        manifest: Mapping[str, str] | None = None,
+        auto_register: bool = True,
+        only_persisted: bool = False,
+        max_documents: int = 500,
+        cache_alias: str = DEFAULT_CACHE_ALIAS,
+    ):
+        super().__init__()
+        self.auto_register = auto_register and not only_persisted
+        self.only_persisted = only_persisted
+        self.max_documents = max_documents
+        self._manifest = dict(manifest or {})
+        self._cache_alias = cache_alias
+        self._documents: OrderedDict[str, tuple[str, DocumentNode]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "PersistedQueryStore":
+        manifest = None
+        if settings.PERSISTED_QUERIES_MANIFEST:
+            manifest = json.loads(pathlib.Path(settings.PERSISTED_QUERIES_MANIFEST).read_text())
+
+        return cls(
+            manifest=manifest,
+            auto_register=settings.PERSISTED_QUERIES_AUTO_REGISTER,
+            only_persisted=settings.PERSISTED_QUERIES_ONLY,
+            max_documents=settings.PERSISTED_QUERIES_MAX_DOCUMENTS,
+        )
+
+    def get(self, digest: str) -> str | None:
+        """The query of the hash, if it is allowed"""
+        with self._lock:
+            entry = self._documents.get(digest)
+        if entry is not None:
+            return entry[0]
+
+        if digest in self._manifest:
+            return self._manifest[digest]
+
+        return caches[self._cache_alias].get(self._cache_key(digest))
+
+    def register(self, digest: str, query: str):
+        if not self.auto_register:
+            raise PersistedQueryNotAllowed("Registering persisted queries is not allowed")
+
+        caches[self._cache_alias].set(self._cache_key(digest), query, timeout=None)
+
+    def get_document(self, digest: str) -> DocumentNode | None:
+        with self._lock:
+            entry = self._documents.get(digest)
+            if entry is None:
+                return None
+
+            self._documents.move_to_end(digest)
+            return entry[1]
+
+    def set_document(self, digest: str, query: str, document: DocumentNode):
+        """Keep the document of the query, which must be already validated"""
+        with self._lock:
+            self._documents[digest] = (query, document)
+            self._documents.move_to_end(digest)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+
+    def _cache_key(self, digest: str) -> str:
+        return f"persisted-query:{digest}"
+
+
+@functools.lru_cache(maxsize=None)
+def get_persisted_query_store() -> PersistedQueryStore:
+    return PersistedQueryStore.from_settings()
+
+
+class PersistedQueryExtension(Extension):
+    """Reuse the parsed and validated documents of the persisted queries.
+
+    The view marks the request with the hash of the query when it is persisted.
+    """
+
+    def on_request_start(self):
+        request = getattr(self.execution_context.context, "request", None)
+        self._digest: str | None = getattr(request, "persisted_query", None)
+        self._cached = False
+
+    def on_parsing_start(self):
+        if self._digest is None:
+            return
+
+        document = get_persisted_query_store().get_document(self._digest)
+        if document is not None:
+            self.execution_context.graphql_document = document
+            self._cached = True
+
+    def on_validation_start(self):
+        if self._cached:
+            # The document was validated before being cached, skip it
+            self.execution_context.errors = []
+
+    def on_validation_end(self):
+        execution_context = self.execution_context
+        if self._digest is None or self._cached or execution_context.errors:
+            return
+
+        assert execution_context.graphql_document
+        get_persisted_query_store().set_document(
+            self._digest,
+            execution_context.query,
+            execution_context.graphql_document,
+        )
+
+
+class _PersistedQueryViewMixin:
+    """Accept the persisted queries by their hash.
+
+    The hash is sent with the automatic persisted queries protocol, as the
+    `extensions.persistedQuery.sha256Hash` of the request.
+    """
+
+    def get_request_data(self, request: HttpRequest) -> GraphQLRequestData:
+        try:
+            data = self.parse_body(request)  # type: ignore
+        except json.decoder.JSONDecodeError:
+            raise SuspiciousOperation("Unable to parse request body as JSON")
+
+        query = self.get_persisted_query(request, data)
+        if query is not None:
+            data = {**data, "query": query}
+
+        try:
+            return parse_request_data(data)
+        except MissingQueryError:
+            raise SuspiciousOperation("No GraphQL query found in the request")
+
+    def get_persisted_query(self, request: HttpRequest, data: dict[str, Any]) -> str | None:
+        store = get_persisted_query_store()
+        query: str | None = data.get("query")
+
+        extensions = data.get("extensions") or {}
+        if isinstance(extensions, str):
+            extensions = json.loads(extensions)
+        digest = (extensions.get("persistedQuery") or {}).get("sha256Hash")
+
+        if digest is None:
+            if query is None or not store.only_persisted:
+                return query
+
+            digest = query_hash(query)
+            if store.get(digest) is None:
+                raise PersistedQueryNotAllowed("Only persisted queries are allowed")
+        elif query is None:
+            query = store.get(digest)
+            if query is None:
+                raise PersistedQueryNotFound("PersistedQueryNotFound")
+        elif query_hash(query) != digest:
+            raise SuspiciousOperation("The persisted query hash does not match the query")
+        elif store.get(digest) is None:
+            store.register(digest, query)
+
+        request.persisted_query = digest  # type: ignore
+        return query
+
+
+class PersistedQueryGraphQLView(_ConditionalViewMixin, _PersistedQueryViewMixin, GraphQLView):
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            self.check_not_modified(request)
+            return super().dispatch(request, *args, **kwargs)
+        except (PersistedQueryError, NotModified) as e:
+            return e.as_response()
+
+
+class AsyncPersistedQueryGraphQLView(
+    _ConditionalViewMixin,
+    _PersistedQueryViewMixin,
+    AsyncGraphQLView,
+):
+    @method_decorator(csrf_exempt)
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            # The versions are looked up in the database
+            await sync_to_async(self.check_not_modified)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except (PersistedQueryError, NotModified) as e:
+            return e.as_response()
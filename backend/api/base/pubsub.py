@@ -0,0 +1,167 @@
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import functools
+import threading
+from typing import AsyncIterator, Callable
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+Deliver = Callable[[str, str], None]
+
+
+class SubscriptionOverflow(Exception):
+    """The subscriber fell too far behind, the messages it missed are lost"""
+
+
+class Broadcast:
+    """Carries the messages published by any process to the subscribers of all of them"""
+
+    # Whether the messages only reach the subscribers of the process publishing them
+    local = False
+
+    def publish(self, channel: str, message: str):
+        raise NotImplementedError
+
+    def start(self, deliver: Deliver):
+        """Pass the messages published to any channel to `deliver`, from now on"""
+        raise NotImplementedError
+
+
+class LocalBroadcast(Broadcast):
+    """Deliver the messages to the subscribers of this process only.
+
+    The stand-in broker of a single process deployment and of the tests.
+    """
+
+    local = True
+
+    def __init__(self):
+        super().__init__()
+        self._deliver: Deliver | None = None
+
+    def publish(self, channel: str, message: str):
+        if self._deliver is not None:
+            self._deliver(channel, message)
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+
+class RedisBroadcast(Broadcast):
+    """Broadcast the messages through the pub/sub of a Redis-compatible server.
+
+    Each process listens to all the channels from a thread of its own, and keeps the
+    messages of the channels without local subscribers out of the event loops.
+    """
+
+    def __init__(self, url: str, *, prefix: str = "pubsub:"):
+        super().__init__()
+        # Only needed by the deployments using it
+        import redis
+
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def publish(self, channel: str, message: str):
+        self._redis.publish(self.prefix + channel, message)
+
+    def start(self, deliver: Deliver):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(self.prefix + "*")
+
+        def listen():
+            for message in pubsub.listen():
+                channel = message["channel"].decode()[len(self.prefix) :]
+                deliver(channel, message["data"].decode())
+
+        threading.Thread(target=listen, name="pubsub", daemon=True).start()
+
+
+@dataclasses.dataclass(eq=False)
+class _Subscriber:
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue[str | None]
+    max_pending: int
+    overflowed: bool = False
+
+    def put(self, message: str):
+        if self.overflowed:
+            return
+
+        if self.queue.qsize() >= self.max_pending:
+            # It raises SubscriptionOverflow once it gets here, the next messages are dropped
+            self.overflowed = True
+            self.queue.put_nowait(None)
+        else:
+            self.queue.put_nowait(message)
+
+
+class PubSub:
+    """Publish messages to the subscribers of a channel, through the broadcast backend.
+
+    Messages are published from the sync code, usually when a transaction commits, and
+    consumed by the subscribers from their event loops. A subscriber that falls
+    `max_pending` messages behind is dropped with `SubscriptionOverflow`.
+    """
+
+    def __init__(self, backend: Broadcast, *, max_pending: int = 1000):
+        super().__init__()
+        self.backend = backend
+        self.max_pending = max_pending
+        self._subscribers: dict[str, set[_Subscriber]] = collections.defaultdict(set)
+        self._lock = threading.Lock()
+        self._started = False
+
+    @classmethod
+    def from_settings(cls) -> "PubSub":
+        backend = import_string(settings.PUBSUB_BACKEND)(**settings.PUBSUB_OPTIONS)
+        return cls(backend, max_pending=settings.PUBSUB_MAX_PENDING)
+
+    def publish(self, channel: str, message: str):
+        self.backend.publish(channel, message)
+
+    def has_subscribers(self, channel: str) -> bool:
+        """Whether the messages published to the channel may reach any subscriber"""
+        if not self.backend.local:
+            return True
+
+        with self._lock:
+            return channel in self._subscribers
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        """The messages published to the channel from now on, until the iterator is closed"""
+        subscriber = _Subscriber(asyncio.get_running_loop(), asyncio.Queue(), self.max_pending)
+        with self._lock:
+            if not self._started:
+                self.backend.start(self._deliver)
+                self._started = True
+            self._subscribers[channel].add(subscriber)
+
+        try:
+            while True:
+                message = await subscriber.queue.get()
+                if message is None:
+                    raise SubscriptionOverflow(f"More than {self.max_pending} pending messages")
+                yield message
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def _deliver(self, channel: str, message: str):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+
+        for subscriber in subscribers:
+            # The loop may have been closed before the subscriber unsubscribed
+            with contextlib.suppress(RuntimeError):
+                subscriber.loop.call_soon_threadsafe(subscriber.put, message)
+
+
+@functools.lru_cache(maxsize=None)
+def get_pubsub() -> PubSub:
+    return PubSub.from_settings()
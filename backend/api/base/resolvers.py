@@ -0,0 +1,52 @@
+import concurrent.futures
+import functools
+from typing import Callable, TypeVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from strawberry.utils.await_maybe import AwaitableOrValue
+from strawberry_django.utils import is_async
+from typing_extensions import ParamSpec
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+
+@functools.lru_cache(maxsize=None)
+def _executor(max_workers: int) -> concurrent.futures.ThreadPoolExecutor:
+    return concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix="resolver",
+    )
+
+
+def _run(f: Callable[_P, _R], *args: _P.args, **kwargs: _P.kwargs) -> _R:
+    # Each thread of the pool keeps its own connection, dropped like at the start of a
+    # request once it is too old or unusable
+    close_old_connections()
+    return f(*args, **kwargs)
+
+
+def async_safe(f: Callable[_P, _R]) -> Callable[_P, AwaitableOrValue[_R]]:
+    """Run the sync resolver in a thread when the schema is executed by the async view.
+
+    Unlike `resolvers.async_safe`, the resolvers don't all wait for the single thread
+    of the request, but run in a pool of `GRAPHQL_RESOLVER_THREADS` threads, so the slow
+    ones of a request run at the same time. Without threads, they run in the thread of
+    the request, as the tests do, whose transaction is only seen by that thread.
+    """
+
+    @functools.wraps(f)
+    def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> AwaitableOrValue[_R]:
+        if not is_async():
+            return f(*args, **kwargs)
+
+        threads = settings.GRAPHQL_RESOLVER_THREADS
+        if not threads:
+            return sync_to_async(f)(*args, **kwargs)
+
+        run = sync_to_async(_run, thread_sensitive=False, executor=_executor(threads))
+        return run(f, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,120 @@
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+from strawberry_django_plus.relay import to_base64
+
+from api.list.models import List
+from api.tests.faker import ListFactory, ListItemFactory, UserFactory
+
+_query = """
+    query List($id: GlobalID!, $ifVersion: Int){
+        list(id: $id, ifVersion: $ifVersion){
+            title
+            version
+            items{
+                edges{
+                    node{
+                        name
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
+def _post(client, obj: List, query: str = _query, etag: str | None = None, **variables):
+    body = {"query": query, "variables": {"id": to_base64("ListType", obj.pk), **variables}}
+    headers = {"HTTP_IF_NONE_MATCH": etag} if etag is not None else {}
+
+    return client.post("/api/graphql/", data=body, content_type="application/json", **headers)
+
+
+def test_if_version(client):
+    obj = ListFactory.create()
+    ListItemFactory.create(list=obj)
+
+    data = _post(client, obj).json()["data"]["list"]
+    assert data["version"] == List.objects.get(pk=obj.pk).version
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = _post(client, obj, ifVersion=data["version"])
+    assert response.json()["data"] == {"list": None}
+    assert len(ctx.captured_queries) == 1
+
+    ListItemFactory.create(list=obj)
+    data = _post(client, obj, ifVersion=data["version"]).json()["data"]["list"]
+    assert len(data["items"]["edges"]) == 2
+
+
+def test_if_none_match(client):
+    obj = ListFactory.create()
+    other = ListFactory.create()
+    response = _post(client, obj)
+    etag = response["ETag"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = _post(client, obj, etag=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert len(ctx.captured_queries) == 1
+
+    # The tag is of the request it was computed for
+    assert _post(client, other, etag=etag).status_code == 200
+    assert _post(client, obj, etag=f'W/"other", {etag}').status_code == 304
+
+    ListItemFactory.create(list=obj)
+    response = _post(client, obj, etag=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_if_none_match_user(client):
+    owner = UserFactory.create()
+    obj = ListFactory.create(owner=owner, is_public=True)
+    etag = _post(client, obj)["ETag"]
+
+    # The tags of a session are not valid for the others
+    client.force_login(owner)
+    assert _post(client, obj, etag=etag).status_code == 200
+    owner_etag = _post(client, obj)["ETag"]
+    assert owner_etag != etag
+    assert _post(client, obj, etag=owner_etag).status_code == 304
+
+    client.force_login(UserFactory.create())
+    assert _post(client, obj, etag=owner_etag).status_code == 200
+
+
+def test_if_none_match_async(async_client, settings):
+    settings.ROOT_URLCONF = "api.tests.asgi_urls"
+    obj = ListFactory.create()
+
+    async def post(**kwargs):
+        return await async_client.post(
+            "/api/graphql/",
+            data={"query": _query, "variables": {"id": to_base64("ListType", obj.pk)}},
+            content_type="application/json",
+            **kwargs,
+        )
+
+    etag = async_to_sync(post)()["ETag"]
+    # The async client takes the headers by their names instead of their WSGI keys
+    response = async_to_sync(post)(**{"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        pytest.param("query Me{ me{ id } }", id="unversioned"),
+        pytest.param(
+            "query List($id: GlobalID!){ list(id: $id){ title } me{ id } }",
+            id="partly_versioned",
+        ),
+        pytest.param("query List($id: GlobalID!){ list(id: $id){ unknown } }", id="errors"),
+    ],
+)
+def test_not_tagged(client, query):
+    response = _post(client, ListFactory.create(), query=query)
+    assert not response.has_header("ETag")
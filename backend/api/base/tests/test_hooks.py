@@ -0,0 +1,255 @@
+import datetime
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import signals
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import pytest
+
+from api.base import hooks
+from api.base.models import HookJob
+from api.list.models import List, ListItem, ListMembership
+from api.tests.faker import ListFactory, ListItemFactory, UserFactory
+
+
+@pytest.fixture
+def on_commit(settings, django_capture_on_commit_callbacks):
+    # The tests run the on_commit hooks right away, unless told otherwise
+    settings.RUNNING_TESTS = False
+    return django_capture_on_commit_callbacks
+
+
+def _membership_inserts(ctx: CaptureQueriesContext) -> list[str]:
+    return [
+        q["sql"]
+        for q in ctx.captured_queries
+        if q["sql"].startswith("INSERT") and '"list_listmembership"' in q["sql"]
+    ]
+
+
+class TestBatchedHooks:
+    def test_batch(self, on_commit):
+        owner = UserFactory.create()
+
+        with on_commit() as callbacks:
+            lists = ListFactory.create_batch(3, owner=owner)
+        assert not ListMembership.objects.filter(list__in=lists).exists()
+        assert len([c for c in callbacks if isinstance(c, hooks._CommitCallback)]) == 1
+
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+
+        assert len(_membership_inserts(ctx)) == 1
+        assert set(
+            ListMembership.objects.filter(list__in=lists).values_list("list", "user", "role")
+        ) == {(obj.pk, owner.pk, "owner") for obj in lists}
+
+    def test_coalesce(self, on_commit):
+        with on_commit(execute=True):
+            obj = ListFactory.create()
+            obj.title = "Renamed"
+            obj.save()
+            obj.description = "Described"
+            obj.save()
+
+        assert List.objects.get(pk=obj.pk).title == "Renamed"
+        assert ListMembership.objects.get(list=obj).role == "owner"
+
+    def test_savepoint_rollback(self, on_commit):
+        with on_commit(execute=True):
+            kept = ListFactory.create()
+            try:
+                with transaction.atomic():
+                    ListFactory.create()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            after = ListFactory.create()
+
+        assert set(ListMembership.objects.values_list("list", flat=True)) == {kept.pk, after.pk}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_transaction_rollback(self, settings):
+        settings.RUNNING_TESTS = False
+        with pytest.raises(RuntimeError), transaction.atomic():
+            ListFactory.create()
+            raise RuntimeError
+
+        # The batch of the transaction rolled back isn't reused by the next one
+        with transaction.atomic():
+            obj = ListFactory.create()
+
+        assert list(ListMembership.objects.values_list("list", flat=True)) == [obj.pk]
+
+    def test_instance_call(self):
+        obj = ListFactory.create()
+        ListMembership.objects.filter(list=obj).delete()
+
+        obj.post_save(created=True)
+        assert ListMembership.objects.get(list=obj).user == obj.owner
+
+
+class TestDispatch:
+    def test_direct(self):
+        assert not signals.post_save.has_listeners(ListItem)
+        assert signals.post_delete.has_listeners(ListItem)
+
+        item = ListItemFactory.create(value=2, quantity=3)
+        assert List.objects.get(pk=item.list_id).subtotal_cached == 6
+
+        item.quantity = 4
+        item.save()
+        assert List.objects.get(pk=item.list_id).subtotal_cached == 8
+
+    def test_signals(self):
+        with hooks.use_signals():
+            assert signals.post_save.has_listeners(ListItem)
+
+            item = ListItemFactory.create(value=2, quantity=3)
+            item.quantity = 4
+            item.save()
+            assert List.objects.get(pk=item.list_id).subtotal_cached == 8
+            assert ListMembership.objects.get(list=item.list).role == "owner"
+
+        assert not signals.post_save.has_listeners(ListItem)
+
+    def test_send_batch(self):
+        obj = ListFactory.create()
+        version = List.objects.get(pk=obj.pk).version
+
+        # The hooks run once for the whole batch, updating the list a single time
+        with CaptureQueriesContext(connection) as ctx:
+            obj.add_items([{"name": "A", "value": 2, "quantity": 3}, {"name": "B", "value": 1}])
+        [update] = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        assert update.startswith('UPDATE "list_list"')
+
+        obj = List.objects.get(pk=obj.pk)
+        assert (obj.subtotal_cached, obj.active_item_count, obj.version) == (7, 2, version + 1)
+
+        # Or once for each of them, through the signals
+        with hooks.use_signals():
+            obj.add_items([{"name": "C", "value": 5}, {"name": "D", "value": 5}])
+        obj = List.objects.get(pk=obj.pk)
+        assert (obj.subtotal_cached, obj.active_item_count, obj.version) == (17, 4, version + 3)
+
+
+class TestDeferredHooks:
+    @pytest.fixture(autouse=True)
+    def deferred(self, settings):
+        # The tests run the deferred hooks right away, unless told otherwise
+        settings.RUNNING_TESTS = False
+
+    @pytest.fixture
+    def list(self):
+        list = ListFactory.create()
+        HookJob.objects.all().delete()
+        return list
+
+    @pytest.fixture
+    def updated(self, monkeypatch):
+        updated = []
+        monkeypatch.setattr(
+            ListItem.search_index,
+            "update_instance",
+            lambda obj, update_fields=None: updated.append(obj.pk),
+        )
+        return updated
+
+    def test_enqueue(self, list, updated):
+        item = ListItemFactory.create(list=list)
+        assert updated == []
+
+        [job] = HookJob.objects.all()
+        assert (job.hook, job.object_id, job.status) == (
+            "list.ListItem.update_search_vector",
+            item.pk,
+            "pending",
+        )
+
+        # Saving it again before the job runs doesn't enqueue it again
+        item.name = "Renamed"
+        item.save()
+        item.name = "Renamed again"
+        item.save()
+        assert HookJob.objects.count() == 2
+
+        # Neither do the saves of other fields
+        item.quantity += 1
+        item.save()
+        assert HookJob.objects.count() == 2
+
+        assert hooks.run_deferred() == 2
+        assert not HookJob.objects.exists()
+        assert updated == [item.pk, item.pk]
+
+    def test_enqueue_batch(self, list, updated):
+        list.add_items([{"name": "A"}, {"name": "B"}])
+
+        with CaptureQueriesContext(connection) as ctx:
+            list.add_items([{"name": "C"}, {"name": "D"}])
+        # The jobs of the items added together are inserted together
+        table = f'"{HookJob._meta.db_table}"'
+        assert len([q for q in ctx.captured_queries if table in q["sql"]]) == 1
+
+        assert hooks.run_deferred() == 4
+        assert sorted(updated) == sorted(list.items.values_list("pk", flat=True))
+
+    def test_retry(self, list, monkeypatch):
+        def fail(obj, update_fields=None):
+            raise RuntimeError("Index unavailable")
+
+        monkeypatch.setattr(ListItem.search_index, "update_instance", fail)
+        ListItemFactory.create(list=list)
+
+        assert hooks.run_deferred(max_attempts=2) == 1
+        job = HookJob.objects.get()
+        assert (job.status, job.attempts) == ("pending", 1)
+        assert "Index unavailable" in job.last_error
+
+        # Retried after a backoff
+        assert hooks.run_deferred(max_attempts=2) == 0
+        HookJob.objects.update(run_after=job.run_after - datetime.timedelta(hours=1))
+        assert hooks.run_deferred(max_attempts=2) == 1
+        job = HookJob.objects.get()
+        assert (job.status, job.attempts) == ("failed", 2)
+
+        HookJob.objects.update(run_after=job.run_after - datetime.timedelta(hours=1))
+        assert hooks.run_deferred(max_attempts=2) == 0
+
+    def test_expired_lease(self, list, updated):
+        ListItemFactory.create(list=list)
+        HookJob.objects.update(
+            status="running", run_after=timezone.now() - datetime.timedelta(hours=1)
+        )
+
+        assert hooks.run_deferred() == 1
+        assert len(updated) == 1
+
+    def test_concurrent_claims(self, list, updated, monkeypatch):
+        ListItemFactory.create_batch(2, list=list)
+        # Both workers claim at the same time, as they may on a coarse clock
+        now = timezone.now()
+        monkeypatch.setattr(timezone, "now", lambda: now)
+
+        lease = datetime.timedelta(minutes=5)
+        first = hooks._claim(1, lease, "default")
+        second = hooks._claim(1, lease, "default")
+        assert len(first) == len(second) == 1
+        assert first[0].pk != second[0].pk
+
+    def test_deleted(self, list, updated):
+        item = ListItemFactory.create(list=list)
+        item.delete()
+
+        assert hooks.run_deferred() == 1
+        assert updated == []
+        assert not HookJob.objects.exists()
+
+    def test_worker_command(self, list, updated):
+        ListItemFactory.create_batch(3, list=list)
+
+        call_command("run_hook_worker", "--once", "--batch-size", "2")
+        assert len(updated) == 3
+        assert not HookJob.objects.exists()
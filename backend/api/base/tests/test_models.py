@@ -0,0 +1,143 @@
+import datetime
+
+from django.db import connection
+from django.forms import ValidationError
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import pytest
+
+from api.base.models import skip_validation, validation
+from api.list.models import ListItem
+from api.tests.faker import ListFactory, ListItemFactory
+
+
+def _item_updates(ctx: CaptureQueriesContext) -> list[str]:
+    return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "list_listitem"')]
+
+
+class TestBaseModel:
+    def test_update_fields(self):
+        item = ListItem.objects.get(pk=ListItemFactory.create().pk)
+        item.quantity = 3
+        item.name = "Not saved"
+
+        with CaptureQueriesContext(connection) as ctx:
+            item.save(update_fields=["quantity"])
+
+        [sql] = _item_updates(ctx)
+        assert '"quantity"' in sql and '"name"' not in sql
+        item.refresh_from_db()
+        assert (item.quantity, item.name) != (3, "Not saved")
+
+    def test_changed_fields(self):
+        item = ListItem.objects.get(pk=ListItemFactory.create().pk)
+        assert item.changed_fields == set()
+
+        item.quantity += 1
+        assert item.changed_fields == {"quantity"}
+
+        item.save()
+        assert item.changed_fields == set()
+        assert ListItem().changed_fields >= {"name", "quantity"}
+
+    def test_dirty_fields(self):
+        item = ListItem.objects.get(pk=ListItemFactory.create().pk)
+
+        with CaptureQueriesContext(connection) as ctx:
+            item.save()
+        assert _item_updates(ctx) == []
+
+        item.quantity = 4
+        with CaptureQueriesContext(connection) as ctx:
+            item.save()
+        [sql] = _item_updates(ctx)
+        assert '"quantity"' in sql and '"name"' not in sql and '"value"' not in sql
+
+        with CaptureQueriesContext(connection) as ctx:
+            item.save()
+        assert _item_updates(ctx) == []
+
+    def test_dirty_deferred_fields(self):
+        item = ListItem.objects.only("pk", "list").get(pk=ListItemFactory.create().pk)
+        assert item.changed_fields == set()
+
+        item.name = "Renamed"
+        assert item.changed_fields == {"name"}
+        item.save()
+
+        item = ListItem.objects.get(pk=item.pk)
+        assert item.name == "Renamed"
+        assert item.changed_fields == set()
+
+    def test_validate_changed_fields(self):
+        item = ListItemFactory.create()
+        ListItem.objects.filter(pk=item.pk).update(name="")
+        item = ListItem.objects.get(pk=item.pk)
+
+        # Only the changed fields are validated, the unique checks are skipped too
+        item.quantity = 2
+        with CaptureQueriesContext(connection) as ctx:
+            item.save()
+        assert not [q for q in ctx.captured_queries if q["sql"].startswith("SELECT (1)")]
+
+        item.name = "x" * 256
+        item.quantity = 3
+        with pytest.raises(ValidationError) as e:
+            item.save()
+        assert set(e.value.message_dict) == {"name"}
+
+        item.name = "Item"
+        item.save()
+
+        with validation("full"), pytest.raises(ValidationError):
+            ListItem.objects.filter(pk=item.pk).update(name="")
+            ListItem.objects.get(pk=item.pk).save()
+
+    def test_skip_validation(self):
+        list = ListFactory.create()
+
+        with pytest.raises(ValidationError):
+            ListItem(list=list, name="").save()
+
+        with skip_validation():
+            item = ListItem(list=list, name="")
+            item.save()
+
+        assert ListItem.objects.filter(pk=item.pk).exists()
+
+
+class TestTimestampedMixin:
+    def _stale(self, item: ListItem) -> datetime.datetime:
+        stale = timezone.now() - datetime.timedelta(days=1)
+        ListItem.objects.filter(pk=item.pk).update(updated_at=stale)
+        return stale
+
+    def test_save(self):
+        item = ListItemFactory.create()
+        stale = self._stale(item)
+
+        item = ListItem.objects.get(pk=item.pk)
+        item.quantity += 1
+        item.save()
+        assert ListItem.objects.get(pk=item.pk).updated_at > stale
+
+    def test_update(self):
+        item = ListItemFactory.create()
+        stale = self._stale(item)
+
+        item.list.remove_items(item)
+        assert ListItem.objects.get(pk=item.pk).updated_at > stale
+
+        stale = self._stale(item)
+        item.list.items.update(quantity=2)
+        assert ListItem.objects.get(pk=item.pk).updated_at > stale
+
+    def test_updated_since_uses_index(self):
+        ListItemFactory.create_batch(3)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as c:
+                # The tables of the tests are too small for the planner to prefer an index
+                c.execute("SET LOCAL enable_seqscan = off")
+
+        plan = ListItem.objects.filter(updated_at__gte=timezone.now()).explain()
+        assert "list_listitem_updated_at" in plan, plan
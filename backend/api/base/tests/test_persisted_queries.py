@@ -0,0 +1,80 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+import pytest
+
+from api.base.persisted_queries import get_persisted_query_store, query_hash
+
+_query = "query TestMe{ me{ id } }"
+
+
+@pytest.fixture(autouse=True)
+def _clear_store():
+    get_persisted_query_store.cache_clear()
+    cache.clear()
+    yield
+    get_persisted_query_store.cache_clear()
+
+
+def _post(client, query: str | None = None, digest: str | None = None):
+    body: dict[str, object] = {}
+    if query is not None:
+        body["query"] = query
+    if digest is not None:
+        body["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": digest}}
+
+    return client.post("/api/graphql/", data=body, content_type="application/json")
+
+
+def _error_code(response) -> str:
+    return response.json()["errors"][0]["extensions"]["code"]
+
+
+def test_unknown_hash(client):
+    response = _post(client, digest=query_hash(_query))
+
+    assert response.status_code == 200
+    assert _error_code(response) == "PERSISTED_QUERY_NOT_FOUND"
+
+
+def test_register_and_run_by_hash(client):
+    digest = query_hash(_query)
+
+    response = _post(client, query=_query, digest=digest)
+    assert response.json() == {"data": {"me": None}}
+
+    # Requests sending only the hash skip parsing and validation
+    with mock.patch("strawberry.schema.execute.parse_document") as parse, mock.patch(
+        "strawberry.schema.execute.validate_document"
+    ) as validate:
+        response = _post(client, digest=digest)
+
+    assert response.json() == {"data": {"me": None}}
+    parse.assert_not_called()
+    validate.assert_not_called()
+
+
+def test_hash_mismatch(client):
+    response = _post(client, query=_query, digest=query_hash("query { me { email } }"))
+
+    assert response.status_code == 400
+
+
+def test_only_persisted(client, settings, tmp_path):
+    manifest = tmp_path / "persisted-queries.json"
+    manifest.write_text(json.dumps({query_hash(_query): _query}))
+    settings.PERSISTED_QUERIES_MANIFEST = manifest
+    settings.PERSISTED_QUERIES_ONLY = True
+
+    assert _post(client, digest=query_hash(_query)).json() == {"data": {"me": None}}
+    assert _post(client, query=_query).json() == {"data": {"me": None}}
+
+    other = "query { me { email } }"
+    response = _post(client, query=other)
+    assert response.status_code == 400
+    assert _error_code(response) == "PERSISTED_QUERY_NOT_ALLOWED"
+
+    response = _post(client, query=other, digest=query_hash(other))
+    assert response.status_code == 400
+    assert _error_code(response) == "PERSISTED_QUERY_NOT_ALLOWED"
@@ -0,0 +1,51 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+import pytest
+
+from api.base.pubsub import LocalBroadcast, PubSub, SubscriptionOverflow
+
+
+def test_publish():
+    pubsub = PubSub(LocalBroadcast())
+
+    async def run() -> list[str]:
+        subscription = pubsub.subscribe("a")
+        received = asyncio.ensure_future(subscription.__anext__())
+        await asyncio.sleep(0)
+        assert pubsub.has_subscribers("a")
+        assert not pubsub.has_subscribers("b")
+
+        pubsub.publish("b", "ignored")
+        pubsub.publish("a", "first")
+        pubsub.publish("a", "second")
+        messages = [await received, await subscription.__anext__()]
+
+        await subscription.aclose()
+        assert not pubsub.has_subscribers("a")
+        return messages
+
+    assert async_to_sync(run)() == ["first", "second"]
+
+
+def test_overflow():
+    pubsub = PubSub(LocalBroadcast(), max_pending=2)
+
+    async def run() -> list[str]:
+        subscription = pubsub.subscribe("a")
+        received = asyncio.ensure_future(subscription.__anext__())
+        await asyncio.sleep(0)
+
+        for i in range(5):
+            pubsub.publish("a", str(i))
+        # Delivered through the loop of the subscriber
+        await asyncio.sleep(0)
+
+        messages = [await received]
+        with pytest.raises(SubscriptionOverflow):
+            while True:
+                messages.append(await subscription.__anext__())
+        assert not pubsub.has_subscribers("a")
+        return messages
+
+    assert async_to_sync(run)() == ["0", "1"]
@@ -0,0 +1,73 @@
+from typing import Any, Iterable
+
+from django.db import models
+from strawberry.types import Info
+from strawberry.utils.await_maybe import AwaitableOrValue
+from strawberry_django_plus.permissions import filter_with_perms
+from strawberry_django_plus.relay import Connection
+from strawberry_django_plus.utils import aio
+
+from .pagination import Keyset, PageArgs
+from .resolvers import async_safe
+
+
+class KeysetPaginated:
+    """Relay node mixin that paginates its connections by keyset instead of offset.
+
+    The nodes are ordered by `keyset_ordering`, which must be unique and should be
+    covered by an index.
+    """
+
+    keyset_ordering = ("created_at", "id")
+
+    @classmethod
+    def keyset(cls) -> Keyset:
+        return Keyset(cls._django_type.model, cls.keyset_ordering)  # type: ignore
+
+    @classmethod
+    def resolve_connection(
+        cls,
+        *,
+        info: Info | None = None,
+        nodes: Iterable[Any] | None = None,
+        total_count: int | None = None,
+        before: str | None = None,
+        after: str | None = None,
+        first: int | None = None,
+        last: int | None = None,
+    ) -> AwaitableOrValue[Connection[Any]]:
+        if nodes is None:
+            nodes = cls._django_type.model._default_manager.all()  # type: ignore
+
+        if aio.is_awaitable(nodes, info=info):
+            return aio.resolve_async(
+                nodes,
+                lambda resolved: cls.resolve_connection(
+                    info=info,
+                    nodes=resolved,
+                    total_count=total_count,
+                    before=before,
+                    after=after,
+                    first=first,
+                    last=last,
+                ),
+                info=info,
+            )
+
+        assert isinstance(nodes, models.QuerySet)
+        if info is not None:
+            nodes = filter_with_perms(nodes, info)
+
+        qs = nodes
+        keyset = cls.keyset()
+        page = PageArgs(before=before, after=after, first=first, last=last)
+
+        @async_safe
+        def resolve() -> Connection[Any]:
+            return keyset.connection(
+                keyset.paginate(qs, page),
+                page,
+                total_count=qs.count if total_count is None else lambda: total_count,
+            )
+
+        return resolve()
@@ -0,0 +1,162 @@
+import dataclasses
+import datetime
+from importlib import import_module
+import json
+from typing import Any, Awaitable, Callable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.http import HttpRequest
+from django.http.cookie import parse_cookie
+from django.http.request import split_domain_port, validate_host
+from strawberry.schema import BaseSchema
+from strawberry.subscriptions import GRAPHQL_TRANSPORT_WS_PROTOCOL
+from strawberry.subscriptions.protocols.graphql_transport_ws.handlers import (
+    BaseGraphQLTransportWSHandler,
+)
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+@dataclasses.dataclass
+class WebSocketContext:
+    """The context of the operations sent through a WebSocket, like the one of a request"""
+
+    request: HttpRequest
+    response: None = None
+
+
+def _headers(scope: Scope) -> dict[str, str]:
+    return {name.decode("latin1"): value.decode("latin1") for name, value in scope["headers"]}
+
+
+def _origin_allowed(scope: Scope) -> bool:
+    """Whether the page that opened the WebSocket is served by one of the allowed hosts"""
+    origin = _headers(scope).get("origin")
+    if origin is None:
+        # Not opened by a browser
+        return True
+
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = [".localhost", "127.0.0.1", "[::1]"]
+
+    domain, _ = split_domain_port(origin.partition("://")[2])
+    return bool(domain) and validate_host(domain, allowed_hosts)
+
+
+def _request(scope: Scope) -> HttpRequest:
+    """A request with the user of the session of the WebSocket, for the resolvers"""
+    headers = _headers(scope)
+    request = HttpRequest()
+    request.path = scope["path"]
+    request.META = {
+        f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()
+    }
+
+    cookies = parse_cookie(headers.get("cookie", ""))
+    engine = import_module(settings.SESSION_ENGINE)
+    request.session = engine.SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))
+    request.user = auth.get_user(request)
+    return request
+
+
+class GraphQLTransportWSHandler(BaseGraphQLTransportWSHandler):
+    """Serve the GraphQL operations of a WebSocket with the graphql-transport-ws protocol"""
+
+    def __init__(
+        self,
+        schema: BaseSchema,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        *,
+        connection_init_wait_timeout: datetime.timedelta = datetime.timedelta(minutes=1),
+    ):
+        super().__init__(
+            schema,
+            debug=False,
+            connection_init_wait_timeout=connection_init_wait_timeout,
+        )
+        self._scope = scope
+        self._receive = receive
+        self._send = send
+        self._request: HttpRequest | None = None
+        self._closed = False
+
+    async def get_context(self) -> WebSocketContext:
+        # The user is loaded once, when the first operation starts. Each operation gets a
+        # context of its own, so they don't share what the resolvers cache on it
+        if self._request is None:
+            self._request = await sync_to_async(_request)(self._scope)
+        return WebSocketContext(request=self._request)
+
+    async def get_root_value(self) -> None:
+        return None
+
+    async def send_json(self, data: dict):
+        if not self._closed:
+            await self._send({"type": "websocket.send", "text": json.dumps(data)})
+
+    async def close(self, code: int, reason: str):
+        if not self._closed:
+            self._closed = True
+            await self._send({"type": "websocket.close", "code": code, "reason": reason})
+
+    async def handle_request(self):
+        message = await self._receive()
+        if message["type"] != "websocket.connect":
+            return
+
+        if GRAPHQL_TRANSPORT_WS_PROTOCOL not in self._scope.get("subprotocols", []):
+            await self.close(code=4406, reason="Subprotocol not acceptable")
+            return
+        if not _origin_allowed(self._scope):
+            await self.close(code=4403, reason="Forbidden")
+            return
+
+        await self._send({"type": "websocket.accept", "subprotocol": GRAPHQL_TRANSPORT_WS_PROTOCOL})
+        try:
+            while not self._closed:
+                message = await self._receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+
+                try:
+                    data = json.loads(message.get("text") or "")
+                except ValueError:
+                    data = None
+                if isinstance(data, dict):
+                    await self.handle_message(data)
+                else:
+                    await self.handle_invalid_message("WebSocket message must be a JSON object")
+        finally:
+            self._closed = True
+            for operation_id in list(self.subscriptions):
+                await self.cleanup_operation(operation_id)
+            await self.reap_completed_tasks()
+            if self.connection_init_timeout_task is not None:
+                self.connection_init_timeout_task.cancel()
+
+
+class GraphQLWebSocketRouter:
+    """Serve the GraphQL WebSockets of `path`, and everything else with `app`"""
+
+    def __init__(self, app: ASGIApp, schema: BaseSchema, *, path: str = "/api/graphql/"):
+        super().__init__()
+        self.app = app
+        self.schema = schema
+        self.path = path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "websocket":
+            await self.app(scope, receive, send)
+        elif scope["path"] != self.path:
+            await receive()
+            await send({"type": "websocket.close", "code": 4404})
+        else:
+            await GraphQLTransportWSHandler(self.schema, scope, receive, send).handle()
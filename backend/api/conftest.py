@@ -1,10 +1,13 @@
 import contextlib
+import os
 from typing import Any
 
 from guardian.shortcuts import assign_perm
 import pytest
 
-from api.tests.base import GqlTestClient
+from api.list.models import List
+from api.tests.base import AsyncGqlTestClient, GqlTestClient
+from api.tests.benchmark import BenchmarkReport, GqlBenchmarkClient
 from api.tests.utils import no_chached_user_perm as no_chace_perm
 from api.user.models import User
 
@@ -22,6 +25,37 @@ def gql_client(client):
     yield GqlTestClient(client)
 
 
+@pytest.fixture
+def gql_async_client(async_client, settings):
+    settings.ROOT_URLCONF = "api.tests.asgi_urls"
+    yield AsyncGqlTestClient(async_client)
+
+
+@pytest.fixture
+def gql_benchmark_client(client):
+    yield GqlBenchmarkClient(client)
+
+
+_benchmark_report = BenchmarkReport()
+
+
+@pytest.fixture
+def benchmark_report():
+    yield _benchmark_report
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _benchmark_report.results:
+        return
+
+    if path := os.getenv("BENCHMARK_REPORT"):
+        _benchmark_report.write(path)
+
+    terminalreporter.write_sep("-", "benchmarks")
+    for result in _benchmark_report.results:
+        terminalreporter.write_line(str(result))
+
+
 @pytest.fixture
 def no_chached_assign_perm():
     @contextlib.contextmanager
@@ -30,8 +64,22 @@ def no_chached_assign_perm():
         permissions = [permissions] if isinstance(permissions, str) else permissions
 
         for perm in permissions:
-            assign_perm(perm, user, obj)
+            if isinstance(obj, List):
+                # List permissions are granted by the user's membership role
+                obj.memberships.update_or_create(user=user, defaults={"role": perm.split(".")[-1]})
+            else:
+                assign_perm(perm, user, obj)
 
         yield
 
     return func
+
+
+@pytest.fixture(autouse=True)
+def _clear_list_cache():
+    # The rows of each test get the same ids, so the snapshots must not outlive it
+    from api.list.cache import list_cache
+
+    list_cache.cache.clear()
+    yield
+    list_cache.cache.clear()
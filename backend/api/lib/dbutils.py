@@ -1,15 +1,33 @@
+import dataclasses
 import datetime
-from typing import Literal, TypedDict, TypeVar
+from typing import Callable, Iterable, Literal, TypedDict, TypeVar
 
 from dateutil.relativedelta import relativedelta
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-from django.db import connection, models
-from django.db.models import Q
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.operations.base import Operation
+from django.db.models import F, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from typing_extensions import NotRequired
 
+try:
+    from django.contrib.postgres.search import (
+        SearchQuery,
+        SearchRank,
+        SearchVector,
+        SearchVectorExact,
+    )
+except ImportError:  # psycopg2 is only installed when running on postgres
+    SearchQuery = SearchRank = SearchVector = SearchVectorExact = None  # type: ignore
+
 _M = TypeVar("_M", bound=models.Model)
-_partitioned_tables = []
+_partitioned_tables: dict[str, "Partitioning"] = {}
+_search_indexes: list["SearchIndex"] = []
+# The default weights of the ranks of postgres
+_weights = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
 
 
 class SearchColumn(TypedDict):
@@ -17,39 +35,253 @@ class SearchColumn(TypedDict):
     weight: NotRequired[Literal["A", "B", "C", "D"]]
 
 
-def ensure_partitions(start: datetime.date | None = None):
-    if not _partitioned_tables or connection.vendor in ["postgresql", "postgis"]:
-        return
+@dataclasses.dataclass(frozen=True)
+class Partitioning:
+    """Monthly range partitioning of a model's table by a date or datetime column.
+
+    On postgres the table is the partitioned parent of a partition per month, named
+    `{table}_yYYYYmMM`, plus a `{table}_default` one for the rows outside of them.
+    The primary key of the parent must include the column, so no foreign key can
+    reference the model.
+    """
+
+    model: type[models.Model]
+    column: str
 
-    with connection.cursor() as c:
-        c.execute("SELECT table_name FROM information_schema.tables")
-        existing = {t[0] for t in c}
+    @property
+    def table(self) -> str:
+        return self.model._meta.db_table
 
-        # Create month partitions
-        current = (start or (timezone.localdate() - relativedelta(months=1))).replace(day=1)
-        end = (timezone.localdate() + relativedelta(months=1)).replace(day=1)
+    def partition(self, day: datetime.date) -> str:
+        return f"{self.table}_y{day.year:04d}m{day.month:02d}"
 
+    @property
+    def default_partition(self) -> str:
+        return f"{self.table}_default"
+
+    def months(self, start: datetime.date, end: datetime.date) -> list[datetime.date]:
+        """The first days of the months from the one of `start` to the one of `end`"""
+        current = _month(start)
+        months = []
         while current <= end:
-            dnext = current + relativedelta(months=1)
-            suffix = f"y{current.year:04d}m{current.month:02d}"
+            months.append(current)
+            current += relativedelta(months=1)
+        return months
+
+    def range(self, month: datetime.date) -> tuple[datetime.date, datetime.date]:
+        """The bounds of the partition of the month, in UTC for datetime columns"""
+        lower: datetime.date = _month(month)
+        upper: datetime.date = lower + relativedelta(months=1)
+        if isinstance(self.model._meta.get_field(self.column), models.DateTimeField):
+            lower = datetime.datetime.combine(lower, datetime.time(), tzinfo=datetime.timezone.utc)
+            upper = datetime.datetime.combine(upper, datetime.time(), tzinfo=datetime.timezone.utc)
+        return lower, upper
+
+    def bounds(self, start: datetime.date, end: datetime.date | None = None) -> Q:
+        """The rows of the months from `start` to `end`, the current month by default.
+
+        The bounds are constants of the partitioning column itself, so postgres only
+        scans the partitions of those months.
+        """
+        lower, _ = self.range(start)
+        _, upper = self.range(end or timezone.now())
+        return Q(**{f"{self.column}__gte": lower, f"{self.column}__lt": upper})
+
+
+def _month(day: datetime.date) -> datetime.date:
+    if isinstance(day, datetime.datetime):
+        day = day.astimezone(datetime.timezone.utc) if timezone.is_aware(day) else day
+        day = day.date()
+    return day.replace(day=1)
+
+
+def partitioned(column: str) -> Callable[[type[_M]], type[_M]]:
+    """Partition the table of the model by month of the `column`.
+
+    The table is converted by the `PartitionByMonth` migration operation and its
+    partitions are created ahead of time by `ensure_partitions`.
+    """
+
+    def wrapper(model: type[_M]) -> type[_M]:
+        partitioning = Partitioning(model=model, column=column)
+        _partitioned_tables[partitioning.table] = partitioning
+        return model
+
+    return wrapper
+
+
+def get_partitioning(model: type[models.Model]) -> Partitioning | None:
+    return _partitioned_tables.get(model._meta.db_table)
+
+
+class PartitionedQuerySet(models.QuerySet[_M]):
+    """Queryset of a partitioned model"""
+
+    def in_months(self, start: datetime.date, end: datetime.date | None = None):
+        """Filter the rows of the months from `start` to `end`, scanning only their partitions"""
+        partitioning = get_partitioning(self.model)
+        assert partitioning is not None, f"{self.model.__name__} is not partitioned"
+        return self.filter(partitioning.bounds(start, end))
+
+
+def ensure_partitions(
+    start: datetime.date | None = None,
+    *,
+    months: int = 3,
+    using: str = DEFAULT_DB_ALIAS,
+) -> list[str]:
+    """Create the missing partitions, from the month of `start` to `months` ahead.
+
+    The months which already have rows in the default partition are skipped, since
+    postgres can't create their partitions anymore. Returns the created partitions.
+    """
+    db = connections[using]
+    if not _partitioned_tables or db.vendor != "postgresql":
+        return []
+
+    today = timezone.localdate()
+    start = start or today - relativedelta(months=1)
+    end = today + relativedelta(months=months)
+    created = []
 
-            for table in _partitioned_tables:
-                if (partition := f"{table}_{suffix}") in existing:
+    with db.cursor() as c:
+        existing = set(db.introspection.table_names(c))
+        for partitioning in _partitioned_tables.values():
+            table = partitioning.table
+            c.execute("SELECT relkind FROM pg_class WHERE relname = %s", [table])
+            if c.fetchone() != ("p",):
+                # Not converted by its migration yet
+                continue
+
+            default = partitioning.default_partition
+            if default not in existing:
+                c.execute(f"CREATE TABLE {default} PARTITION OF {table} DEFAULT")
+                created.append(default)
+
+            for month in partitioning.months(start, end):
+                partition = partitioning.partition(month)
+                if partition in existing:
+                    continue
+
+                bounds = partitioning.range(month)
+                c.execute(
+                    f"SELECT EXISTS (SELECT 1 FROM {default} "
+                    f"WHERE {partitioning.column} >= %s AND {partitioning.column} < %s)",
+                    bounds,
+                )
+                if c.fetchone()[0]:
                     continue
 
                 c.execute(
                     f"CREATE TABLE {partition} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
-                    (current.isoformat(), dnext.isoformat()),
+                    bounds,
                 )
+                created.append(partition)
+
+    return created
+
+
+class PartitionByMonth(Operation):
+    """Convert the table of a model into a table partitioned by month of a column.
+
+    The existing table, with its rows and indexes, becomes the default partition, so
+    the conversion doesn't copy any rows. Only runs on postgres.
+
+    Postgres requires the unique constraints of a partitioned table to include its
+    partition column, so the primary key becomes `(id, column)`. The `id` is no longer
+    unique by itself: only its sequence keeps it unique, and no foreign key can
+    reference the table anymore.
+    """
 
-            current = dnext
+    reversible = False
+    reduces_to_sql = False
 
-        # Create default partitions
-        for table in _partitioned_tables:
-            if (partition := f"{table}_default") in existing:
+    def __init__(self, model_name: str, column: str):
+        super().__init__()
+        self.model_name = model_name
+        self.column = column
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [self.model_name, self.column], {})
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        table = model._meta.db_table
+        with schema_editor.connection.cursor() as c:
+            c.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = %s",
+                [table],
+            )
+            indexes = [row[0] for row in c.fetchall()]
+            c.execute(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'p'",
+                [table],
+            )
+            primary_key = c.fetchone()[0]
+
+        for sql in self.statements(schema_editor, model, indexes, primary_key):
+            schema_editor.execute(sql)
+
+    def statements(
+        self,
+        schema_editor: BaseDatabaseSchemaEditor,
+        model: type[models.Model],
+        indexes: list[str],
+        primary_key: str,
+    ) -> list[str]:
+        """The statements converting the table, given its current indexes and primary key"""
+        table = model._meta.db_table
+        default = f"{table}_default"
+        pk = model._meta.pk.column
+        column = model._meta.get_field(self.column).column
+        qn = schema_editor.quote_name
+
+        statements = [
+            f"ALTER TABLE {qn(table)} RENAME TO {qn(default)}",
+            # The primary key of the parent table must include the column
+            f"ALTER TABLE {qn(default)} DROP CONSTRAINT {qn(primary_key)}",
+        ]
+        # Free the names of the indexes for the ones of the parent table
+        for index in indexes:
+            if index == primary_key:
                 continue
+            renamed = schema_editor._create_index_name(default, [index], suffix="d")
+            statements.append(f"ALTER INDEX {qn(index)} RENAME TO {qn(renamed)}")
+
+        statements += [
+            f"CREATE TABLE {qn(table)} "
+            f"(LIKE {qn(default)} INCLUDING DEFAULTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE ({qn(column)})",
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(primary_key)} "
+            f"PRIMARY KEY ({qn(pk)}, {qn(column)})",
+        ]
+        # The indexes and foreign keys are created on the parent, which propagates them
+        statements += [str(sql) for sql in schema_editor._model_indexes_sql(model)]
+        for field in model._meta.local_fields:
+            if field.remote_field and field.db_constraint:
+                sql = schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s")
+                statements.append(str(sql))
+
+        # The equivalent indexes of the old table are attached instead of built again
+        statements.append(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(default)} DEFAULT")
+        return statements
 
-            c.execute(f"CREATE TABLE {partition} PARTITION OF {table} DEFAULT")
+    def describe(self):
+        return f"Partition {self.model_name} by month of {self.column}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"partition_{self.model_name.lower()}"
 
 
 def search(
@@ -102,3 +334,190 @@ def search(
             f |= other
 
         return qs.filter(f)
+
+
+class SearchVectorField(models.Field):
+    """The `tsvector` column of a `SearchIndex`, unused on other databases than postgres.
+
+    Unlike the one of `django.contrib.postgres` it doesn't require psycopg2.
+    """
+
+    def db_type(self, connection: BaseDatabaseWrapper) -> str:
+        return "tsvector" if connection.vendor == "postgresql" else "text"
+
+
+if SearchVectorExact is not None:
+    SearchVectorField.register_lookup(SearchVectorExact)
+
+
+class _FTSRank(models.Func):
+    """The bm25 rank of the rows in a FTS5 table, negated so higher is better"""
+
+    output_field = models.FloatField()
+
+    def __init__(self, pk: F, *, table: str, query: str, weights: list[float]):
+        super().__init__(pk)
+        self.table = table
+        self.query = query
+        self.weights = weights
+
+    def as_sql(self, compiler, connection, **extra_context):
+        pk, params = compiler.compile(self.source_expressions[0])
+        weights = ", ".join(str(w) for w in self.weights)
+        sql = (
+            f"(SELECT -bm25({self.table}, {weights}) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND rowid = {pk})"
+        )
+        return sql, [self.query, *params]
+
+
+class SearchIndex:
+    """Precomputed full-text search index of some columns of a model.
+
+    On postgres the columns are stored in a `SearchVectorField`, covered by a GIN
+    index and refreshed by the model hooks through `update`. On SQLite they are
+    indexed by a FTS5 table, kept in sync by triggers. Other databases fall back
+    to `search`.
+
+    The index structures are created by `ensure_search_indexes`, after migrating.
+    """
+
+    def __init__(
+        self,
+        columns: list[SearchColumn],
+        *,
+        field: str = "search_vector",
+        config: str = "portuguese",
+    ):
+        super().__init__()
+        self.columns = columns
+        self.field = field
+        self.config = config
+
+    def __set_name__(self, owner: type[models.Model], name: str):
+        self.model = owner
+        _search_indexes.append(self)
+
+    @property
+    def _fts_table(self) -> str:
+        return f"{self.model._meta.db_table}_fts"
+
+    def _vendor(self, qs: models.QuerySet | None = None) -> str:
+        return connections[qs.db if qs is not None else DEFAULT_DB_ALIAS].vendor
+
+    def _fts_query(self, q: str) -> str:
+        # Quote every term, so the users can't use the FTS5 query syntax
+        return " ".join('"{}"'.format(t.replace('"', '""')) for t in q.split())
+
+    def q(self, q: str, *, using: str = DEFAULT_DB_ALIAS) -> Q:
+        """Filter the rows matching all the terms of the query"""
+        vendor = connections[using].vendor
+        if vendor == "postgresql":
+            query = SearchQuery(q, config=self.config, search_type="websearch")
+            return Q(**{self.field: query})
+
+        if vendor == "sqlite":
+            sql = f"SELECT rowid FROM {self._fts_table} WHERE {self._fts_table} MATCH %s"
+            return Q(pk__in=RawSQL(sql, [self._fts_query(q)]))
+
+        condition = Q()
+        for term in q.split():
+            for c in self.columns:
+                condition |= Q(**{f"{c['name']}__icontains": term})
+        return condition
+
+    def rank(self, q: str, *, using: str = DEFAULT_DB_ALIAS) -> models.Expression:
+        """How well the rows match the query, higher is better and 0 when they don't"""
+        output_field = models.FloatField()
+        vendor = connections[using].vendor
+        if vendor == "postgresql":
+            query = SearchQuery(q, config=self.config, search_type="websearch")
+            rank = SearchRank(F(self.field), query)
+        elif vendor == "sqlite":
+            weights = [_weights[c.get("weight", "D")] for c in self.columns]
+            rank = _FTSRank(
+                F("pk"), table=self._fts_table, query=self._fts_query(q), weights=weights
+            )
+        else:
+            rank = Value(0.0)
+
+        return Coalesce(rank, Value(0.0), output_field=output_field)
+
+    def update(self, qs: models.QuerySet[_M]) -> int:
+        """Refresh the search vectors of the rows, only needed on postgres"""
+        if self._vendor(qs) != "postgresql":
+            return 0
+
+        vector = SearchVector(
+            self.columns[0]["name"],
+            config=self.config,
+            weight=self.columns[0].get("weight"),
+        )
+        for c in self.columns[1:]:
+            vector += SearchVector(c["name"], config=self.config, weight=c.get("weight"))
+
+        return qs.update(**{self.field: vector})
+
+    def update_instance(self, obj: models.Model, update_fields: Iterable[str] | None = None):
+        """Refresh the search vector of a saved instance, if its columns could have changed"""
+        if update_fields is not None and not {c["name"] for c in self.columns} & set(update_fields):
+            return
+
+        self.update(self.model._default_manager.using(obj._state.db).filter(pk=obj.pk))
+
+    def ensure(self, db: BaseDatabaseWrapper):
+        """Create the index structures if they don't exist yet"""
+        table = self.model._meta.db_table
+        if db.vendor == "postgresql":
+            with db.cursor() as c:
+                c.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{self.field}_gin "
+                    f"ON {table} USING gin ({self.field})"
+                )
+            self.update(self.model._default_manager.using(db.alias).filter(**{self.field: None}))
+        elif db.vendor == "sqlite":
+            self._ensure_fts(db)
+
+    def _ensure_fts(self, db: BaseDatabaseWrapper):
+        table = self.model._meta.db_table
+        pk = self.model._meta.pk.column
+        fts = self._fts_table
+        columns = [self.model._meta.get_field(c["name"]).column for c in self.columns]
+        names = ", ".join(columns)
+        new = ", ".join(f"new.{c}" for c in columns)
+        old = ", ".join(f"old.{c}" for c in columns)
+        delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.{pk}, {old});"
+        insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.{pk}, {new});"
+
+        triggers = {
+            f"{fts}_insert": f"AFTER INSERT ON {table} BEGIN {insert} END",
+            f"{fts}_delete": f"AFTER DELETE ON {table} BEGIN {delete} END",
+            f"{fts}_update": f"AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+        }
+
+        with db.cursor() as c:
+            created = fts not in db.introspection.table_names(c)
+            if created:
+                c.execute(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', "
+                    f"content_rowid='{pk}', tokenize='unicode61 remove_diacritics 2')"
+                )
+
+            # The migrations which rebuild the table drop its triggers, so they are checked
+            # after every migrate and the index is rebuilt when any of them was missing
+            c.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [table]
+            )
+            existing = {name for (name,) in c.fetchall()}
+            missing = [name for name in triggers if name not in existing]
+            for name in missing:
+                c.execute(f"CREATE TRIGGER {name} {triggers[name]}")
+
+            if created or missing:
+                c.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def ensure_search_indexes(using: str = DEFAULT_DB_ALIAS, **kwargs):
+    """Create the structures of all the search indexes, connected to `post_migrate`"""
+    for index in _search_indexes:
+        index.ensure(connections[using])
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ListsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api.list"
+
+    def ready(self):
+        from api.lib.dbutils import ensure_search_indexes
+
+        post_migrate.connect(ensure_search_indexes, sender=self)
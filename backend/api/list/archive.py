@@ -0,0 +1,237 @@
+import abc
+import collections
+import datetime
+import gzip
+import json
+import os
+import pathlib
+from typing import Any, Callable, Iterable
+
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router, transaction
+from django.db.models import Case, Value, When
+
+from .models import (
+    Archive,
+    List,
+    ListItem,
+    ListMembership,
+    coalesce_list_changes,
+    lists_changed,
+)
+
+# The order the models are restored in, so the foreign keys exist
+_models = [List, ListMembership, ListItem]
+_labels = [model._meta.label_lower for model in _models]
+
+Row = dict[str, Any]
+
+
+def _serialize(objs: Iterable[models.Model]) -> list[Row]:
+    rows = serializers.serialize("python", objs)
+    for row in rows:
+        # Computed by the database, refreshed when restoring
+        row["fields"].pop("search_vector", None)
+        # To the microsecond, which the JSON encoder would round to the millisecond
+        for name, value in row["fields"].items():
+            if isinstance(value, datetime.datetime):
+                row["fields"][name] = value.isoformat()
+    return rows
+
+
+def _list_id(row: Row) -> int:
+    return row["pk"] if row["model"] == List._meta.label_lower else row["fields"]["list"]
+
+
+class ArchiveStore(abc.ABC):
+    """Where the archived rows are kept"""
+
+    @abc.abstractmethod
+    def write(self, rows: list[Row]):
+        """Keep the rows, called in the transaction that deletes them"""
+
+    @abc.abstractmethod
+    def restore(
+        self,
+        apply: Callable[[list[Row]], None],
+        *,
+        list_ids: Iterable[int] | None = None,
+        batch_size: int = 500,
+    ) -> int:
+        """Pass the archived rows to `apply` in batches, discarding each batch after it.
+
+        The rows are ordered as they must be restored. Returns how many were restored.
+        """
+
+
+class TableArchiveStore(ArchiveStore):
+    """Keep the archived rows in the `Archive` table"""
+
+    def write(self, rows: list[Row]):
+        Archive.objects.bulk_create(
+            [
+                Archive(model=r["model"], object_id=r["pk"], list_id=_list_id(r), data=r)
+                for r in rows
+            ],
+            ignore_conflicts=True,
+        )
+
+    def restore(self, apply, *, list_ids=None, batch_size=500) -> int:
+        qs = Archive.objects.annotate(
+            _order=Case(
+                *[When(model=label, then=Value(i)) for i, label in enumerate(_labels)],
+                default=Value(len(_labels)),
+            ),
+        ).order_by("_order", "object_id")
+        if list_ids is not None:
+            qs = qs.filter(list_id__in=list(list_ids))
+
+        restored = 0
+        while True:
+            with transaction.atomic():
+                archives = list(qs[:batch_size])
+                if not archives:
+                    return restored
+
+                apply([a.data for a in archives])
+                Archive.objects.filter(pk__in=[a.pk for a in archives]).delete()
+                restored += len(archives)
+
+
+class FileArchiveStore(ArchiveStore):
+    """Keep the archived rows in gzipped JSON Lines files, one per archived batch.
+
+    A file written by a batch that failed to commit holds rows which are still in the
+    tables, restoring skips them.
+    """
+
+    def __init__(self, directory: str | pathlib.Path):
+        super().__init__()
+        self.directory = pathlib.Path(directory)
+
+    def write(self, rows: list[Row]):
+        if not rows:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        model = _labels.index(rows[0]["model"])
+        path = self.directory / f"{model}-{rows[0]['pk']:012d}-{rows[-1]['pk']:012d}.jsonl.gz"
+        self._write(path, rows)
+
+    def restore(self, apply, *, list_ids=None, batch_size=500) -> int:
+        ids = set(list_ids) if list_ids is not None else None
+
+        restored = 0
+        # The names start with the index of the model of the batch, keeping the restore order
+        for path in sorted(self.directory.glob("*.jsonl.gz")):
+            with gzip.open(path, "rt") as f:
+                rows: list[Row] = [json.loads(line) for line in f]
+
+            matched = [r for r in rows if ids is None or _list_id(r) in ids]
+            kept = [r for r in rows if ids is not None and _list_id(r) not in ids]
+            if not matched:
+                continue
+
+            with transaction.atomic():
+                for i in range(0, len(matched), batch_size):
+                    apply(matched[i : i + batch_size])
+
+            if kept:
+                self._write(path, kept)
+            else:
+                path.unlink()
+            restored += len(matched)
+
+        return restored
+
+    def _write(self, path: pathlib.Path, rows: list[Row]):
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt") as f:
+            for row in rows:
+                f.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+        os.replace(tmp, path)
+
+
+def archive(
+    store: ArchiveStore,
+    *,
+    before: datetime.datetime,
+    batch_size: int = 500,
+) -> collections.Counter[str]:
+    """Move the lists and items inactive since before `before` to the store.
+
+    Each batch is moved in its own transaction, so the job can be stopped at any
+    time and resumed by running it again. Returns how many rows of each model moved.
+    """
+    counts: collections.Counter[str] = collections.Counter()
+
+    # The lists take all their items and memberships with them
+    lists = List.objects.filter(is_active=False, updated_at__lt=before).order_by("pk")
+    while True:
+        with transaction.atomic(), coalesce_list_changes():
+            batch = list(lists.select_for_update()[:batch_size])
+            if not batch:
+                break
+
+            rows = _serialize(batch)
+            rows += _serialize(ListMembership.objects.filter(list__in=batch).order_by("pk"))
+            rows += _serialize(ListItem.objects.filter(list__in=batch).order_by("pk"))
+            store.write(rows)
+            List.objects.filter(pk__in=[obj.pk for obj in batch]).delete()
+            counts.update(row["model"] for row in rows)
+
+    items = ListItem.objects.filter(is_active=False, updated_at__lt=before).order_by("pk")
+    while True:
+        with transaction.atomic(), coalesce_list_changes():
+            batch = list(items.select_for_update()[:batch_size])
+            if not batch:
+                break
+
+            store.write(_serialize(batch))
+            ListItem.objects.filter(pk__in=[obj.pk for obj in batch]).delete()
+            counts[ListItem._meta.label_lower] += len(batch)
+
+    return counts
+
+
+def _insert(model: type[models.Model], objs: list[models.Model]):
+    """Insert the rows as they were archived, skipping the ones which still exist.
+
+    Unlike `bulk_create` the inserts are raw, so the `auto_now` fields keep their values.
+    """
+    using = router.db_for_write(model)
+    fields = model._meta.concrete_fields
+    batch_size = connections[using].ops.bulk_batch_size(fields, objs)
+    for i in range(0, len(objs), batch_size):
+        model._base_manager.using(using)._insert(
+            objs[i : i + batch_size], fields=fields, raw=True, ignore_conflicts=True
+        )
+
+
+def _apply(rows: list[Row]):
+    objs: dict[type[models.Model], list[models.Model]] = collections.defaultdict(list)
+    for deserialized in serializers.deserialize("python", rows, ignorenonexistent=True):
+        objs[type(deserialized.object)].append(deserialized.object)
+
+    for model in _models:
+        if not objs[model]:
+            continue
+
+        # Without the hooks, the restored lists already account for their items
+        _insert(model, objs[model])
+        if (index := getattr(model, "search_index", None)) is not None:
+            index.update(model._default_manager.filter(pk__in=[obj.pk for obj in objs[model]]))
+
+    # The inserts don't run the hooks
+    lists_changed(_list_id(row) for row in rows)
+
+
+def restore(
+    store: ArchiveStore,
+    *,
+    list_ids: Iterable[int] | None = None,
+    batch_size: int = 500,
+) -> int:
+    """Move the archived rows back to their tables, only the ones of `list_ids` if given"""
+    return store.restore(_apply, list_ids=list_ids, batch_size=batch_size)
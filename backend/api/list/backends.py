@@ -0,0 +1,28 @@
+from typing import Any
+
+from django.contrib.auth.backends import BaseBackend
+
+from api.user.models import User
+
+from .models import List
+from .permissions import ListPermissionResolver
+
+
+class ListMembershipBackend(BaseBackend):
+    """Authentication backend answering the object permissions of lists from their memberships."""
+
+    def has_perm(self, user_obj: User, perm: str, obj: Any = None) -> bool:
+        if not isinstance(obj, List):
+            return False
+
+        if "." in perm and perm.split(".", 1)[0] != List._meta.app_label:
+            return False
+
+        return ListPermissionResolver().has_perm(user_obj, perm, obj)
+
+    def get_all_permissions(self, user_obj: User, obj: Any = None) -> set[str]:
+        if not isinstance(obj, List):
+            return set()
+
+        app_label = List._meta.app_label
+        return {f"{app_label}.{perm}" for perm in ListPermissionResolver().get_perms(user_obj, obj)}
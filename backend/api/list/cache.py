@@ -0,0 +1,118 @@
+import dataclasses
+from typing import Iterable
+import uuid
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+
+from .loaders import item_keyset
+from .models import List, ListItem, ListMembership
+
+
+@dataclasses.dataclass
+class CacheStats:
+    """The counters of a cache, since the process started"""
+
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclasses.dataclass
+class ListSnapshot:
+    """What the list queries read of a list, besides the users"""
+
+    list: List  # noqa: A003
+    participant_ids: list[int]
+    # All the items of the list in the keyset order, None when it has too many of them
+    items: list[ListItem] | None
+
+
+class ListCache:
+    """Read-through cache of the list snapshots.
+
+    The entries are kept in the `lists` cache, so the backend, its eviction and the
+    TTL of the entries are configured by `CACHES`. The model hooks invalidate them
+    whenever a list, its items or its participants change, starting a new generation of
+    the list. The snapshots are stored with the generation they were loaded in, and only
+    the ones of the current generation are read.
+    """
+
+    def __init__(self, alias: str = "lists"):
+        super().__init__()
+        self.alias = alias
+        self.stats = CacheStats()
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[self.alias]
+
+    def key(self, pk: int) -> str:
+        return f"list:{pk}"
+
+    def generation_key(self, pk: int) -> str:
+        return f"list:{pk}:generation"
+
+    def get(self, pk: int) -> ListSnapshot:
+        """The snapshot of the list, loading and caching it on a miss"""
+        key, generation_key = self.key(pk), self.generation_key(pk)
+        cached = self.cache.get_many([key, generation_key])
+        generation = cached.get(generation_key)
+        # Only the snapshots loaded since the list was last invalidated are current
+        if generation is not None and key in cached and cached[key][0] == generation:
+            self.stats.hits += 1
+            return cached[key][1]
+
+        self.stats.misses += 1
+        if generation is None:
+            # Only if still missing, not to replace the generation an invalidation just set
+            generation = uuid.uuid4().hex
+            if not self.cache.add(generation_key, generation):
+                generation = self.cache.get(generation_key)
+
+        snapshot = self._load(pk)
+        # The rows may have been read before a change which invalidated the list since. Then
+        # the snapshot is stored for a generation which is already gone
+        if generation is not None:
+            self.cache.set(key, (generation, snapshot))
+        return snapshot
+
+    def invalidate(self, pks: Iterable[int | None]):
+        """Drop the snapshots of the lists, now and once the current transaction commits"""
+        ids = {pk for pk in pks if pk is not None}
+        if not ids:
+            return
+
+        self._invalidate(ids)
+        self.stats.invalidations += len(ids)
+        # A request may cache what it read before the transaction commits meanwhile
+        transaction.on_commit(lambda: self._invalidate(ids))
+
+    def _invalidate(self, pks: set[int]):
+        # A new generation, so the snapshots being loaded are stale once stored
+        self.cache.set_many({self.generation_key(pk): uuid.uuid4().hex for pk in pks})
+        self.cache.delete_many([self.key(pk) for pk in pks])
+
+    def _load(self, pk: int) -> ListSnapshot:
+        obj = List.objects.get(pk=pk)
+        participant_ids = list(
+            ListMembership.objects.filter(list=pk).order_by("pk").values_list("user_id", flat=True)
+        )
+
+        max_items = settings.LIST_CACHE_MAX_ITEMS
+        items: list[ListItem] | None = list(
+            ListItem.objects.filter(list=pk).order_by(*item_keyset.order_by())[: max_items + 1]
+        )
+        if len(items) > max_items:
+            items = None
+
+        return ListSnapshot(list=obj, participant_ids=participant_ids, items=items)
+
+
+list_cache = ListCache()
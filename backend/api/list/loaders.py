@@ -0,0 +1,171 @@
+from collections import defaultdict
+import dataclasses
+import functools
+from typing import TYPE_CHECKING, Any
+
+from django.db.models import Count
+from strawberry.extensions import Extension
+from strawberry.types import Info
+from strawberry_django_plus.relay import Connection
+from strawberry_django_plus.utils import aio
+
+from api.base.loaders import BatchLoader
+from api.base.pagination import Keyset, PageArgs
+from api.user.models import User
+
+from .models import List, ListItem, ListMembership
+
+if TYPE_CHECKING:
+    from .cache import ListSnapshot
+
+item_keyset = Keyset(ListItem, ["created_at", "id"])
+
+
+def _load_users(keys: list[int]) -> dict[int, User]:
+    return User.objects.in_bulk(keys)
+
+
+def _load_item_counts(keys: list[int]) -> dict[int, int]:
+    counts = ListItem.objects.filter(list__in=keys).values("list").annotate(count=Count("id"))
+    return {row["list"]: row["count"] for row in counts.order_by()}
+
+
+@dataclasses.dataclass
+class ListLoaders:
+    """The list loaders of a request"""
+
+    users: BatchLoader[int, User] = dataclasses.field(init=False)
+    item_counts: BatchLoader[int, int] = dataclasses.field(init=False)
+    participants_by_list: BatchLoader[int, list[User]] = dataclasses.field(init=False)
+    _item_pages: dict[PageArgs, BatchLoader[int, list[ListItem]]] = dataclasses.field(
+        init=False,
+        default_factory=dict,
+    )
+    _list_ids: set[int] = dataclasses.field(init=False, default_factory=set)
+    _cached_items: dict[int, list[ListItem]] = dataclasses.field(
+        init=False,
+        default_factory=dict,
+    )
+
+    def __post_init__(self):
+        self.users = BatchLoader(_load_users)
+        self.item_counts = BatchLoader(_load_item_counts, default=int)
+        self.participants_by_list = BatchLoader(self._load_participants_by_list, default=list)
+
+    def item_pages(self, page: PageArgs) -> BatchLoader[int, list[ListItem]]:
+        """The loader of the pages of items of the lists, as fetched by `item_keyset`"""
+        loader = self._item_pages.get(page)
+        if loader is None:
+            loader = BatchLoader(functools.partial(self._load_item_pages, page), default=list)
+            # The page arguments are only known once the first list resolves its items
+            loader.prime(self._list_ids)
+            self._item_pages[page] = loader
+
+        return loader
+
+    def set_snapshot(self, snapshot: "ListSnapshot"):
+        """Load the relations of a cached list from its snapshot"""
+        pk = snapshot.list.pk
+        # The owners of the items are loaded together with the participants
+        self.users.prime(item.user_id for item in snapshot.items or [] if item.user_id is not None)
+        participants = self.users.load_many([snapshot.list.owner_id, *snapshot.participant_ids])
+        self.participants_by_list.set(pk, participants[1:])
+        if snapshot.items is not None:
+            self.item_counts.set(pk, len(snapshot.items))
+            self._cached_items[pk] = snapshot.items
+
+    def _load_item_pages(self, page: PageArgs, keys: list[int]) -> dict[int, list[ListItem]]:
+        pages = {
+            key: item_keyset.paginate_rows(self._cached_items[key], page)
+            for key in keys
+            if key in self._cached_items
+        }
+
+        keys = [key for key in keys if key not in pages]
+        qs = ListItem.objects.filter(list__in=keys)
+        if len(keys) == 1:
+            pages[keys[0]] = item_keyset.paginate(qs, page)
+        elif keys:
+            pages.update(item_keyset.paginate_partitioned(qs, page, partition_by="list"))
+
+        for items in pages.values():
+            for item in items:
+                # Load the owners of the items of all the lists in the same batch
+                self.prime(item)
+
+        return pages
+
+    def _load_participants_by_list(self, keys: list[int]) -> dict[int, list[User]]:
+        participants: dict[int, list[User]] = defaultdict(list)
+        memberships = ListMembership.objects.filter(list__in=keys).select_related("user")
+        for membership in memberships.order_by("pk"):
+            participants[membership.list_id].append(membership.user)
+            # Owners are participants too, so this saves loading them again
+            self.users.set(membership.user_id, membership.user)
+
+        return participants
+
+    def prime(self, obj: Any):
+        """Schedule the relations of the resolved object to be loaded with its siblings"""
+        if isinstance(obj, List):
+            self._list_ids.add(obj.pk)
+            self.users.prime([obj.owner_id])
+            self.item_counts.prime([obj.pk])
+            self.participants_by_list.prime([obj.pk])
+            for loader in self._item_pages.values():
+                loader.prime([obj.pk])
+        elif isinstance(obj, ListItem) and obj.user_id is not None:
+            self.users.prime([obj.user_id])
+
+    def clear(self):
+        for loader in [self.users, self.item_counts, self.participants_by_list]:
+            loader.clear()
+        self._item_pages.clear()
+        self._list_ids.clear()
+        self._cached_items.clear()
+
+
+def get_loaders(info: Info) -> ListLoaders:
+    """The list loaders of the current request"""
+    loaders = getattr(info.context, "list_loaders", None)
+    if loaders is None:
+        loaders = ListLoaders()
+        info.context.list_loaders = loaders
+
+    return loaders
+
+
+class ListLoadersExtension(Extension):
+    """Prime the list loaders with every list and item resolved in the request.
+
+    Nested fields are resolved depth-first, so the loaders need to know about the
+    sibling objects before the first of them has its relations resolved.
+    """
+
+    def resolve(self, _next, root, info: Info, *args, **kwargs):
+        if info.parent_type.name == "Mutation":
+            # Mutations may change what was already loaded
+            get_loaders(info).clear()
+
+        result = _next(root, info, *args, **kwargs)
+        if aio.is_awaitable(result, info=info):
+            return aio.resolve_async(
+                result, lambda resolved: self._prime(info, resolved), info=info
+            )
+
+        return self._prime(info, result)
+
+    def _prime(self, info: Info, result: Any) -> Any:
+        if isinstance(result, Connection):
+            objs = [edge.node for edge in result.edges]
+        elif isinstance(result, (list, tuple)):
+            objs = result
+        else:
+            objs = [result]
+
+        if objs and isinstance(objs[0], (List, ListItem)):
+            loaders = get_loaders(info)
+            for obj in objs:
+                loaders.prime(obj)
+
+        return result
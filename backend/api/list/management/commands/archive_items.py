@@ -0,0 +1,69 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.list import archive
+
+
+class Command(BaseCommand):
+    help = (  # noqa: A003
+        "Move the inactive lists and items to the archive, or restore them from it. "
+        "Safe to stop and run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Archive the lists and items inactive for more than this many days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="How many rows to move per transaction.",
+        )
+        parser.add_argument(
+            "--directory",
+            help="Archive to gzipped JSON Lines files in this directory, instead of a table.",
+        )
+        parser.add_argument(
+            "--restore",
+            action="store_true",
+            help="Restore the archived rows instead of archiving.",
+        )
+        parser.add_argument(
+            "--list-id",
+            type=int,
+            action="append",
+            dest="list_ids",
+            help="Only restore the rows of this list, can be repeated.",
+        )
+
+    def handle(
+        self,
+        *args,
+        days: int = 90,
+        batch_size: int = 500,
+        directory: str | None = None,
+        restore: bool = False,
+        list_ids: list[int] | None = None,
+        **options,
+    ):
+        store: archive.ArchiveStore = (
+            archive.FileArchiveStore(directory) if directory else archive.TableArchiveStore()
+        )
+
+        if restore:
+            restored = archive.restore(store, list_ids=list_ids, batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Restored {restored} rows"))
+            return
+
+        before = timezone.now() - datetime.timedelta(days=days)
+        counts = archive.archive(store, before=before, batch_size=batch_size)
+        for model, count in sorted(counts.items()):
+            self.stdout.write(f"{model}: {count}")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {sum(counts.values())} rows"))
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.list.models import List, lists_changed
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized list totals and repair the ones that drifted."  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drifted lists, without repairing them.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="How many lists to repair per transaction.",
+        )
+
+    def handle(self, *args, dry_run: bool = False, batch_size: int = 1000, **options):
+        checked = 0
+        drifted: list[int] = []
+
+        for obj in List.objects.with_totals().order_by("pk").iterator(chunk_size=batch_size):
+            checked += 1
+            if (
+                obj.subtotal_cached == obj._subtotal
+                and obj.active_item_count == obj._active_item_count
+            ):
+                continue
+
+            self.stdout.write(
+                f"{obj!r} (id={obj.pk}): "
+                f"subtotal {obj.subtotal_cached} -> {obj._subtotal}, "
+                f"active items {obj.active_item_count} -> {obj._active_item_count}"
+            )
+            drifted.append(obj.pk)
+
+        if not dry_run:
+            for i in range(0, len(drifted), batch_size):
+                with transaction.atomic():
+                    # Recompute inside the transaction so concurrent hook increments are not lost
+                    for obj in List.objects.filter(
+                        pk__in=drifted[i : i + batch_size]
+                    ).with_totals():
+                        List.objects.filter(pk=obj.pk).update(
+                            subtotal_cached=obj._subtotal,
+                            active_item_count=obj._active_item_count,
+                        )
+                    lists_changed(drifted[i : i + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} lists, {len(drifted)} drifted"
+                + ("" if dry_run else " and were repaired")
+            )
+        )
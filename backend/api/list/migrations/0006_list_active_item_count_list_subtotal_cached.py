@@ -0,0 +1,43 @@
+# Generated by Django 4.0.5 on 2026-10-18 05:40
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+
+
+def populate_totals(apps, schema_editor):
+    List = apps.get_model('list', 'List')
+
+    lists = List.objects.annotate(
+        _subtotal=Sum(
+            F('item__value') * F('item__quantity'),
+            filter=Q(item__is_active=True),
+            output_field=models.DecimalField(max_digits=20, decimal_places=2),
+        ),
+        _active_item_count=Count('item', filter=Q(item__is_active=True)),
+    )
+    for list in lists.iterator():
+        list.subtotal_cached = list._subtotal or Decimal(0)
+        list.active_item_count = list._active_item_count
+        list.save(update_fields=['subtotal_cached', 'active_item_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('list', '0005_remove_listitem_is_public_list_threshold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='active_item_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Materialized number of active items, maintained by the item hooks', verbose_name='Active items'),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='subtotal_cached',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, help_text='Materialized total value of the active items, maintained by the item hooks', max_digits=20, verbose_name='Subtotal'),
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 4.0.5 on 2026-10-18 05:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Ordered from the highest to the lowest role
+ROLES = ['owner', 'admin', 'participant']
+ROLE_PERMISSIONS = {
+    'owner': ['owner'],
+    'admin': ['admin', 'participant'],
+    'participant': ['participant'],
+}
+
+
+def _list_content_type(apps):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    return ContentType.objects.filter(app_label='list', model='list').first()
+
+
+def memberships_from_participants(apps, schema_editor):
+    List = apps.get_model('list', 'List')
+    ListMembership = apps.get_model('list', 'ListMembership')
+    UserObjectPermission = apps.get_model('guardian', 'UserObjectPermission')
+    Participants = List.participants.through
+
+    roles = {
+        key: 'participant'
+        for key in Participants.objects.values_list('list_id', 'user_id').iterator()
+    }
+
+    if (ctype := _list_content_type(apps)) is not None:
+        perms = UserObjectPermission.objects.filter(content_type=ctype)
+        for user_id, object_pk, codename in perms.values_list(
+            'user_id', 'object_pk', 'permission__codename'
+        ).iterator():
+            key = (int(object_pk), user_id)
+            current = roles.get(key)
+            if codename in ROLES and (current is None or ROLES.index(codename) < ROLES.index(current)):
+                roles[key] = codename
+
+        perms.delete()
+
+    existing = set(List.objects.values_list('pk', flat=True))
+    ListMembership.objects.bulk_create(
+        [
+            ListMembership(list_id=list_id, user_id=user_id, role=role)
+            for (list_id, user_id), role in roles.items()
+            if list_id in existing
+        ],
+        batch_size=1000,
+    )
+
+    schema_editor.delete_model(Participants)
+
+
+def participants_from_memberships(apps, schema_editor):
+    List = apps.get_model('list', 'List')
+    ListMembership = apps.get_model('list', 'ListMembership')
+    Permission = apps.get_model('auth', 'Permission')
+    UserObjectPermission = apps.get_model('guardian', 'UserObjectPermission')
+    Participants = List.participants.through
+
+    schema_editor.create_model(Participants)
+
+    memberships = list(ListMembership.objects.values_list('list_id', 'user_id', 'role'))
+    Participants.objects.bulk_create(
+        [Participants(list_id=list_id, user_id=user_id) for list_id, user_id, _ in memberships],
+        batch_size=1000,
+    )
+
+    if (ctype := _list_content_type(apps)) is not None:
+        permissions = {p.codename: p for p in Permission.objects.filter(content_type=ctype)}
+        UserObjectPermission.objects.bulk_create(
+            [
+                UserObjectPermission(
+                    content_type=ctype,
+                    object_pk=str(list_id),
+                    user_id=user_id,
+                    permission=permissions[codename],
+                )
+                for list_id, user_id, role in memberships
+                for codename in ROLE_PERMISSIONS[role]
+                if codename in permissions
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('guardian', '0002_generic_permissions_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('list', '0006_list_active_item_count_list_subtotal_cached'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListMembership',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now_add=True, verbose_name='Updated at')),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('admin', 'Admin'), ('participant', 'Participant')], default='participant', max_length=16, verbose_name='Role')),
+                ('list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', related_query_name='membership', to='list.list', verbose_name='list')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='list_memberships', related_query_name='list_membership', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'membership',
+                'verbose_name_plural': 'memberships',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='listmembership',
+            index=models.Index(fields=['user', 'list', 'role'], name='list_membership_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='listmembership',
+            constraint=models.UniqueConstraint(fields=('list', 'user'), name='list_membership_unique'),
+        ),
+        migrations.RunPython(memberships_from_participants, participants_from_memberships),
+        # The participants table was replaced by the memberships above
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='list',
+                    name='participants',
+                    field=models.ManyToManyField(through='list.ListMembership', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+    ]
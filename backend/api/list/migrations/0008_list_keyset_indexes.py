@@ -0,0 +1,21 @@
+# Generated by Django 4.0.5 on 2026-10-18 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('list', '0007_listmembership'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(fields=['created_at', 'id'], name='list_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['list', 'created_at', 'id'], name='list_item_created_idx'),
+        ),
+    ]
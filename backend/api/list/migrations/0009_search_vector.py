@@ -0,0 +1,24 @@
+# Generated by Django 4.0.5 on 2026-10-18 06:17
+
+import api.lib.dbutils
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('list', '0008_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='search_vector',
+            field=api.lib.dbutils.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='listitem',
+            name='search_vector',
+            field=api.lib.dbutils.SearchVectorField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,13 @@
+from django.db import migrations
+
+import api.lib.dbutils
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('list', '0009_search_vector'),
+    ]
+
+    operations = [
+        api.lib.dbutils.PartitionByMonth('listitem', 'created_at'),
+    ]
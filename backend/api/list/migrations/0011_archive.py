@@ -0,0 +1,33 @@
+# Generated by Django 4.0.5 on 2026-10-18 06:24
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('list', '0010_partition_listitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Archive',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=64, verbose_name='Model')),
+                ('object_id', models.BigIntegerField(verbose_name='Object id')),
+                ('list_id', models.BigIntegerField(db_index=True, help_text='The list the row belongs to, to restore the rows of a list together', verbose_name='List id')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Data')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archived at')),
+            ],
+            options={
+                'verbose_name': 'archive',
+                'verbose_name_plural': 'archives',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archive',
+            constraint=models.UniqueConstraint(fields=('model', 'object_id'), name='list_archive_unique'),
+        ),
+    ]
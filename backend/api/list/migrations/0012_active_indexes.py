@@ -0,0 +1,29 @@
+# Generated by Django 4.0.5 on 2026-10-18 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('list', '0011_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['owner', 'created_at'], name='list_owner_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['updated_at'], name='list_inactive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['list'], name='list_item_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['updated_at'], name='list_item_inactive_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.5 on 2026-10-18 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('list', '0013_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['list', 'updated_at', 'id'], name='list_item_updated_idx'),
+        ),
+    ]
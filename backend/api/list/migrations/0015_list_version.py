@@ -0,0 +1,18 @@
+# Generated by Django 4.0.5 on 2026-10-18 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('list', '0014_list_item_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1, editable=False, help_text='Bumped whenever the list, its items or its participants change', verbose_name='Version'),
+        ),
+    ]
@@ -1,18 +1,193 @@
+import contextlib
+import contextvars
 import decimal
-from typing import TYPE_CHECKING, Any
-
-from django.db import models
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, TypedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+    signals,
+)
+from django.db.models.functions import Coalesce
 from django.forms import ValidationError
-from guardian.shortcuts import assign_perm, remove_perm
+from typing_extensions import NotRequired
 
 from api.base import hooks
-from api.base.models import BaseModel, TimestampedMixin
+from api.base.models import BaseModel, TimestampedMixin, TimestampedQuerySet
+from api.lib.dbutils import (
+    PartitionedQuerySet,
+    SearchIndex,
+    SearchVectorField,
+    partitioned,
+)
 from api.user.models import User
 
+from . import updates
+from .permissions import ListPermissionResolver, get_list_role
+
 if TYPE_CHECKING:
     from django.db.models.manager import RelatedManager
 
 
+class ItemData(TypedDict):
+    name: str
+    quantity: NotRequired[int]
+    user: NotRequired[User | None]
+    value: NotRequired[decimal.Decimal | None]
+    weight: NotRequired[decimal.Decimal | None]
+
+
+def _invalidate_cache(pks: Iterable[int | None]):
+    # The cache reads these models, so it is imported once they are defined
+    from .cache import list_cache
+
+    list_cache.invalidate(pks)
+
+
+# The lists changed inside `coalesce_list_changes`, bumped when it exits
+_changed_lists: contextvars.ContextVar[set[int] | None] = contextvars.ContextVar(
+    "changed_lists",
+    default=None,
+)
+
+
+def lists_changed(
+    pks: Iterable[int | None],
+    subtotal: decimal.Decimal = decimal.Decimal(0),
+    active_item_count: int = 0,
+) -> bool:
+    """Bump the version of the lists and drop them from the list cache.
+
+    The deltas are added to their totals in the same update. Inside `coalesce_list_changes`
+    only the totals are updated and the versions are bumped when it exits instead. Returns
+    whether the versions were bumped now.
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return False
+
+    qs = List.objects.filter(pk__in=pks)
+    pending = _changed_lists.get()
+    if pending is not None:
+        pending.update(pks)
+        qs.increment_totals(subtotal, active_item_count)
+        return False
+
+    qs.bump_version(subtotal, active_item_count)
+    _invalidate_cache(pks)
+    return True
+
+
+@contextlib.contextmanager
+def coalesce_list_changes() -> Iterator[None]:
+    """Bump the version of each list changed inside the block once, when it exits.
+
+    For the bulk changes, which would bump the lists once per changed row otherwise.
+    """
+    if _changed_lists.get() is not None:
+        yield
+        return
+
+    pending: set[int] = set()
+    token = _changed_lists.set(pending)
+    try:
+        yield
+    finally:
+        _changed_lists.reset(token)
+    lists_changed(pending)
+
+
+class ListQuerySet(TimestampedQuerySet["List"]):
+    """List queryset."""
+
+    def with_totals(self) -> "ListQuerySet":
+        """Annotate the subtotal and reserve of each list, computed by the database."""
+        output_field = models.DecimalField(max_digits=20, decimal_places=2)
+        subtotal = Coalesce(
+            Sum(
+                F("item__value") * F("item__quantity"),
+                filter=Q(item__is_active=True),
+                output_field=output_field,
+            ),
+            Value(decimal.Decimal(0)),
+            output_field=output_field,
+        )
+
+        return self.annotate(
+            _subtotal=subtotal,
+            _reserve=Case(
+                When(threshold=0, then=F("threshold")),
+                default=F("threshold") - subtotal,
+                output_field=output_field,
+            ),
+            _active_item_count=Count("item", filter=Q(item__is_active=True)),
+        )
+
+    def increment_totals(self, subtotal: decimal.Decimal, active_item_count: int) -> int:
+        """Atomically add the given deltas to the materialized totals of the lists."""
+        if not subtotal and not active_item_count:
+            return 0
+
+        return self.update(
+            subtotal_cached=F("subtotal_cached") + subtotal,
+            active_item_count=F("active_item_count") + active_item_count,
+        )
+
+    def bump_version(
+        self,
+        subtotal: decimal.Decimal = decimal.Decimal(0),
+        active_item_count: int = 0,
+    ) -> int:
+        """Atomically bump the version of the lists, adding the deltas to their totals too."""
+        totals = {}
+        if subtotal or active_item_count:
+            totals = {
+                "subtotal_cached": F("subtotal_cached") + subtotal,
+                "active_item_count": F("active_item_count") + active_item_count,
+            }
+
+        return self.update(version=F("version") + 1, **totals)
+
+    def search(self, q: str) -> "ListQuerySet":
+        """Filter the lists matching the query by themselves or by their active items.
+
+        The lists are ordered by how well they match, the best ones first.
+        """
+        if not q.strip():
+            return self.none()
+
+        output_field = models.FloatField()
+        items = ListItem.objects.filter(ListItem.search_index.q(q, using=self.db), is_active=True)
+        item_rank = (
+            items.filter(list=OuterRef("pk"))
+            .annotate(_rank=ListItem.search_index.rank(q, using=self.db))
+            .order_by("-_rank")
+            .values("_rank")[:1]
+        )
+
+        return (
+            self.filter(List.search_index.q(q, using=self.db) | Q(pk__in=items.values("list_id")))
+            .annotate(
+                _search_rank=List.search_index.rank(q, using=self.db)
+                + Coalesce(Subquery(item_rank), Value(0.0), output_field=output_field),
+            )
+            .order_by("-_search_rank", "-created_at", "-id")
+        )
+
+
+class ListItemQuerySet(TimestampedQuerySet["ListItem"], PartitionedQuerySet["ListItem"]):
+    """List item queryset."""
+
+
 class List(BaseModel, TimestampedMixin):
     """List model"""
 
@@ -24,13 +199,33 @@ class List(BaseModel, TimestampedMixin):
         ]
         verbose_name = "list"
         verbose_name_plural = "lists"
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=["created_at", "id"], name="list_created_idx"),
+            # The active lists of an owner, newest first
+            models.Index(
+                fields=["owner", "created_at"],
+                condition=Q(is_active=True),
+                name="list_owner_active_idx",
+            ),
+            # The inactive lists to archive
+            models.Index(
+                fields=["updated_at"],
+                condition=Q(is_active=False),
+                name="list_inactive_idx",
+            ),
+        ]
+
+    objects = ListQuerySet.as_manager()
 
     items: "RelatedManager[ListItem]"
+    memberships: "RelatedManager[ListMembership]"
 
     title = models.CharField(
         verbose_name="Name",
         max_length=58,
     )
+    owner_id: int
     owner = models.ForeignKey[User](
         User,
         on_delete=models.CASCADE,
@@ -39,7 +234,11 @@ class List(BaseModel, TimestampedMixin):
         related_query_name="owner",
         db_index=True,
     )
-    participants = models.ManyToManyField[User, Any](User)
+    participants = models.ManyToManyField[User, Any](
+        User,
+        through="ListMembership",
+        through_fields=("list", "user"),
+    )
     description = models.TextField(
         verbose_name="Description",
         max_length=255,
@@ -65,6 +264,34 @@ class List(BaseModel, TimestampedMixin):
         default=None,
         blank=True,
     )
+    subtotal_cached = models.DecimalField(
+        verbose_name="Subtotal",
+        help_text="Materialized total value of the active items, maintained by the item hooks",
+        max_digits=20,
+        decimal_places=2,
+        default=decimal.Decimal(0),
+        editable=False,
+    )
+    active_item_count = models.IntegerField(
+        verbose_name="Active items",
+        help_text="Materialized number of active items, maintained by the item hooks",
+        default=0,
+        editable=False,
+    )
+    version = models.PositiveBigIntegerField(
+        verbose_name="Version",
+        help_text="Bumped whenever the list, its items or its participants change",
+        default=1,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+    )
+
+    search_index = SearchIndex(
+        [{"name": "title", "weight": "A"}, {"name": "description", "weight": "B"}]
+    )
 
     #
     #   Private
@@ -73,46 +300,128 @@ class List(BaseModel, TimestampedMixin):
     def __repr__(self) -> str:
         return f"List: ({self.title})"
 
+    def _changed(
+        self,
+        subtotal: decimal.Decimal = decimal.Decimal(0),
+        active_item_count: int = 0,
+    ):
+        """Bump the version of the list, adding the deltas to its totals"""
+        # Keep this instance in sync with the database without refetching it. The fields
+        # are marked as saved, so saving the list never writes them back over the
+        # increments made by others since it was loaded
+        changed = ["subtotal_cached", "active_item_count"]
+        if lists_changed([self.pk], subtotal, active_item_count):
+            # Never ahead of the database
+            self.version += 1
+            changed.append("version")
+        self.subtotal_cached += subtotal
+        self.active_item_count += active_item_count
+        self._take_snapshot(changed)
+
     #
     #  Hooks
     #
 
-    @hooks.post_save(on_commit=True)
-    def post_save(self, created: bool, **kwargs):
+    @hooks.post_save(on_commit=True, batch=True)
+    def post_save(lists: list["List"], created: bool, **kwargs):  # type: ignore[misc]
         if created:
-            self.participants.add(self.owner)
-            assign_perm("owner", self.owner, self)
+            # The owners of all the lists created in the transaction in a single insert
+            ListMembership.objects.bulk_create(
+                [ListMembership(list=obj, user_id=obj.owner_id, role="owner") for obj in lists],
+                ignore_conflicts=True,
+            )
+            _invalidate_cache(obj.pk for obj in lists)
+
+    @hooks.post_save(deferred=True, fields=["title", "description"])
+    def update_search_vector(self, update_fields: frozenset[str] | None = None, **kwargs):
+        List.search_index.update_instance(self, update_fields)
+
+    @hooks.post_save
+    def bump_version(self, created: bool, **kwargs):
+        if not created:
+            self._changed()
+
+    @hooks.post_save
+    def publish(self, created: bool, **kwargs):
+        if not created:
+            updates.list_saved(self)
+
+    @hooks.post_delete
+    def invalidate_cache_on_delete(self, **kwargs):
+        _invalidate_cache([self.pk])
 
     #
     # Publics
     #
 
-    def add_participant(self, user: User):
+    def add_participant(self, user: User, *, resolver: ListPermissionResolver | None = None):
         """Add new participant to the list"""
-        if user.has_perm("list.participant", self):
+        resolver = resolver or ListPermissionResolver()
+        if resolver.has_perm(user, "list.participant", self):
             raise ValidationError("User is already a participant of this list!")
 
-        self.participants.add(user)
-        assign_perm("list.participant", user, self)
+        self.participants.add(user, through_defaults={"role": "participant"})
+        resolver.clear(self)
 
-    def remove_participant(self, user: User):
+    def remove_participant(self, user: User, *, resolver: ListPermissionResolver | None = None):
         """Remove the participant from the list including all their permissions"""
-        if not user.has_perm("list.participant", self):
+        resolver = resolver or ListPermissionResolver()
+        if not resolver.has_perm(user, "list.participant", self):
             raise ValidationError("User doesn't participate of this list!")
 
-        self.participants.remove(user)
-        for perm, _ in List._meta.permissions:
-            remove_perm(perm, user, self)
+        self.remove_participants([user], resolver=resolver)
+
+    def add_participants(
+        self,
+        users: Iterable[User],
+        *,
+        resolver: ListPermissionResolver | None = None,
+    ) -> list[User]:
+        """Add many participants to the list at once, skipping the ones already participating"""
+        resolver = resolver or ListPermissionResolver()
+        users = list(users)
+        resolver.prefetch(users, [self])
+
+        users = [user for user in users if not resolver.has_perm(user, "list.participant", self)]
+        if not users:
+            return users
+
+        self.participants.add(*users, through_defaults={"role": "participant"})
+
+        resolver.clear(self)
+        return users
+
+    def remove_participants(
+        self,
+        users: Iterable[User],
+        *,
+        resolver: ListPermissionResolver | None = None,
+    ):
+        """Remove many participants from the list at once, including all their permissions"""
+        users = list(users)
+        if not users:
+            return
+
+        # The owner can't leave their own list
+        with coalesce_list_changes():
+            self.memberships.filter(user__in=users).exclude(role="owner").delete()
+
+        if resolver is not None:
+            resolver.clear(self)
 
-    def promove_to_admin(self, user: User):
+    def promove_to_admin(self, user: User, *, resolver: ListPermissionResolver | None = None):
         """Promove a participant to admin"""
-        if not user.has_perm("list.participant", self):
+        resolver = resolver or ListPermissionResolver()
+        if not resolver.has_perm(user, "list.participant", self):
             raise ValidationError("User doesn't participate of this list!")
 
-        if any(user.has_perms(perm, self) for perm in ["list.admin", "list.owner"]):
+        if get_list_role(user, self, resolver=resolver) in ["owner", "admin"]:
             raise ValidationError("User is already admin of this list!")
 
-        assign_perm("admin", user, self)
+        self.memberships.filter(user=user).update(role="admin")
+        self._changed()
+        updates.participants_changed([self.pk])
+        resolver.clear(self)
 
     def add_item(
         self,
@@ -134,13 +443,60 @@ class List(BaseModel, TimestampedMixin):
             weight=weight,
         )
 
+    def add_items(self, items: Iterable[ItemData], /, *, batch_size: int = 500) -> list["ListItem"]:
+        """Add many items to the list, validating them at once and inserting them in batches"""
+        objs = [ListItem(list=self, is_active=True, **item) for item in items]
+
+        errors: dict[str, list[ValidationError]] = {}
+        for i, obj in enumerate(objs):
+            try:
+                # The related objects are validated below with a single query
+                obj.clean_fields(exclude=["list", "user"])
+            except ValidationError as e:
+                for field, messages in e.message_dict.items():
+                    errors[f"items.{i}.{field}"] = [ValidationError(m) for m in messages]
+
+        user_ids = {obj.user_id for obj in objs if obj.user_id is not None}
+        existing = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        for i, obj in enumerate(objs):
+            if obj.user_id is not None and obj.user_id not in existing:
+                errors[f"items.{i}.user"] = [ValidationError("User does not exist!")]
+
+        if errors:
+            raise ValidationError(errors)
+
+        using = router.db_for_write(ListItem)
+        with transaction.atomic(using=using):
+            for i in range(0, len(objs), batch_size):
+                batch = objs[i : i + batch_size]
+                kwargs = {"raw": False, "using": using, "update_fields": None}
+                # bulk_create doesn't send the save signals, so the hooks run for the batch
+                hooks.send_batch(signals.pre_save, ListItem, batch, **kwargs)
+                ListItem.objects.using(using).bulk_create(batch)
+                hooks.send_batch(signals.post_save, ListItem, batch, created=True, **kwargs)
+
+        return objs
+
     def remove_items(self, items: "ListItem | list[ListItem]") -> bool:
         if isinstance(items, ListItem):
             items = [items]
 
-        return ListItem.objects.filter(list=self, pk__in=[item.pk for item in items]).update(
-            is_active=False,
-        ) == len(items)
+        with transaction.atomic():
+            qs = ListItem.objects.filter(list=self, pk__in=[item.pk for item in items])
+            # Locked, so the rows deactivated here are the ones read as active
+            removed = list(
+                qs.filter(is_active=True).select_for_update().values_list("pk", "value", "quantity")
+            )
+            updated = qs.update(is_active=False)
+            subtotal = sum(
+                ((value or decimal.Decimal(0)) * quantity for _, value, quantity in removed),
+                decimal.Decimal(0),
+            )
+            self._changed(-subtotal, -len(removed))
+            # Not the items already removed, nor the ones of other lists
+            updates.items_removed(self.pk, [pk for pk, _, _ in removed])
+
+        return updated == len(items)
 
     #
     # Property
@@ -148,19 +504,131 @@ class List(BaseModel, TimestampedMixin):
 
     @property
     def subtotal(self) -> decimal.Decimal:
-        return decimal.Decimal(sum(item.total for item in self.items.filter(is_active=True)))
+        # Annotated by ListQuerySet.with_totals
+        if (subtotal := self.__dict__.get("_subtotal")) is not None:
+            return subtotal
+
+        return self.subtotal_cached
 
     @property
     def reserve(self) -> decimal.Decimal | None:
+        if "_reserve" in self.__dict__:
+            return self.__dict__["_reserve"]
+
         return self.threshold and self.threshold - self.subtotal
 
 
+class ListMembership(BaseModel, TimestampedMixin):
+    """The role of a user in a list, backing both the participants and their permissions"""
+
+    class Meta:
+        verbose_name = "membership"
+        verbose_name_plural = "memberships"
+        constraints = [
+            models.UniqueConstraint(fields=["list", "user"], name="list_membership_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "list", "role"], name="list_membership_user_idx"),
+        ]
+
+    list_id: int
+    list = models.ForeignKey[List](
+        List,
+        on_delete=models.CASCADE,
+        verbose_name="list",
+        related_name="memberships",
+        related_query_name="membership",
+    )
+    user_id: int
+    user = models.ForeignKey[User](
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="user",
+        related_name="list_memberships",
+        related_query_name="list_membership",
+    )
+    role = models.CharField(
+        verbose_name="Role",
+        max_length=16,
+        choices=List._meta.permissions,
+        default="participant",
+    )
+
+    #
+    #  Hooks
+    #
+
+    @hooks.post_save
+    def post_save(self, **kwargs):
+        lists_changed([self.list_id])
+        updates.participants_changed([self.list_id])
+
+    @hooks.post_delete
+    def post_delete(self, **kwargs):
+        lists_changed([self.list_id])
+        updates.participants_changed([self.list_id])
+
+    @hooks.m2m_changed
+    def participants_changed(  # type: ignore[misc]
+        instance: "List | User",
+        action: str,
+        reverse: bool,
+        pk_set: set[int] | None,
+        **kwargs,
+    ):
+        # Sent for the changes made through `List.participants` and `User.list_set`
+        if not reverse:
+            list_ids = [instance.pk] if action.startswith("post_") else []
+        elif action == "pre_clear":
+            list_ids = list(instance.list_memberships.values_list("list_id", flat=True))
+        else:
+            list_ids = list(pk_set or []) if action.startswith("post_") else []
+
+        lists_changed(list_ids)
+        updates.participants_changed(list_ids)
+
+    #
+    #   Private
+    #
+
+    def __repr__(self) -> str:
+        return f"ListMembership: ({self.list_id}, {self.user_id}, {self.role})"
+
+
+# The fields of ListItem._totals
+_totals_fields = {"list_id", "is_active", "value", "quantity"}
+
+
+@partitioned("created_at")
 class ListItem(BaseModel, TimestampedMixin):
     """List item model"""
 
     class Meta:
         verbose_name = "item"
         verbose_name_plural = "items"
+        indexes = [
+            # Keyset pagination order of the items of a list
+            models.Index(fields=["list", "created_at", "id"], name="list_item_created_idx"),
+            # The changes of the items of a list, for the delta sync
+            models.Index(fields=["list", "updated_at", "id"], name="list_item_updated_idx"),
+            # The active items of a list, for its totals and removals
+            models.Index(
+                fields=["list"],
+                condition=Q(is_active=True),
+                name="list_item_active_idx",
+            ),
+            # The removed items to archive
+            models.Index(
+                fields=["updated_at"],
+                condition=Q(is_active=False),
+                name="list_item_inactive_idx",
+            ),
+        ]
+
+    objects = ListItemQuerySet.as_manager()
+
+    # Quantity and value edits are frequent, don't validate what didn't change
+    validation_mode = "changed"
 
     name = models.CharField(
         max_length=255,
@@ -183,6 +651,7 @@ class ListItem(BaseModel, TimestampedMixin):
         blank=True,
         null=True,
     )
+    list_id: int
     list = models.ForeignKey[List](
         List,
         on_delete=models.CASCADE,
@@ -220,6 +689,99 @@ class ListItem(BaseModel, TimestampedMixin):
         blank=True,
         default=True,
     )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+    )
+
+    search_index = SearchIndex(
+        [{"name": "name", "weight": "A"}, {"name": "description", "weight": "B"}]
+    )
+
+    #
+    #   Private
+    #
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Loading the deferred fields here would load them again for each of them
+        if _totals_fields.issubset(field_names):
+            instance._loaded_totals = instance._totals()
+        return instance
+
+    def _totals(self) -> tuple[int, bool, decimal.Decimal]:
+        """The list, active state and total this item accounts for in its list totals."""
+        return (self.list_id, self.is_active, self.total)
+
+    #
+    #  Hooks
+    #
+
+    @hooks.pre_save
+    def pre_save(self, **kwargs):
+        if self.pk is None or "_loaded_totals" in self.__dict__:
+            return
+
+        # Not loaded from the database, so fetch what the list totals currently account for
+        self._loaded_totals = next(
+            (
+                (list_id, is_active, (value or decimal.Decimal(0)) * quantity)
+                for list_id, is_active, value, quantity in ListItem.objects.filter(
+                    pk=self.pk
+                ).values_list("list_id", "is_active", "value", "quantity")
+            ),
+            None,
+        )
+
+    @hooks.post_save(batch=True)
+    def publish(items: "list[ListItem]", created: bool, **kwargs):  # type: ignore[misc]
+        # Before `post_save` replaces the totals loaded with the lists the items were in
+        previous_list_ids = {
+            item.pk: item.__dict__["_loaded_totals"][0]
+            for item in items
+            if not created and item.__dict__.get("_loaded_totals") is not None
+        }
+        updates.items_saved(items, previous_list_ids=previous_list_ids)
+
+    @hooks.post_save(batch=True)
+    def post_save(items: "list[ListItem]", created: bool, **kwargs):  # type: ignore[misc]
+        # The totals of each list change once for all the items saved together
+        deltas: dict[int, tuple[decimal.Decimal, int]] = {}
+        loaded: dict[int, List] = {}
+        for item in items:
+            previous = None if created else item.__dict__.get("_loaded_totals")
+            item._loaded_totals = current = item._totals()
+
+            # Both the list the item is in and the one it was moved out of changed
+            totals = [(current, 1)] if previous is None else [(previous, -1), (current, 1)]
+            for (list_id, is_active, total), sign in totals:
+                subtotal, count = deltas.get(list_id, (decimal.Decimal(0), 0))
+                if is_active:
+                    subtotal, count = subtotal + sign * total, count + sign
+                deltas[list_id] = (subtotal, count)
+
+            if ListItem.list.is_cached(item):
+                loaded.setdefault(item.list_id, item.list)
+
+        for list_id, (subtotal, count) in deltas.items():
+            if list_id in loaded:
+                loaded[list_id]._changed(subtotal, count)
+            else:
+                lists_changed([list_id], subtotal, count)
+
+    @hooks.post_save(deferred=True, fields=["name", "description"])
+    def update_search_vector(self, update_fields: frozenset[str] | None = None, **kwargs):
+        ListItem.search_index.update_instance(self, update_fields)
+
+    @hooks.post_delete
+    def post_delete(self, **kwargs):
+        list_id, is_active, total = self.__dict__.get("_loaded_totals") or self._totals()
+        if is_active:
+            lists_changed([list_id], -total, -1)
+            updates.items_removed(list_id, [self.pk])
+        else:
+            lists_changed([list_id])
 
     #
     # Property
@@ -228,3 +790,42 @@ class ListItem(BaseModel, TimestampedMixin):
     @property
     def total(self) -> decimal.Decimal:
         return (self.value or decimal.Decimal(0)) * self.quantity
+
+
+class Archive(BaseModel):
+    """A row archived out of the hot tables, with its serialized data"""
+
+    class Meta:
+        verbose_name = "archive"
+        verbose_name_plural = "archives"
+        constraints = [
+            models.UniqueConstraint(fields=["model", "object_id"], name="list_archive_unique"),
+        ]
+
+    model = models.CharField(
+        verbose_name="Model",
+        max_length=64,
+    )
+    object_id = models.BigIntegerField(
+        verbose_name="Object id",
+    )
+    list_id = models.BigIntegerField(
+        verbose_name="List id",
+        help_text="The list the row belongs to, to restore the rows of a list together",
+        db_index=True,
+    )
+    data = models.JSONField(
+        verbose_name="Data",
+        encoder=DjangoJSONEncoder,
+    )
+    archived_at = models.DateTimeField(
+        verbose_name="Archived at",
+        auto_now_add=True,
+    )
+
+    #
+    #   Private
+    #
+
+    def __repr__(self) -> str:
+        return f"Archive: ({self.model}, {self.object_id})"
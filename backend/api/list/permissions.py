@@ -0,0 +1,100 @@
+from typing import TYPE_CHECKING, Iterable, Literal
+
+from strawberry.types import Info
+
+from api.user.models import User
+
+if TYPE_CHECKING:
+    from .models import List
+
+Role = Literal["owner", "admin", "participant"]
+
+# Ordered from the highest to the lowest role
+_roles: tuple[Role, ...] = ("owner", "admin", "participant")
+
+# The permissions each membership role grants on its list
+ROLE_PERMISSIONS: dict[str, frozenset[str]] = {
+    "owner": frozenset(["owner"]),
+    "admin": frozenset(["admin", "participant"]),
+    "participant": frozenset(["participant"]),
+}
+
+
+class ListPermissionResolver:
+    """Resolve the users' object permissions on lists from their memberships.
+
+    Memberships are loaded with a single query for all the given users and lists
+    and memoized, so it is meant to live for a single request only.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._perms: dict[tuple[int, int], frozenset[str]] = {}
+
+    def prefetch(self, users: Iterable[User], lists: Iterable["List"]):
+        """Load the permissions of all the users on all the lists at once"""
+        users = [user for user in users if user.is_authenticated]
+        lists = [*lists]
+        missing = {(user.pk, obj.pk) for user in users for obj in lists} - self._perms.keys()
+        if not missing:
+            return
+
+        from .models import ListMembership
+
+        perms = dict.fromkeys(missing, frozenset())
+        qs = ListMembership.objects.filter(
+            list__in={list_pk for _, list_pk in missing},
+            user__in={user_pk for user_pk, _ in missing},
+        )
+        for user_pk, list_pk, role in qs.values_list("user_id", "list_id", "role"):
+            if (key := (user_pk, list_pk)) in perms:
+                perms[key] = ROLE_PERMISSIONS[role]
+
+        self._perms.update(perms)
+
+    def get_perms(self, user: User, list: "List") -> frozenset[str]:
+        """The permission codenames the user has on the list"""
+        if not user.is_authenticated or not user.is_active:
+            return frozenset()
+
+        if user.is_superuser:
+            return frozenset(_roles)
+
+        self.prefetch([user], [list])
+        return self._perms[(user.pk, list.pk)]
+
+    def has_perm(self, user: User, perm: str, list: "List") -> bool:
+        if "." in perm:
+            _, perm = perm.split(".", 1)
+
+        return perm in self.get_perms(user, list)
+
+    def get_role(self, user: User, list: "List") -> Role | None:
+        """The highest role the user has on the list"""
+        perms = self.get_perms(user, list)
+        return next((role for role in _roles if role in perms), None)
+
+    def clear(self, list: "List"):
+        """Forget the memoized permissions on the list, after they were changed"""
+        for key in [key for key in self._perms if key[1] == list.pk]:
+            del self._perms[key]
+
+
+def get_permission_resolver(info: Info) -> ListPermissionResolver:
+    """The permission resolver of the current request"""
+    resolver = getattr(info.context, "list_permissions", None)
+    if resolver is None:
+        resolver = ListPermissionResolver()
+        info.context.list_permissions = resolver
+
+    return resolver
+
+
+def get_list_role(
+    user: User,
+    list: "List",
+    *,
+    resolver: ListPermissionResolver | None = None,
+) -> Role | None:
+    """The highest role the user has on the list"""
+    return (resolver or ListPermissionResolver()).get_role(user, list)
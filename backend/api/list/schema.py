@@ -1,30 +1,146 @@
-from typing import cast
+from typing import AsyncGenerator, cast
 
+from asgiref.sync import sync_to_async
+from django.db.models import Q
 from strawberry.types import Info
 from strawberry_django_plus import gql
 
+from api.base.conditional import record_version, versioned
+from api.base.pagination import PageArgs
+from api.base.resolvers import async_safe
 from api.user.models import User
 from api.user.types import UserType
 
-from .models import List
+from .cache import list_cache
+from .loaders import get_loaders
+from .models import List, ListMembership
+from .permissions import get_list_role, get_permission_resolver
+from .sync import item_changes
 from .types import (
+    ItemTombstoneType,
+    ItemType,
+    ListCacheStatsType,
+    ListChangesType,
     ListInputType,
+    ListItemsInputType,
     ListParticipantInputType,
+    ListParticipantsInputType,
     ListType,
+    ListUpdateType,
     PromoveParticipantInputType,
 )
+from .updates import list_updates
 
 _ListTypeOrNone = ListType | None
+# The `list` field shadows the builtin in the body of Query
+_ListTypes = list[ListType]
+_ItemTypes = list[ItemType]
+
+
+@versioned("list")
+def _list_versions(ids: list[int]) -> dict[int, int]:
+    return dict(List.objects.filter(pk__in=ids).values_list("pk", "version"))
+
+
+def _get_visible_list(info: Info, list_id: gql.relay.GlobalID) -> List:
+    user = info.context.request.user
+    list = cast(List, ListType.resolve_node(list_id.node_id))
+
+    role = get_list_role(user, list, resolver=get_permission_resolver(info))
+    if not list.is_public and role is None:
+        raise PermissionError("You are not allowed to see this list!")
+
+    return list
 
 
 @gql.type
 class Query:
-    list: ListType = gql.django.node()
+    @gql.field
+    @async_safe
+    def list(  # noqa: A003
+        self,
+        info: Info,
+        id: gql.relay.GlobalID,  # noqa: A002
+        if_version: int | None = None,
+    ) -> _ListTypeOrNone:
+        """The list, read through the list cache.
+
+        Null when the list is still at `ifVersion`, which is checked before reading it.
+        The version covers the list, its items and who participates in it, not the
+        fields of the users, which may have changed meanwhile.
+        """
+        pk = int(id.node_id)
+        if if_version is not None and List.objects.filter(pk=pk, version=if_version).exists():
+            record_version(info, "list", pk, if_version)
+            return None
+
+        snapshot = list_cache.get(pk)
+        get_loaders(info).set_snapshot(snapshot)
+        record_version(info, "list", pk, snapshot.list.version)
+
+        return cast(ListType, snapshot.list)
+
+    @gql.field
+    @async_safe
+    def list_cache_stats(self, info: Info) -> ListCacheStatsType:
+        """The hits and misses of the list cache of the process serving the request"""
+        user = info.context.request.user
+        if not user.is_superuser:
+            raise PermissionError("You are not allowed to see the cache stats!")
+
+        stats = list_cache.stats
+        return ListCacheStatsType(
+            hits=stats.hits,
+            misses=stats.misses,
+            invalidations=stats.invalidations,
+            hit_rate=stats.hit_rate,
+        )
+
+    @gql.field
+    @async_safe
+    def search_lists(self, info: Info, q: str, first: int = 20) -> _ListTypes:
+        """The public lists and the lists of the user matching the query, best matches first"""
+        user = info.context.request.user
+        page = PageArgs(first=first)
+
+        visible = Q(is_public=True)
+        if user.is_authenticated:
+            visible |= Q(pk__in=ListMembership.objects.filter(user=user).values("list_id"))
+
+        lists = List.objects.filter(visible, is_active=True).search(q)[: page.limit]
+
+        return cast(_ListTypes, list(lists))
+
+    @gql.field
+    @async_safe
+    def list_changes(
+        self,
+        info: Info,
+        list_id: gql.relay.GlobalID,
+        since: str | None = None,
+        first: int = 100,
+    ) -> ListChangesType:
+        """The items of the list created, updated or removed since the `since` cursor"""
+        list = _get_visible_list(info, list_id)
+        changes = item_changes(list, since, limit=first)
+        return ListChangesType(
+            changed=cast(_ItemTypes, changes.changed),
+            removed=[
+                ItemTombstoneType(
+                    id=gql.relay.GlobalID("ItemType", str(obj.pk)),
+                    removed_at=obj.updated_at,
+                )
+                for obj in changes.removed
+            ],
+            cursor=changes.cursor,
+            has_more=changes.has_more,
+        )
 
 
 @gql.type
 class Mutation:
     @gql.mutation
+    @async_safe
     def create_list(self, info: Info, input: ListInputType) -> _ListTypeOrNone:
         user = info.context.request.user
 
@@ -35,36 +151,151 @@ class Mutation:
         return cast(ListType, list)
 
     @gql.mutation
+    @async_safe
+    def add_items(self, info: Info, input: ListItemsInputType) -> _ListTypeOrNone:
+        user = info.context.request.user
+        list = cast(List, ListType.resolve_node(input.list_id.node_id))
+
+        if get_list_role(user, list, resolver=get_permission_resolver(info)) is not None:
+            list.add_items({**item.__dict__, "user": user} for item in input.items)
+
+            return cast(ListType, list)
+
+        raise PermissionError("You are not allowed to add items!")
+
+    @gql.mutation
+    @async_safe
     def add_participant(self, info: Info, input: ListParticipantInputType) -> _ListTypeOrNone:
         user = info.context.request.user
         list = cast(List, ListType.resolve_node(input.list_id.node_id))
 
-        if any(user.has_perm(perm, list) for perm in ["list.owner", "list.admin"]):
-            participant = cast(User, UserType.resolve_node(input.participant_id.node_id))
-            list.add_participant(participant)
+        participant = cast(User, UserType.resolve_node(input.participant_id.node_id))
+        resolver = get_permission_resolver(info)
+        resolver.prefetch([user, participant], [list])
+
+        if get_list_role(user, list, resolver=resolver) in ["owner", "admin"]:
+            list.add_participant(participant, resolver=resolver)
 
             return cast(ListType, list)
-        else:
-            raise PermissionError("You are not allowed to add participants!")
+
+        raise PermissionError("You are not allowed to add participants!")
 
     @gql.mutation
+    @async_safe
     def remove_participant(self, info: Info, input: ListParticipantInputType) -> _ListTypeOrNone:
         user = info.context.request.user
         list = cast(List, ListType.resolve_node(input.list_id.node_id))
 
-        if any(user.has_perm(perm, list) for perm in ["list.owner", "list.admin"]):
-            participant = cast(User, UserType.resolve_node(input.participant_id.node_id))
-            list.remove_participant(participant)
+        participant = cast(User, UserType.resolve_node(input.participant_id.node_id))
+        resolver = get_permission_resolver(info)
+        resolver.prefetch([user, participant], [list])
+
+        if get_list_role(user, list, resolver=resolver) in ["owner", "admin"]:
+            list.remove_participant(participant, resolver=resolver)
 
             return cast(ListType, list)
 
         raise PermissionError("You are not allowed to remove participants!")
 
     @gql.mutation
+    @async_safe
+    def add_participants(self, info: Info, input: ListParticipantsInputType) -> _ListTypeOrNone:
+        user = info.context.request.user
+        list = cast(List, ListType.resolve_node(input.list_id.node_id))
+
+        resolver = get_permission_resolver(info)
+
+        if get_list_role(user, list, resolver=resolver) in ["owner", "admin"]:
+            participants = User.objects.filter(
+                pk__in=[participant_id.node_id for participant_id in input.participant_ids],
+            )
+            list.add_participants(participants, resolver=resolver)
+
+            return cast(ListType, list)
+
+        raise PermissionError("You are not allowed to add participants!")
+
+    @gql.mutation
+    @async_safe
+    def remove_participants(
+        self,
+        info: Info,
+        input: ListParticipantsInputType,
+    ) -> _ListTypeOrNone:
+        user = info.context.request.user
+        list = cast(List, ListType.resolve_node(input.list_id.node_id))
+
+        resolver = get_permission_resolver(info)
+
+        if get_list_role(user, list, resolver=resolver) in ["owner", "admin"]:
+            participants = User.objects.filter(
+                pk__in=[participant_id.node_id for participant_id in input.participant_ids],
+            )
+            list.remove_participants(participants, resolver=resolver)
+
+            return cast(ListType, list)
+
+        raise PermissionError("You are not allowed to remove participants!")
+
+    @gql.mutation
+    @async_safe
     def promove_to_admin(self, info: Info, input: PromoveParticipantInputType) -> _ListTypeOrNone:
         user = info.context.request.user
         list = cast(List, ListType.resolve_node(input.list_id.node_id))
 
-        if any(user.has_perm(perm, list) for perm in ["list.owner", "list.admin"]):
-            participant = cast(User, UserType.resolve_node(input.participant_id.node_id))
-            list.promove_to_admin(participant)
+        participant = cast(User, UserType.resolve_node(input.participant_id.node_id))
+        resolver = get_permission_resolver(info)
+        resolver.prefetch([user, participant], [list])
+
+        if get_list_role(user, list, resolver=resolver) in ["owner", "admin"]:
+            list.promove_to_admin(participant, resolver=resolver)
+
+            return cast(ListType, list)
+
+        raise PermissionError("You are not allowed to promove participants!")
+
+
+@gql.type
+class Subscription:
+    @gql.subscription
+    async def list_updated(
+        self,
+        info: Info,
+        list_id: gql.relay.GlobalID,
+    ) -> AsyncGenerator[ListUpdateType, None]:
+        """The changes of the list as they are committed, with the items that changed only.
+
+        The changes committed while subscribing are missed, `list(ifVersion:)` after the
+        subscription starts catches up with them. It ends with an error once the user
+        can't see the list anymore.
+        """
+        list = await sync_to_async(_get_visible_list)(info, list_id)
+        user = info.context.request.user
+
+        async for update in list_updates(list.pk):
+            # Each update is resolved like a request of its own, without what the previous
+            # ones loaded
+            get_loaders(info).clear()
+            permissions = get_permission_resolver(info)
+            permissions.clear(list)
+
+            if update.list is not None:
+                list = update.list
+            if update.participants_changed or update.list is not None:
+                # The users who can't see the list anymore stop getting its updates
+                role = await sync_to_async(get_list_role)(user, list, resolver=permissions)
+                if not list.is_public and role is None:
+                    raise PermissionError("You are not allowed to see this list!")
+
+            yield ListUpdateType(
+                changed=cast(_ItemTypes, update.changed),
+                removed=[
+                    ItemTombstoneType(
+                        id=gql.relay.GlobalID("ItemType", str(pk)),
+                        removed_at=removed_at,
+                    )
+                    for pk, removed_at in update.removed
+                ],
+                participants_changed=update.participants_changed,
+                list=cast(_ListTypeOrNone, update.list),
+            )
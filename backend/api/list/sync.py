@@ -0,0 +1,48 @@
+import dataclasses
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.base.pagination import Keyset, PageArgs
+
+from .models import List, ListItem
+
+# Changes are ordered by when they happened, the cursors are the last seen one
+change_keyset = Keyset(ListItem, ["updated_at", "id"])
+
+
+@dataclasses.dataclass
+class ItemChanges:
+    """The items of a list created, updated or removed since a cursor"""
+
+    changed: list[ListItem]
+    removed: list[ListItem]
+    cursor: str | None
+    has_more: bool
+
+
+def item_changes(list: List, since: str | None = None, *, limit: int = 100) -> ItemChanges:
+    """The changes of the items of the list after the `since` cursor, oldest first.
+
+    Without a cursor all the active items are returned, as a first sync. The cursor
+    of the result always moves forward and is passed as `since` for the next page or
+    sync. Deleted items are not tracked, only the removed ones.
+    """
+    page = PageArgs(after=since, first=limit)
+    horizon = timezone.now() - datetime.timedelta(seconds=settings.LIST_SYNC_LAG)
+
+    qs = ListItem.objects.filter(list=list, updated_at__lte=horizon)
+    if since is None:
+        qs = qs.filter(is_active=True)
+
+    rows = change_keyset.paginate(qs, page)
+    has_more = page.limit is not None and len(rows) > page.limit
+    rows = rows[: page.limit]
+
+    return ItemChanges(
+        changed=[obj for obj in rows if obj.is_active],
+        removed=[obj for obj in rows if not obj.is_active],
+        cursor=change_keyset.cursor(rows[-1]) if rows else since,
+        has_more=has_more,
+    )
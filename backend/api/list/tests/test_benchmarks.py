@@ -0,0 +1,316 @@
+import json
+import os
+import time
+
+from django.db import models
+from django.db.models import Q, signals
+import pytest
+from strawberry_django_plus.relay import to_base64
+
+from api.base import hooks
+from api.list.cache import list_cache
+from api.list.models import List, ListItem
+from api.tests.benchmark import (
+    BenchmarkReport,
+    GqlBenchmarkClient,
+    Operation,
+    SlowClient,
+    run_asgi_load,
+    run_wsgi_load,
+    time_calls,
+    time_query,
+)
+from api.tests.faker import SeedData, seed
+
+pytestmark = pytest.mark.benchmark
+
+_scale = float(os.getenv("BENCHMARK_SCALE", "1"))
+
+_fragments = """\
+fragment userFields on UserType {
+    id
+    username
+    email
+}
+
+fragment listFields on ListType {
+    id
+    title
+    subtotal
+    activeItemCount
+    owner{
+        ...userFields
+    }
+    participants{
+        ...userFields
+    }
+    items(first: 20){
+        edges{
+            node{
+                id
+                name
+                quantity
+                value
+                owner{
+                    ...userFields
+                }
+            }
+        }
+    }
+}
+"""
+
+_operations = [
+    Operation(
+        name="myLists",
+        query="""
+            query MyLists{
+                myLists(first: 50){
+                    edges{
+                        node{
+                            ...listFields
+                        }
+                    }
+                }
+            }
+        """,
+        fragments=_fragments,
+        max_queries=6,
+    ),
+    Operation(
+        name="list",
+        query="""
+            query List($id: GlobalID!){
+                list(id: $id){
+                    ...listFields
+                }
+            }
+        """,
+        fragments=_fragments,
+        variables=lambda data: {"id": to_base64("ListType", data.lists[0].pk)},
+        max_queries=4,
+    ),
+    Operation(
+        name="createList",
+        query="""
+            mutation CreateList($input: ListInputType!){
+                createList(input: $input){
+                    id
+                }
+            }
+        """,
+        variables=lambda data: {"input": {"title": "Supermarket", "description": ""}},
+        max_queries=6,
+    ),
+    Operation(
+        name="addItems",
+        query="""
+            mutation AddItems($input: ListItemsInputType!){
+                addItems(input: $input){
+                    id
+                    activeItemCount
+                }
+            }
+        """,
+        variables=lambda data: {
+            "input": {
+                "listId": to_base64("ListType", data.lists[0].pk),
+                "items": [{"name": f"Item {i}", "value": "1.50"} for i in range(200)],
+            },
+        },
+        max_queries=11,
+    ),
+    Operation(
+        name="addParticipants",
+        query="""
+            mutation AddParticipants($input: ListParticipantsInputType!){
+                addParticipants(input: $input){
+                    id
+                }
+            }
+        """,
+        variables=lambda data: {
+            "input": {
+                "listId": to_base64("ListType", data.lists[0].pk),
+                "participantIds": [to_base64("UserType", u.pk) for u in data.users[:100]],
+            },
+        },
+        # Including the bump of the list version
+        max_queries=9,
+    ),
+    Operation(
+        name="removeParticipants",
+        query="""
+            mutation RemoveParticipants($input: ListParticipantsInputType!){
+                removeParticipants(input: $input){
+                    id
+                }
+            }
+        """,
+        variables=lambda data: {
+            "input": {
+                "listId": to_base64("ListType", data.lists[0].pk),
+                "participantIds": [to_base64("UserType", u.pk) for u in data.users[:100]],
+            },
+        },
+        # The memberships are fetched before deleting them, to bump the list version once
+        max_queries=8,
+    ),
+]
+
+
+@pytest.fixture
+def data() -> SeedData:
+    return seed(
+        lists=int(200 * _scale),
+        items_per_list=int(10 * _scale),
+        participants_per_list=int(5 * _scale),
+    )
+
+
+@pytest.mark.parametrize("operation", _operations, ids=[op.name for op in _operations])
+def test_operation_budget(
+    operation: Operation,
+    data: SeedData,
+    gql_benchmark_client: GqlBenchmarkClient,
+    benchmark_report: BenchmarkReport,
+):
+    # The first list owner participates in many lists, as heavy accounts do
+    user = data.lists[0].owner
+
+    with gql_benchmark_client.login(user):
+        result = gql_benchmark_client.measure(operation, data)
+
+    benchmark_report.add(result)
+    assert result.within_budget, str(result)
+
+
+def test_slow_clients(settings, benchmark_report: BenchmarkReport):
+    # A single worker process with as many threads as a typical WSGI deployment
+    workers = 4
+    body = json.dumps({"query": "query TestMe{ me{ id } }"}).encode()
+    clients = [
+        SlowClient(path="/api/graphql/", body=body, upload_time=0.2)
+        for _ in range(int(40 * _scale))
+    ]
+
+    wsgi = run_wsgi_load("slowClients (wsgi)", clients, workers=workers)
+    settings.ROOT_URLCONF = "api.tests.asgi_urls"
+    asgi = run_asgi_load("slowClients (asgi)", clients)
+
+    # The event loop waits for all the uploads at once, while each thread waits for one.
+    # That is about `len(clients) / workers` times faster, asserted with a wide margin, as
+    # wall times vary a lot on loaded hosts
+    comparison = benchmark_report.compare("slowClients", wsgi, asgi)
+    assert comparison.speedup > 2, str(comparison)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_slow_resolvers(settings, monkeypatch, data: SeedData, benchmark_report: BenchmarkReport):
+    # A request reading many lists, each from a cache as slow as a remote database. Committed,
+    # as the threads of the resolvers have their own connections
+    lists = data.lists[:8]
+    fields = " ".join(
+        f'l{i}: list(id: "{to_base64("ListType", obj.pk)}"){{ title }}'
+        for i, obj in enumerate(lists)
+    )
+    clients = [
+        SlowClient(
+            path="/api/graphql/",
+            body=json.dumps({"query": f"{{ {fields} }}"}).encode(),
+            upload_time=0,
+        )
+    ]
+
+    calls = []
+    get = list_cache.get
+
+    def slow_get(pk: int):
+        calls.append(pk)
+        time.sleep(0.1)
+        return get(pk)
+
+    monkeypatch.setattr(list_cache, "get", slow_get)
+    settings.ROOT_URLCONF = "api.tests.asgi_urls"
+
+    settings.GRAPHQL_RESOLVER_THREADS = 0
+    sequential = run_asgi_load("slowResolvers (request thread)", clients)
+    settings.GRAPHQL_RESOLVER_THREADS = len(lists)
+    pooled = run_asgi_load("slowResolvers (thread pool)", clients)
+    assert sorted(calls) == sorted([obj.pk for obj in lists] * 2)
+
+    # The request thread runs the resolvers one after the other, while the pool runs them
+    # all at once, about `len(lists)` times faster
+    comparison = benchmark_report.compare("slowResolvers", sequential, pooled)
+    assert comparison.speedup > 3, str(comparison)
+
+
+def test_search(data: SeedData, benchmark_report: BenchmarkReport):
+    # The seeded items are too few for the index to pay off, scanning them is as fast
+    words = ["arroz", "feijão", "leite", "café", "pão", "sabão", "tomate", "cebola"]
+    ListItem.objects.bulk_create(
+        [
+            ListItem(list=obj, name=f"{words[i % len(words)]} {i}", description=words[i // 8 % 8])
+            for obj in data.lists
+            for i in range(int(200 * _scale))
+        ],
+        batch_size=1000,
+    )
+
+    # A term matched by the title of a list and by an item of another one only
+    q = "abacaxi"
+    target = data.lists[len(data.lists) // 2]
+    target.title = f"{target.title} {q}"
+    target.save()
+    data.lists[-1].add_item(q.title())
+
+    def scan() -> models.QuerySet[List]:
+        items = ListItem.objects.filter(
+            Q(name__icontains=q) | Q(description__icontains=q), is_active=True
+        )
+        return List.objects.filter(
+            Q(title__icontains=q) | Q(description__icontains=q) | Q(pk__in=items.values("list_id"))
+        )
+
+    # The same page of both, in the same order
+    ordering = ("-created_at", "-id")
+    scanned = time_query("search (scan)", lambda: scan().order_by(*ordering)[:20])
+    indexed = time_query(
+        "search (indexed)", lambda: List.objects.search(q).order_by(*ordering)[:20]
+    )
+
+    benchmark_report.add(scanned)
+    benchmark_report.add(indexed)
+    matches = list(List.objects.search(q).order_by(*ordering)[:20])
+    assert matches == list(scan().order_by(*ordering)[:20])
+    assert set(matches) == {target, data.lists[-1]}
+    assert indexed.wall_time * 2 < scanned.wall_time, f"{indexed} vs {scanned}"
+
+
+def test_hook_dispatch(monkeypatch, benchmark_report: BenchmarkReport):
+    # Items have a pre_save and three post_save hooks: publish, post_save and
+    # update_search_vector. Their bodies are replaced, so only the dispatch is timed, not
+    # the work they do, which is the same either way
+    item = ListItem(name="Item", quantity=2, value=3)
+    kwargs = {"raw": False, "using": "default", "update_fields": None}
+    registered = hooks._registry[ListItem]
+    assert len(registered[signals.pre_save]) == 1
+    assert len(registered[signals.post_save]) == 3
+    for hook in [*registered[signals.pre_save], *registered[signals.post_save]]:
+        monkeypatch.setattr(hook, "_f", lambda *args, **kwargs: None)
+
+    def send():
+        hooks.send(signals.pre_save, ListItem, item, **kwargs)
+        hooks.send(signals.post_save, ListItem, item, created=True, **kwargs)
+
+    def send_signals():
+        signals.pre_save.send(sender=ListItem, instance=item, **kwargs)
+        signals.post_save.send(sender=ListItem, instance=item, created=True, **kwargs)
+
+    direct = time_calls("dispatch item hooks (direct)", send, runs=20000)
+    with hooks.use_signals():
+        through_signals = time_calls("dispatch item hooks (signals)", send_signals, runs=20000)
+
+    benchmark_report.add(direct)
+    benchmark_report.add(through_signals)
+    assert direct.wall_time < through_signals.wall_time, f"{direct} vs {through_signals}"
@@ -0,0 +1,189 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+from strawberry_django_plus.relay import to_base64
+
+from api.list.cache import list_cache
+from api.list.models import List, ListItem
+from api.tests.base import GqlTestClient
+from api.tests.faker import ListFactory, ListItemFactory, UserFactory
+
+_query = """
+    query List($id: GlobalID!, $first: Int, $after: String){
+        list(id: $id){
+            title
+            subtotal
+            activeItemCount
+            owner{
+                username
+            }
+            participants{
+                username
+            }
+            items(first: $first, after: $after){
+                totalCount
+                edges{
+                    cursor
+                    node{
+                        name
+                        owner{
+                            username
+                        }
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
+def _read(gql_client: GqlTestClient, list: List, **variables) -> dict:
+    response = gql_client.query(
+        _query, variables={"id": to_base64("ListType", list.pk), **variables}
+    )
+    assert response.data is not None
+    return response.data["list"]
+
+
+def _rename(list: List):
+    list.title = "Renamed"
+    list.save()
+
+
+class TestListCache:
+    def test_read_through(self, gql_client: GqlTestClient):
+        list = ListFactory.create()
+        ListItemFactory.create_batch(3, list=list, user=list.owner)
+        stats = list_cache.stats
+        hits, misses = stats.hits, stats.misses
+
+        with CaptureQueriesContext(connection) as miss:
+            expected = _read(gql_client, list)
+        with CaptureQueriesContext(connection) as hit:
+            assert _read(gql_client, list) == expected
+
+        assert (stats.hits - hits, stats.misses - misses) == (1, 1)
+        # Only the users are read from the database
+        assert len(hit.captured_queries) == 1
+        assert len(hit.captured_queries) < len(miss.captured_queries)
+
+    def test_pages(self, gql_client: GqlTestClient):
+        list = ListFactory.create()
+        ListItemFactory.create_batch(5, list=list)
+
+        first = _read(gql_client, list, first=2)["items"]
+        assert first["totalCount"] == 5
+        after = first["edges"][-1]["cursor"]
+        cached = _read(gql_client, list, first=2, after=after)["items"]
+
+        list_cache.cache.clear()
+        assert _read(gql_client, list, first=2, after=after)["items"] == cached
+        assert [e["node"]["name"] for e in first["edges"] + cached["edges"]] == [
+            obj.name for obj in ListItem.objects.filter(list=list).order_by("created_at", "id")[:4]
+        ]
+
+    def test_too_many_items(self, gql_client: GqlTestClient, settings):
+        settings.LIST_CACHE_MAX_ITEMS = 2
+        list = ListFactory.create()
+        ListItemFactory.create_batch(3, list=list)
+
+        assert list_cache.get(list.pk).items is None
+        assert len(_read(gql_client, list)["items"]["edges"]) == 3
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            pytest.param(lambda list: _rename(list), id="list_save"),
+            pytest.param(lambda list: ListItemFactory.create(list=list), id="item_save"),
+            pytest.param(lambda list: list.items.get().delete(), id="item_delete"),
+            pytest.param(lambda list: list.add_items([{"name": "Added"}]), id="add_items"),
+            pytest.param(lambda list: list.remove_items(list.items.get()), id="remove_items"),
+            pytest.param(
+                lambda list: list.add_participant(UserFactory.create()),
+                id="add_participant",
+            ),
+            pytest.param(
+                lambda list: list.participants.add(
+                    UserFactory.create(),
+                    through_defaults={"role": "participant"},
+                ),
+                id="m2m_add",
+            ),
+            pytest.param(
+                lambda list: list.remove_participants(list.participants.exclude(pk=list.owner_id)),
+                id="remove_participants",
+            ),
+            pytest.param(
+                lambda list: list.participants.exclude(pk=list.owner_id).get().list_set.clear(),
+                id="m2m_reverse_clear",
+            ),
+            pytest.param(
+                lambda list: list.promove_to_admin(
+                    list.participants.exclude(pk=list.owner_id).get()
+                ),
+                id="promove_to_admin",
+            ),
+        ],
+    )
+    def test_invalidation(self, gql_client: GqlTestClient, change):
+        obj = ListFactory.create()
+        ListItemFactory.create(list=obj, value=2)
+        obj.add_participant(UserFactory.create())
+        stale = list_cache.get(obj.pk)
+
+        change(List.objects.get(pk=obj.pk))
+
+        fresh = list_cache.get(obj.pk)
+        assert fresh is not stale
+        assert fresh.list.version > stale.list.version
+        assert [item.pk for item in fresh.items or []] == list(
+            ListItem.objects.filter(list=obj)
+            .order_by("created_at", "id")
+            .values_list(
+                "pk",
+                flat=True,
+            )
+        )
+        assert fresh.participant_ids == list(
+            obj.memberships.order_by("pk").values_list("user_id", flat=True)
+        )
+        current = List.objects.get(pk=obj.pk)
+        assert (fresh.list.title, fresh.list.active_item_count) == (
+            current.title,
+            current.active_item_count,
+        )
+
+    def test_stale_load(self, monkeypatch):
+        obj = ListFactory.create(title="Before")
+        load = list_cache._load
+
+        def load_then_change(pk: int):
+            snapshot = load(pk)
+            # Changed and invalidated after the rows were read, before they are cached
+            _rename(List.objects.get(pk=pk))
+            return snapshot
+
+        monkeypatch.setattr(list_cache, "_load", load_then_change)
+        assert list_cache.get(obj.pk).list.title == "Before"
+        monkeypatch.undo()
+
+        assert list_cache.get(obj.pk).list.title == "Renamed"
+        assert list_cache.get(obj.pk).list.title == "Renamed"
+
+    def test_stats(self, gql_client: GqlTestClient):
+        query = """
+            query Stats{
+                listCacheStats{
+                    hits
+                    misses
+                    hitRate
+                }
+            }
+        """
+        response = gql_client.query(query, asserts_errors=False)
+        assert response.errors is not None
+
+        with gql_client.login(UserFactory.create(is_superuser=True)):
+            response = gql_client.query(query)
+        assert response.data is not None
+        assert response.data["listCacheStats"]["hits"] == list_cache.stats.hits
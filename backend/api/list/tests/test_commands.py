@@ -0,0 +1,151 @@
+import datetime
+import decimal
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.utils import timezone
+import pytest
+
+from api.lib.dbutils import PartitionByMonth, get_partitioning
+from api.list.models import List, ListItem, ListMembership
+from api.tests.faker import ListFactory, ListItemFactory
+
+
+class TestRecomputeListTotals:
+    def test_repair_drift(self):
+        list = ListFactory.create()
+        ListItemFactory.create_batch(2, value=decimal.Decimal("5.00"), list=list)
+        List.objects.filter(pk=list.pk).update(subtotal_cached=0, active_item_count=7)
+
+        call_command("recompute_list_totals", "--dry-run")
+        list.refresh_from_db()
+        assert (list.subtotal_cached, list.active_item_count) == (decimal.Decimal(0), 7)
+
+        call_command("recompute_list_totals")
+        list.refresh_from_db()
+        assert (list.subtotal_cached, list.active_item_count) == (decimal.Decimal("10.00"), 2)
+
+
+class TestEnsurePartitions:
+    def test_partitions(self):
+        partitioning = get_partitioning(ListItem)
+        assert partitioning is not None
+
+        months = partitioning.months(datetime.date(2025, 11, 15), datetime.date(2026, 2, 1))
+        assert [partitioning.partition(m) for m in months] == [
+            "list_listitem_y2025m11",
+            "list_listitem_y2025m12",
+            "list_listitem_y2026m01",
+            "list_listitem_y2026m02",
+        ]
+        assert partitioning.range(datetime.date(2025, 12, 31)) == (
+            datetime.datetime(2025, 12, 1, tzinfo=datetime.timezone.utc),
+            datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+
+    def test_not_partitioned_database(self):
+        # Only postgres supports partitioning, the other databases use a plain table
+        out = io.StringIO()
+        call_command("ensure_partitions", "--start", "2026-01", stdout=out)
+        assert "Created 0 partitions" in out.getvalue()
+
+
+class TestPartitionByMonth:
+    def test_statements(self):
+        operation = PartitionByMonth("listitem", "created_at")
+        # The standard SQL of the base editor, the postgres one needs psycopg2. It only
+        # collects the statements, without running them
+        editor = BaseDatabaseSchemaEditor(connection, collect_sql=True)
+        statements = operation.statements(
+            editor,
+            ListItem,
+            ["list_listitem_pkey", "list_listitem_list_id_idx"],
+            "list_listitem_pkey",
+        )
+
+        renamed = editor._create_index_name(
+            "list_listitem_default", ["list_listitem_list_id_idx"], suffix="d"
+        )
+        assert statements[:5] == [
+            'ALTER TABLE "list_listitem" RENAME TO "list_listitem_default"',
+            'ALTER TABLE "list_listitem_default" DROP CONSTRAINT "list_listitem_pkey"',
+            f'ALTER INDEX "list_listitem_list_id_idx" RENAME TO "{renamed}"',
+            'CREATE TABLE "list_listitem" (LIKE "list_listitem_default" INCLUDING DEFAULTS '
+            'INCLUDING STORAGE) PARTITION BY RANGE ("created_at")',
+            # The id is only unique together with the partition column
+            'ALTER TABLE "list_listitem" ADD CONSTRAINT "list_listitem_pkey" '
+            'PRIMARY KEY ("id", "created_at")',
+        ]
+        assert statements[-1] == (
+            'ALTER TABLE "list_listitem" ATTACH PARTITION "list_listitem_default" DEFAULT'
+        )
+
+        # The indexes and foreign keys are recreated on the partitioned table
+        created = statements[5:-1]
+        assert all('ON "list_listitem"' in sql for sql in created if "CREATE" in sql)
+        for column in ["list_id", "user_id"]:
+            assert any(f'FOREIGN KEY ("{column}")' in sql for sql in created)
+
+    def test_not_reversible(self):
+        assert not PartitionByMonth("listitem", "created_at").reversible
+
+
+class TestArchiveItems:
+    @pytest.mark.parametrize("to_files", [False, True], ids=["table", "files"])
+    def test_archive_and_restore(self, to_files: bool, tmp_path):
+        options = ["--batch-size", "1"] + (["--directory", str(tmp_path)] if to_files else [])
+        old = timezone.now() - datetime.timedelta(days=60)
+
+        list = ListFactory.create()
+        kept = list.add_item("Kept", value=decimal.Decimal("5.00"))
+        removed, recent = list.add_item("Removed"), list.add_item("Recent")
+        list.remove_items([removed, recent])
+        ListItem.objects.filter(pk=removed.pk).update(updated_at=old)
+
+        inactive = ListFactory.create(is_active=False)
+        inactive.add_items([{"name": "Item 1"}, {"name": "Item 2"}])
+        List.objects.filter(pk=inactive.pk).update(updated_at=old)
+        ListItem.objects.filter(list=inactive).update(created_at=old, updated_at=old)
+
+        def timestamps():
+            rows = [
+                *ListMembership.objects.filter(list=inactive),
+                *ListItem.objects.filter(pk=removed.pk),
+                *ListItem.objects.filter(list=inactive).order_by("pk"),
+            ]
+            return [(row.created_at, row.updated_at) for row in rows]
+
+        archived = timestamps()
+        created_at = List.objects.get(pk=inactive.pk).created_at
+
+        call_command("archive_items", "--days", "30", *options, stdout=io.StringIO())
+        assert not List.objects.filter(pk=inactive.pk).exists()
+        assert {*ListItem.objects.all()} == {kept, recent}
+
+        call_command(
+            "archive_items",
+            "--restore",
+            "--list-id",
+            str(inactive.pk),
+            *options,
+            stdout=io.StringIO(),
+        )
+        restored = List.objects.get(pk=inactive.pk)
+        assert restored.memberships.get().user_id == inactive.owner_id
+        assert [*restored.items.order_by("pk").values_list("name", flat=True)] == [
+            "Item 1",
+            "Item 2",
+        ]
+        assert restored.active_item_count == 2
+        assert not ListItem.objects.filter(pk=removed.pk).exists()
+
+        call_command("archive_items", "--restore", *options, stdout=io.StringIO())
+        assert ListItem.objects.get(pk=removed.pk).name == "Removed"
+
+        # The rows are restored as they were, only the lists are stamped by their new version
+        assert timestamps() == archived
+        assert List.objects.get(pk=inactive.pk).created_at == created_at
+        list.refresh_from_db()
+        assert (list.subtotal_cached, list.active_item_count) == (decimal.Decimal("5.00"), 1)
@@ -1,9 +1,15 @@
+import datetime
 import decimal
 
+from django.core.management import call_command
+from django.db import connection
 from django.forms import ValidationError
+from django.utils import timezone
+from guardian.shortcuts import get_perms
 import pytest
 
-from api.list.models import List
+from api.list.models import List, ListItem
+from api.list.sync import item_changes
 from api.tests.faker import ListFactory, ListItemFactory, UserFactory
 from api.tests.utils import no_chached_user_perm
 
@@ -70,6 +76,39 @@ class TestList:
         for perm, _ in list.__class__._meta.permissions:
             assert not user.has_perm(perm, list)
 
+    @no_chached_user_perm
+    def test_add_participants(self, django_assert_max_num_queries):
+        list = ListFactory.create()
+        already = UserFactory.create()
+        list.add_participant(already)
+        users = UserFactory.create_batch(20)
+
+        with django_assert_max_num_queries(7):
+            added = list.add_participants([already, *users])
+
+        assert added == users
+        assert set(list.participants.all()) == {list.owner, already, *users}
+        assert all(user.has_perm("list.participant", list) for user in users)
+
+    @no_chached_user_perm
+    def test_remove_participants(self, django_assert_max_num_queries):
+        list1 = ListFactory.create()
+        list2 = ListFactory.create()
+        users = UserFactory.create_batch(20)
+        for list in [list1, list2]:
+            list.add_participants(users)
+        list1.promove_to_admin(users[0])
+
+        with django_assert_max_num_queries(4):
+            list1.remove_participants(users[:10])
+
+        assert set(list1.participants.all()) == {list1.owner, *users[10:]}
+        for user in users[:10]:
+            assert not get_perms(user, list1)
+            assert user.has_perm("list.participant", list2)
+
+        assert all(user.has_perm("list.participant", list1) for user in users[10:])
+
     @no_chached_user_perm
     def test_promove_participant_to_admin(self):
         user = UserFactory.create()
@@ -87,6 +126,10 @@ class TestList:
         list.promove_to_admin(user)
         assert user.has_perm("list.admin", list)
 
+        with pytest.raises(ValidationError) as e:
+            list.promove_to_admin(user)
+        assert e.value.message == "User is already admin of this list!"
+
     @no_chached_user_perm
     def test_promove_no_participant_to_admin(self):
         user = UserFactory.create()
@@ -104,6 +147,31 @@ class TestList:
         items = set(list.add_item("Item {i}") for i in range(6))
         assert items == set(list.items.all())
 
+    def test_add_items(self, django_assert_max_num_queries):
+        list = ListFactory.create()
+        user = UserFactory.create()
+        data = [
+            {"name": f"Item {i}", "quantity": 2, "value": decimal.Decimal("1.50"), "user": user}
+            for i in range(10)
+        ]
+
+        with django_assert_max_num_queries(9):
+            items = list.add_items(data, batch_size=4)
+
+        assert set(items) == set(list.items.all())
+        assert list.subtotal_cached == decimal.Decimal("30.00")
+        assert list.active_item_count == 10
+        assert List.objects.get(pk=list.pk).subtotal_cached == decimal.Decimal("30.00")
+
+    def test_add_items_invalid(self):
+        list = ListFactory.create()
+
+        with pytest.raises(ValidationError) as e:
+            list.add_items([{"name": "Item 1"}, {"name": ""}, {"name": "Item 3", "quantity": "x"}])
+
+        assert set(e.value.message_dict) == {"items.1.name", "items.2.quantity"}
+        assert not list.items.exists()
+
     def test_remove_items(self):
         list = ListFactory.create()
         items = ListItemFactory.create_batch(5, list=list)
@@ -132,8 +200,229 @@ class TestList:
         )
         assert list.reserve == decimal.Decimal("70.00")
 
+    def test_with_totals(self, django_assert_num_queries):
+        list = ListFactory.create(threshold=decimal.Decimal("100.00"))
+        ListItemFactory.create(value=decimal.Decimal("5.00"), quantity=2, list=list)
+        ListItemFactory.create(value=decimal.Decimal("10.00"), list=list)
+        ListItemFactory.create(value=None, list=list)
+        removed = ListItemFactory.create(value=decimal.Decimal("50.00"), list=list)
+        list.remove_items(removed)
+        empty = ListFactory.create()
+
+        with django_assert_num_queries(1):
+            lists = {obj.pk: obj for obj in List.objects.with_totals()}
+            assert lists[list.pk].subtotal == decimal.Decimal("20.00")
+            assert lists[list.pk].reserve == decimal.Decimal("80.00")
+            assert lists[empty.pk].subtotal == decimal.Decimal("0")
+            assert lists[empty.pk].reserve is None
+
+    def test_materialized_totals(self):
+        list = ListFactory.create()
+        items = [
+            list.add_item("Item 1", value=decimal.Decimal("5.00"), quantity=2),
+            list.add_item("Item 2", value=decimal.Decimal("10.00")),
+            list.add_item("Item 3"),
+        ]
+        assert list.subtotal_cached == decimal.Decimal("20.00")
+        assert list.active_item_count == 3
+
+        items[0].quantity = 3
+        items[0].save()
+        list.remove_items(items[1])
+        list.remove_items(items[1])
+        items[2].delete()
+
+        list = List.objects.get(pk=list.pk)
+        assert list.subtotal_cached == decimal.Decimal("15.00")
+        assert list.active_item_count == 1
+        assert list.subtotal == list.subtotal_cached
+
+    def test_materialized_totals_move_item(self):
+        list1 = ListFactory.create()
+        list2 = ListFactory.create()
+        item = ListItemFactory.create(value=decimal.Decimal("5.00"), list=list1)
+
+        item = ListItem.objects.get(pk=item.pk)
+        item.list = list2
+        item.save()
+
+        list1.refresh_from_db()
+        list2.refresh_from_db()
+        assert (list1.subtotal_cached, list1.active_item_count) == (decimal.Decimal(0), 0)
+        assert (list2.subtotal_cached, list2.active_item_count) == (decimal.Decimal("5.00"), 1)
+
+    def test_materialized_totals_concurrent(self):
+        list = ListFactory.create()
+        a1 = List.objects.get(pk=list.pk)
+        a2 = List.objects.get(pk=list.pk)
+        a1.add_item("Item 1", value=decimal.Decimal("2.00"))
+        a2.add_item("Item 2", value=decimal.Decimal("3.00"))
+
+        # Saving a list doesn't write back its totals over the ones changed by others
+        a1.title = "Renamed"
+        a1.save()
+        list.refresh_from_db()
+        assert (list.subtotal_cached, list.active_item_count) == (decimal.Decimal("5.00"), 2)
+        assert list.title == "Renamed"
+
+    def test_version(self, django_assert_num_queries):
+        list1 = ListFactory.create()
+        list2 = ListFactory.create()
+        users = UserFactory.create_batch(3)
+        assert list1.version == 1
+
+        def versions() -> list[int]:
+            return [List.objects.get(pk=obj.pk).version for obj in [list1, list2]]
+
+        list1.title = "Renamed"
+        list1.save()
+        item = ListItemFactory.create(list=list1)
+        list1.add_participants(users)
+        assert versions() == [4, 1]
+
+        item = ListItem.objects.get(pk=item.pk)
+        item.list = list2
+        item.save()
+        assert versions() == [5, 2]
+
+        # Bumped once for all the memberships
+        with django_assert_num_queries(3):
+            list1.remove_participants(users)
+        assert versions() == [6, 2]
+
+        # Behind the database, it is never saved over it
+        assert list1.version < 6
+        list1.description = "Changed"
+        list1.save()
+        assert versions() == [7, 2]
+
+    def test_search(self):
+        market = ListFactory.create(title="Supermercado do mês", description="")
+        party = ListFactory.create(title="Festa", description="Comprar bebidas no mercado")
+        bbq = ListFactory.create(title="Churrasco", description="")
+        bbq.add_items([{"name": "Carvão"}, {"name": "Picanha"}])
+        ListFactory.create(title="Farmácia", description="")
+
+        assert list(List.objects.search("mercado")) == [party]
+        assert list(List.objects.search("supermercado mes")) == [market]
+        assert list(List.objects.search("carvao")) == [bbq]
+        assert list(List.objects.search("  ")) == []
+
+        # Matches in the title rank better than in the description
+        market.title = "Mercado"
+        market.save()
+        assert list(List.objects.search("mercado")) == [market, party]
+
+    def test_search_sync(self):
+        list = ListFactory.create(title="Mercado", description="")
+        item = list.add_item("Café")
+        assert [*List.objects.search("cafe")] == [list]
+
+        item.name = "Leite"
+        item.save()
+        assert [*List.objects.search("cafe")] == []
+        assert [*List.objects.search("leite")] == [list]
+
+        list.remove_items(item)
+        assert [*List.objects.search("leite")] == []
+
+        List.objects.filter(pk=list.pk).update(title="Padaria")
+        assert [*List.objects.search("padaria")] == [list]
+
+        list.delete()
+        assert [*List.objects.search("padaria")] == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_search_sync_after_migrate(self, settings):
+        list = ListFactory.create(title="Mercado", description="")
+
+        # The tables were created from the models, as if all the migrations were applied
+        settings.MIGRATION_MODULES = {}
+        call_command("migrate", fake=True, verbosity=0)
+
+        # Altering the columns rebuilds the tables, dropping their triggers
+        call_command("migrate", "list", "0012", verbosity=0)
+        call_command("migrate", "list", verbosity=0)
+        assert [*List.objects.search("mercado")] == [list]
+
+        List.objects.filter(pk=list.pk).update(title="Padaria")
+        assert [*List.objects.search("mercado")] == []
+        assert [*List.objects.search("padaria")] == [list]
+        list.add_item("Café")
+        assert [*List.objects.search("cafe")] == [list]
+
+    def test_item_changes_lag(self, settings):
+        settings.LIST_SYNC_LAG = 60
+        list = ListFactory.create()
+        item = list.add_item("Item")
+
+        # Still too recent, it could be committed after a concurrent older change
+        changes = item_changes(list)
+        assert (changes.changed, changes.cursor) == ([], None)
+
+        ListItem.objects.filter(pk=item.pk).update(
+            updated_at=timezone.now() - datetime.timedelta(minutes=2)
+        )
+        assert item_changes(list).changed == [item]
+
 
 class TestListItem:
     def test_total(self):
         item = ListItemFactory.create(quantity=2, value=decimal.Decimal("5.00"))
         assert item.total == decimal.Decimal("10.00")
+
+    def test_in_months(self):
+        items = ListItemFactory.create_batch(3)
+        for item, month in zip(items, [1, 2, 3]):
+            created_at = datetime.datetime(2026, month, 1, tzinfo=datetime.timezone.utc)
+            ListItem.objects.filter(pk=item.pk).update(created_at=created_at)
+
+        assert {*ListItem.objects.in_months(datetime.date(2026, 2, 1))} == {items[1], items[2]}
+        assert [
+            *ListItem.objects.in_months(datetime.date(2026, 2, 10), datetime.date(2026, 2, 10))
+        ] == [items[1]]
+        assert {
+            *ListItem.objects.in_months(datetime.date(2026, 1, 31), datetime.date(2026, 2, 1))
+        } == {items[0], items[1]}
+
+
+class TestIndexes:
+    def _plan(self, qs) -> str:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as c:
+                # The tables of the tests are too small for the planner to prefer an index
+                c.execute("SET LOCAL enable_seqscan = off")
+        return qs.explain()
+
+    @pytest.mark.parametrize(
+        ("index", "qs"),
+        [
+            (
+                "list_item_active_idx",
+                lambda list: ListItem.objects.filter(list=list, is_active=True),
+            ),
+            (
+                "list_owner_active_idx",
+                lambda list: List.objects.filter(owner=list.owner, is_active=True).order_by(
+                    "-created_at"
+                ),
+            ),
+            (
+                "list_item_inactive_idx",
+                lambda list: ListItem.objects.filter(
+                    is_active=False, updated_at__lt=timezone.now()
+                ),
+            ),
+            (
+                "list_inactive_idx",
+                lambda list: List.objects.filter(is_active=False, updated_at__lt=timezone.now()),
+            ),
+        ],
+    )
+    def test_hot_queries_use_index(self, index, qs):
+        list = ListFactory.create()
+        ListItemFactory.create_batch(3, list=list)
+
+        plan = self._plan(qs(list))
+        assert index in plan, plan
+        assert "Seq Scan" not in plan, plan
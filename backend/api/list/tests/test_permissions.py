@@ -0,0 +1,79 @@
+from api.list.permissions import ListPermissionResolver, get_list_role
+from api.tests.faker import ListFactory, UserFactory
+
+
+class TestListPermissionResolver:
+    def test_get_list_role(self):
+        list = ListFactory.create()
+        participant, admin, stranger = UserFactory.create_batch(3)
+        list.add_participants([participant, admin])
+        list.promove_to_admin(admin)
+
+        assert get_list_role(list.owner, list) == "owner"
+        assert get_list_role(admin, list) == "admin"
+        assert get_list_role(participant, list) == "participant"
+        assert get_list_role(stranger, list) is None
+
+    def test_prefetch(self, django_assert_num_queries):
+        lists = ListFactory.create_batch(5)
+        user = UserFactory.create()
+        for list in lists[:3]:
+            list.add_participant(user)
+
+        resolver = ListPermissionResolver()
+        with django_assert_num_queries(1):
+            resolver.prefetch([user, *(list.owner for list in lists)], lists)
+            assert [resolver.get_role(user, list) for list in lists] == [
+                "participant",
+                "participant",
+                "participant",
+                None,
+                None,
+            ]
+            assert all(resolver.get_role(list.owner, list) == "owner" for list in lists)
+
+    def test_clear(self):
+        list = ListFactory.create()
+        user = UserFactory.create()
+        resolver = ListPermissionResolver()
+        assert resolver.get_role(user, list) is None
+
+        list.add_participant(user, resolver=resolver)
+        assert resolver.get_role(user, list) == "participant"
+
+        list.remove_participant(user, resolver=resolver)
+        assert resolver.get_role(user, list) is None
+
+    def test_inactive_and_superuser(self):
+        list = ListFactory.create()
+        inactive = UserFactory.create(is_active=False)
+        superuser = UserFactory.create(is_superuser=True)
+        list.add_participant(inactive)
+
+        assert get_list_role(inactive, list) is None
+        assert get_list_role(superuser, list) == "owner"
+
+
+class TestListMembershipBackend:
+    def test_has_perm(self):
+        list = ListFactory.create()
+        participant, admin, stranger = UserFactory.create_batch(3)
+        list.add_participants([participant, admin])
+        list.promove_to_admin(admin)
+
+        assert list.owner.has_perm("list.owner", list)
+        assert list.owner.has_perm("owner", list)
+        assert admin.has_perm("list.admin", list) and admin.has_perm("list.participant", list)
+        assert not admin.has_perm("list.owner", list)
+        assert participant.has_perm("list.participant", list)
+        assert not participant.has_perm("list.admin", list)
+        assert not stranger.has_perm("list.participant", list)
+        assert admin.get_all_permissions(list) == {"list.admin", "list.participant"}
+
+    def test_owner_is_kept(self):
+        list = ListFactory.create()
+        user = UserFactory.create()
+        list.add_participant(user)
+
+        list.remove_participants([list.owner, user])
+        assert [*list.memberships.values_list("user", "role")] == [(list.owner.pk, "owner")]
@@ -1,9 +1,11 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 import pytest
 from strawberry_django_plus.relay import from_base64, to_base64
 
 from api.list.models import List
-from api.tests.base import BaseTest, GqlTestClient
-from api.tests.faker import ListFactory, UserFactory
+from api.tests.base import AsyncGqlTestClient, BaseTest, GqlTestClient
+from api.tests.faker import ListFactory, ListItemFactory, UserFactory
 from api.user.models import User
 
 _fragments = """\
@@ -37,13 +39,245 @@ fragment listFields on ListType {
         ...userFields
     }
     items{
-        ...itemFields
+        edges{
+            node{
+                ...itemFields
+            }
+        }
     }
     isPublic
+    subtotal
+    reserve
+    activeItemCount
 }
 """
 
 
+class TestQuery(BaseTest):
+    def test_my_lists_constant_queries(self, gql_client: GqlTestClient):
+        query = """
+            query TestMyLists{
+                myLists{
+                    edges{
+                        node{
+                            ...listFields
+                        }
+                    }
+                }
+            }
+        """
+        user = UserFactory.create()
+
+        def count_queries(size: int) -> int:
+            for list in ListFactory.create_batch(size):
+                list.add_participants([user, *UserFactory.create_batch(2)])
+                ListItemFactory.create_batch(3, list=list)
+
+            with gql_client.login(user), CaptureQueriesContext(connection) as ctx:
+                response = gql_client.query(query, fragments=_fragments)
+
+            assert response.data
+            edges = response.data["myLists"]["edges"]
+            assert all(len(e["node"]["items"]["edges"]) == 3 for e in edges)
+            assert all(len(e["node"]["participants"]) == 4 for e in edges)
+            return len(ctx.captured_queries)
+
+        assert count_queries(2) == count_queries(8)
+
+    def test_my_lists_keyset_pagination(self, gql_client: GqlTestClient):
+        query = """
+            query TestMyLists($first: Int, $after: String, $last: Int, $before: String){
+                myLists(first: $first, after: $after, last: $last, before: $before){
+                    totalCount
+                    pageInfo{
+                        hasNextPage
+                        hasPreviousPage
+                        startCursor
+                        endCursor
+                    }
+                    edges{
+                        node{
+                            id
+                        }
+                    }
+                }
+            }
+        """
+        user = UserFactory.create()
+        lists = ListFactory.create_batch(5, owner=user)
+        expected = [to_base64("ListType", list.pk) for list in lists]
+
+        pages = []
+        variables: dict[str, object] = {"first": 2}
+        with gql_client.login(user):
+            while True:
+                with CaptureQueriesContext(connection) as ctx:
+                    response = gql_client.query(query, variables=variables)
+                assert response.data
+                # Deep pages seek to the cursor instead of skipping the previous rows
+                assert all("OFFSET" not in q["sql"] for q in ctx.captured_queries)
+
+                connection_data = response.data["myLists"]
+                assert connection_data["totalCount"] == 5
+                pages.append([e["node"]["id"] for e in connection_data["edges"]])
+                if not connection_data["pageInfo"]["hasNextPage"]:
+                    break
+                variables = {"first": 2, "after": connection_data["pageInfo"]["endCursor"]}
+
+            assert pages == [expected[:2], expected[2:4], expected[4:]]
+
+            response = gql_client.query(
+                query,
+                variables={"last": 2, "before": connection_data["pageInfo"]["startCursor"]},
+            )
+            assert response.data
+            assert [e["node"]["id"] for e in response.data["myLists"]["edges"]] == expected[2:4]
+            assert response.data["myLists"]["pageInfo"]["hasPreviousPage"] is True
+
+    def test_list_items_pagination(self, gql_client: GqlTestClient):
+        query = """
+            query TestMyLists($after: String){
+                myLists{
+                    edges{
+                        node{
+                            items(first: 2, after: $after){
+                                totalCount
+                                pageInfo{
+                                    hasNextPage
+                                    endCursor
+                                }
+                                edges{
+                                    node{
+                                        name
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        """
+        user = UserFactory.create()
+
+        def count_queries(size: int) -> int:
+            for list in ListFactory.create_batch(size, owner=user):
+                ListItemFactory.create_batch(5, list=list)
+
+            with gql_client.login(user), CaptureQueriesContext(connection) as ctx:
+                response = gql_client.query(query)
+
+            assert response.data
+            items = [e["node"]["items"] for e in response.data["myLists"]["edges"]]
+            assert all(len(i["edges"]) == 2 and i["pageInfo"]["hasNextPage"] for i in items)
+            assert all(i["totalCount"] == 5 for i in items)
+            return len(ctx.captured_queries)
+
+        assert count_queries(2) == count_queries(4)
+
+        list = ListFactory.create(owner=user)
+        names = [item.name for item in ListItemFactory.create_batch(5, list=list)]
+        List.objects.exclude(pk=list.pk).delete()
+
+        pages = []
+        after = None
+        with gql_client.login(user):
+            while True:
+                response = gql_client.query(query, variables={"after": after})
+                assert response.data
+                items = response.data["myLists"]["edges"][0]["node"]["items"]
+                pages.append([e["node"]["name"] for e in items["edges"]])
+                if not items["pageInfo"]["hasNextPage"]:
+                    break
+                after = items["pageInfo"]["endCursor"]
+
+        assert pages == [names[:2], names[2:4], names[4:]]
+
+    def test_search_lists(self, gql_client: GqlTestClient):
+        query = """
+            query TestSearchLists($q: String!){
+                searchLists(q: $q){
+                    ...listFields
+                }
+            }
+        """
+        user = UserFactory.create()
+        mine = ListFactory.create(owner=user, title="Mercado", is_public=False)
+        public = ListFactory.create(title="Festa", description="Passar no mercado")
+        ListFactory.create(title="Mercado", is_public=False)
+        ListFactory.create(title="Farmácia")
+
+        response = gql_client.query(query, variables={"q": "mercado"}, fragments=_fragments)
+        assert response.data
+        assert [obj["title"] for obj in response.data["searchLists"]] == [public.title]
+
+        with gql_client.login(user):
+            response = gql_client.query(query, variables={"q": "mercado"}, fragments=_fragments)
+        assert response.data
+        assert [obj["id"] for obj in response.data["searchLists"]] == [
+            to_base64("ListType", mine.pk),
+            to_base64("ListType", public.pk),
+        ]
+
+    def test_list_changes(self, gql_client: GqlTestClient, settings):
+        settings.LIST_SYNC_LAG = 0
+        query = """
+            query TestListChanges($listId: GlobalID!, $since: String, $first: Int! = 100){
+                listChanges(listId: $listId, since: $since, first: $first){
+                    changed{
+                        name
+                        quantity
+                    }
+                    removed{
+                        id
+                    }
+                    cursor
+                    hasMore
+                }
+            }
+        """
+        user = UserFactory.create()
+        list = ListFactory.create(owner=user, is_public=False)
+        items = [list.add_item(f"Item {i}") for i in range(3)]
+        list_id = to_base64("ListType", list.pk)
+
+        def sync(since: str | None, **variables) -> dict:
+            with gql_client.login(user):
+                response = gql_client.query(
+                    query, variables={"listId": list_id, "since": since, **variables}
+                )
+            assert response.data
+            return response.data["listChanges"]
+
+        changes = sync(None)
+        assert [obj["name"] for obj in changes["changed"]] == ["Item 0", "Item 1", "Item 2"]
+        assert changes["removed"] == [] and not changes["hasMore"]
+        cursor = changes["cursor"]
+        assert sync(cursor) == {**changes, "changed": []}
+
+        items[0].quantity = 5
+        items[0].save()
+        list.remove_items(items[1])
+        list.add_item("Item 3")
+
+        changes = sync(cursor)
+        assert changes["changed"] == [
+            {"name": "Item 0", "quantity": 5},
+            {"name": "Item 3", "quantity": 1},
+        ]
+        assert changes["removed"] == [{"id": to_base64("ItemType", items[1].pk)}]
+
+        first = sync(cursor, first=2)
+        assert first["hasMore"]
+        rest = sync(first["cursor"], first=2)
+        assert not rest["hasMore"]
+        assert len(first["changed"] + first["removed"] + rest["changed"] + rest["removed"]) == 3
+
+        response = gql_client.query(
+            query, variables={"listId": list_id, "since": None}, asserts_errors=False
+        )
+        self.assert_response_errors(response, ["You are not allowed to see this list!"])
+
+
 class TestMutation(BaseTest):
     def test_create_list(self, gql_client: GqlTestClient):
         mutation = """
@@ -66,6 +300,42 @@ class TestMutation(BaseTest):
             response = gql_client.query(mutation, fragments=_fragments, variables=input_variables)
             self.assert_created_object_model(List, input_variables, response)
 
+    @pytest.mark.parametrize("permission", ["list.owner", "list.admin", "list.participant"])
+    def test_add_items(self, permission: str, gql_client: GqlTestClient, no_chached_assign_perm):
+        mutation = """
+            mutation TestAddItems($input: ListItemsInputType!){
+                addItems(input: $input){
+                    ...listFields
+                }
+            }
+        """
+
+        user = UserFactory.create()
+        list = ListFactory.create()
+
+        with no_chached_assign_perm(permission, user, list):
+            input_variables = {
+                "input": {
+                    "listId": to_base64("ListType", list.id),
+                    "items": [
+                        {"name": "Rice", "quantity": 2, "value": "10.50"},
+                        {"name": "Beans"},
+                    ],
+                },
+            }
+
+            with gql_client.login(user):
+                response = gql_client.query(
+                    mutation,
+                    fragments=_fragments,
+                    variables=input_variables,
+                )
+                assert response.data and response.data["addItems"]
+                assert response.data["addItems"]["subtotal"] == "21.00"
+                assert response.data["addItems"]["activeItemCount"] == 2
+
+            assert {(i.name, i.user) for i in list.items.all()} == {("Rice", user), ("Beans", user)}
+
     @pytest.mark.parametrize("permission", ["list.owner", "list.admin"])
     def test_add_new_participant(
         self,
@@ -109,7 +379,8 @@ class TestMutation(BaseTest):
                     for u in response.data["addParticipant"].pop("participants")
                 ]
                 participants_obj = set(User.objects.filter(pk__in=participant_ids))
-                assert {list.owner, new_user} == participants_obj
+                # Having a role in the list makes the user one of its participants
+                assert {list.owner, user, new_user} == participants_obj
 
     @pytest.mark.parametrize("permission", ["list.participant"])
     def test_no_permission_to_add_new_permission(
@@ -192,3 +463,103 @@ class TestMutation(BaseTest):
                     response.data["removeParticipant"].pop("id")
                 )
                 assert all(not participant.has_perm(perm, list) for perm in List._meta.permissions)
+
+    @pytest.mark.parametrize("permission", ["list.owner", "list.admin"])
+    def test_add_and_remove_participants(
+        self,
+        permission: str,
+        gql_client: GqlTestClient,
+        no_chached_assign_perm,
+    ):
+        mutation = """
+            mutation TestParticipants($input: ListParticipantsInputType!){
+                addParticipants(input: $input){
+                    ...listFields
+                }
+            }
+        """
+
+        user = UserFactory.create()
+        list = ListFactory.create()
+
+        with no_chached_assign_perm(permission, user, list):
+            new_users = UserFactory.create_batch(3)
+            input_variables = {
+                "input": {
+                    "participantIds": [to_base64("UserType", u.id) for u in new_users],
+                    "listId": to_base64("ListType", list.id),
+                },
+            }
+
+            with gql_client.login(user):
+                gql_client.query(mutation, fragments=_fragments, variables=input_variables)
+                assert set(list.participants.all()) == {list.owner, user, *new_users}
+
+                input_variables["input"]["participantIds"].pop()
+                gql_client.query(
+                    mutation.replace("addParticipants", "removeParticipants"),
+                    fragments=_fragments,
+                    variables=input_variables,
+                )
+                assert set(list.participants.all()) == {list.owner, user, new_users[2]}
+
+
+class TestAsync(BaseTest):
+    def test_my_lists(self, gql_async_client: AsyncGqlTestClient):
+        query = """
+            query TestMyLists{
+                myLists(first: 10){
+                    totalCount
+                    edges{
+                        node{
+                            ...listFields
+                        }
+                    }
+                }
+            }
+        """
+        user = UserFactory.create()
+        lists = ListFactory.create_batch(2)
+        for list in lists:
+            list.add_participants([user])
+            ListItemFactory.create_batch(3, list=list)
+
+        with gql_async_client.login(user):
+            response = gql_async_client.query(query, fragments=_fragments)
+
+        assert response.data
+        connection_data = response.data["myLists"]
+        assert connection_data["totalCount"] == 2
+        assert [e["node"]["id"] for e in connection_data["edges"]] == [
+            to_base64("ListType", list.pk) for list in lists
+        ]
+        assert all(len(e["node"]["items"]["edges"]) == 3 for e in connection_data["edges"])
+        assert all(len(e["node"]["participants"]) == 2 for e in connection_data["edges"])
+
+    def test_add_items(self, gql_async_client: AsyncGqlTestClient):
+        mutation = """
+            mutation TestAddItems($input: ListItemsInputType!){
+                addItems(input: $input){
+                    ...listFields
+                }
+            }
+        """
+        user = UserFactory.create()
+        list = ListFactory.create(owner=user)
+        input_variables = {
+            "input": {
+                "listId": to_base64("ListType", list.id),
+                "items": [{"name": "Rice", "quantity": 2, "value": "10.50"}],
+            },
+        }
+
+        with gql_async_client.login(user):
+            response = gql_async_client.query(
+                mutation,
+                fragments=_fragments,
+                variables=input_variables,
+            )
+
+        assert response.data and response.data["addItems"]
+        assert response.data["addItems"]["subtotal"] == "21.00"
+        assert [i.name for i in list.items.all()] == ["Rice"]
@@ -0,0 +1,298 @@
+import asyncio
+import contextlib
+from typing import Any, Callable
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.db import transaction
+import pytest
+from strawberry_django_plus.relay import from_base64, to_base64
+
+from api.base.pubsub import get_pubsub
+from api.base.websockets import GraphQLWebSocketRouter
+from api.list.models import List, ListItem
+from api.list.updates import channel
+from api.schemas import schema
+from api.tests.base import GqlWebSocketClient
+from api.tests.faker import ListFactory, ListItemFactory, UserFactory
+
+_subscription = """
+    subscription ListUpdated($listId: GlobalID!){
+        listUpdated(listId: $listId){
+            changed{
+                id
+                name
+                quantity
+            }
+            removed{
+                id
+            }
+            participantsChanged
+            list{
+                title
+            }
+        }
+    }
+"""
+
+
+def _client(**kwargs) -> GqlWebSocketClient:
+    return GqlWebSocketClient(GraphQLWebSocketRouter(ASGIHandler(), schema), **kwargs)
+
+
+async def _subscribe(client: GqlWebSocketClient, obj: List, query: str = _subscription):
+    await client.init()
+    await client.subscribe("1", query, {"listId": to_base64("ListType", obj.pk)})
+    # Wait for the subscription to start, so the changes made next are not missed
+    for _ in range(500):
+        if get_pubsub().has_subscribers(channel(obj.pk)):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("The subscription didn't start")
+
+
+def _updates(obj: List, change: Callable[[], Any], count: int = 1) -> list[dict[str, Any]]:
+    async def run() -> list[dict[str, Any]]:
+        client = _client()
+        await _subscribe(client, obj)
+        await sync_to_async(change)()
+
+        updates = []
+        for _ in range(count):
+            message = await client.receive()
+            assert message["type"] == "next", message
+            updates.append(message["payload"]["data"]["listUpdated"])
+        await client.close()
+        return updates
+
+    return async_to_sync(run)()
+
+
+def _ids(items: list[dict[str, Any]]) -> list[int]:
+    return [int(from_base64(item["id"])[1]) for item in items]
+
+
+class TestListUpdated:
+    def test_item_saved(self):
+        obj = ListFactory.create()
+        item = ListItemFactory.create(list=obj, quantity=1)
+
+        def change():
+            item.quantity = 3
+            item.save()
+
+        [update] = _updates(obj, change)
+        assert update["changed"] == [
+            {"id": to_base64("ItemType", item.pk), "name": item.name, "quantity": 3}
+        ]
+        assert (update["removed"], update["participantsChanged"], update["list"]) == (
+            [],
+            False,
+            None,
+        )
+
+    def test_items_added_and_removed(self):
+        obj = ListFactory.create()
+        item = ListItemFactory.create(list=obj)
+
+        [added] = _updates(obj, lambda: obj.add_items([{"name": "A"}, {"name": "B"}]))
+        assert [i["name"] for i in added["changed"]] == ["A", "B"]
+
+        [removed] = _updates(obj, lambda: obj.remove_items(item))
+        assert _ids(removed["removed"]) == [item.pk]
+
+        # Only the items removed now, not the ones removed before
+        other = ListItem.objects.get(name="B")
+        [removed] = _updates(obj, lambda: obj.remove_items([item, other]))
+        assert _ids(removed["removed"]) == [other.pk]
+
+        [deleted] = _updates(obj, lambda: ListItem.objects.get(name="A").delete())
+        assert _ids(deleted["removed"]) == _ids(added["changed"][:1])
+
+    def test_item_moved(self):
+        obj = ListFactory.create()
+        item = ListItemFactory.create()
+
+        def change():
+            item.list = obj
+            item.save()
+
+        previous = item.list
+
+        async def run():
+            client, other = _client(), _client()
+            await _subscribe(client, obj)
+            await _subscribe(other, previous)
+            await sync_to_async(change)()
+
+            added, removed = await client.receive(), await other.receive()
+            await client.close()
+            await other.close()
+            return added["payload"]["data"], removed["payload"]["data"]
+
+        added, removed = async_to_sync(run)()
+        assert _ids(added["listUpdated"]["changed"]) == [item.pk]
+        assert _ids(removed["listUpdated"]["removed"]) == [item.pk]
+
+    def test_list_and_participants(self):
+        obj = ListFactory.create()
+
+        def rename():
+            obj.title = "Renamed"
+            obj.save()
+
+        [update] = _updates(obj, rename)
+        assert update["list"] == {"title": "Renamed"}
+        assert update["changed"] == []
+
+        [update] = _updates(obj, lambda: obj.add_participant(UserFactory.create()))
+        assert update["participantsChanged"]
+
+    def test_nested_relations(self):
+        obj = ListFactory.create()
+        user = UserFactory.create()
+        query = """
+            subscription ListUpdated($listId: GlobalID!){
+                listUpdated(listId: $listId){
+                    list{
+                        title
+                        participants{
+                            id
+                        }
+                    }
+                }
+            }
+        """
+
+        def rename(title: str):
+            obj.title = title
+            obj.save()
+
+        async def run() -> list[dict[str, Any]]:
+            ws = _client()
+            await _subscribe(ws, obj, query)
+            updates = []
+            # Received one by one, so each update is resolved before the next change
+            for change in [
+                lambda: rename("First"),
+                lambda: obj.add_participant(user),
+                lambda: rename("Second"),
+            ]:
+                await sync_to_async(change)()
+                updates.append((await ws.receive())["payload"]["data"]["listUpdated"])
+            await ws.close()
+            return updates
+
+        # The relations are loaded again for each update, instead of reusing the first ones
+        first, _, second = async_to_sync(run)()
+        assert first["list"]["title"] == "First"
+        assert len(first["list"]["participants"]) == 1
+        assert second["list"]["title"] == "Second"
+        assert {p["id"] for p in second["list"]["participants"]} == {
+            to_base64("UserType", obj.owner_id),
+            to_base64("UserType", user.pk),
+        }
+
+    def test_committed_together(self, settings, django_capture_on_commit_callbacks):
+        settings.RUNNING_TESTS = False
+        obj = ListFactory.create()
+        item = ListItemFactory.create(list=obj)
+
+        def change():
+            with django_capture_on_commit_callbacks(execute=True):
+                with transaction.atomic():
+                    first = obj.add_item("First")
+                    obj.add_item("Second")
+                    first.quantity = 5
+                    first.save()
+                    item.is_active = False
+                    item.save()
+
+                    # Rolled back, so never published
+                    with pytest.raises(RuntimeError), transaction.atomic():
+                        obj.add_item("Rolled back")
+                        raise RuntimeError
+
+        [update] = _updates(obj, change)
+        assert [(i["name"], i["quantity"]) for i in update["changed"]] == [
+            ("First", 5),
+            ("Second", 1),
+        ]
+        assert _ids(update["removed"]) == [item.pk]
+
+    def test_private_list(self):
+        obj = ListFactory.create(is_public=False)
+
+        async def run() -> dict[str, Any]:
+            client = _client()
+            await client.init()
+            await client.subscribe("1", _subscription, {"listId": to_base64("ListType", obj.pk)})
+            message = await client.receive()
+            await client.close()
+            return message
+
+        message = async_to_sync(run)()
+        assert message["type"] == "error"
+        assert message["payload"][0]["message"] == "You are not allowed to see this list!"
+
+    def test_access_revoked(self, client):
+        user = UserFactory.create()
+        obj = ListFactory.create(is_public=False)
+        obj.add_participant(user)
+        client.force_login(user)
+        cookie = f"sessionid={client.cookies['sessionid'].value}"
+
+        async def run() -> list[dict[str, Any]]:
+            ws = _client(headers={"Cookie": cookie})
+            await _subscribe(ws, obj)
+            await sync_to_async(obj.add_item)("Seen")
+            await sync_to_async(obj.remove_participant)(user)
+            await sync_to_async(obj.add_item)("Not seen")
+
+            messages = []
+            with contextlib.suppress(asyncio.TimeoutError):
+                while True:
+                    messages.append(await ws.receive(timeout=0.5))
+            await ws.close()
+            return messages
+
+        seen, revoked, *rest = async_to_sync(run)()
+        assert [i["name"] for i in seen["payload"]["data"]["listUpdated"]["changed"]] == ["Seen"]
+        assert revoked["type"] == "error"
+        assert revoked["payload"][0]["message"] == "You are not allowed to see this list!"
+        assert [m["type"] for m in rest] in ([], ["complete"])
+        assert not get_pubsub().has_subscribers(channel(obj.pk))
+
+    def test_session_user(self, client):
+        user = UserFactory.create()
+        obj = ListFactory.create(owner=user, is_public=False)
+        client.force_login(user)
+        cookie = f"sessionid={client.cookies['sessionid'].value}"
+
+        async def run() -> str:
+            ws = _client(headers={"Cookie": cookie})
+            await _subscribe(ws, obj)
+            await ws.close()
+            return "subscribed"
+
+        assert async_to_sync(run)() == "subscribed"
+
+    @pytest.mark.parametrize(
+        "origin, accepted",
+        [
+            pytest.param(None, True, id="no_origin"),
+            pytest.param("http://localhost:3000", True, id="allowed"),
+            pytest.param("https://evil.example", False, id="other_site"),
+        ],
+    )
+    def test_origin(self, settings, origin: str | None, accepted: bool):
+        settings.ALLOWED_HOSTS = ["localhost"]
+
+        async def run() -> dict[str, Any]:
+            ws = _client(headers={"Origin": origin} if origin else {})
+            message = await ws.connect()
+            await ws.close()
+            return message
+
+        message = async_to_sync(run)()
+        assert message["type"] == ("websocket.accept" if accepted else "websocket.close")
@@ -1,7 +1,13 @@
+import datetime
 import decimal
+from typing import cast
 
+from strawberry.types import Info
 from strawberry_django_plus import gql
 
+from api.base.pagination import PageArgs
+from api.base.types import KeysetPaginated
+from api.list.loaders import get_loaders, item_keyset
 from api.list.models import List, ListItem
 from api.user.types import UserType
 
@@ -23,31 +29,128 @@ class ListParticipantInputType:
     list_id: gql.relay.GlobalID
 
 
+@gql.input
+class ListParticipantsInputType:
+    participant_ids: list[gql.relay.GlobalID]
+    list_id: gql.relay.GlobalID
+
+
 @gql.input
 class PromoveParticipantInputType(ListParticipantInputType):
     permission: str
 
 
+@gql.input
+class ItemInputType:
+    name: str
+    quantity: int = 1
+    value: decimal.Decimal | None = None
+    weight: decimal.Decimal | None = None
+
+
+@gql.input
+class ListItemsInputType:
+    list_id: gql.relay.GlobalID
+    items: list[ItemInputType]
+
+
 #
 # Type
 #
 
 
 @gql.django.type(ListItem)
-class ItemType(gql.Node):
+class ItemType(KeysetPaginated, gql.Node):
     name: str
     description: str | None
     quantity: int | None
     value: decimal.Decimal | None
     weight: decimal.Decimal | None
-    owner: UserType
+
+    @gql.django.field
+    def owner(self, info: Info, root: ListItem) -> UserType | None:
+        if root.user_id is None:
+            return None
+
+        return cast(UserType, get_loaders(info).users.load(root.user_id))
 
 
 @gql.django.type(List)
-class ListType(gql.Node):
+class ListType(KeysetPaginated, gql.Node):
     title: str
     description: str | None
     is_public: bool | None
-    owner: UserType
-    participants: list[UserType | None]
-    items: list[ItemType | None]
+    threshold: decimal.Decimal | None
+    subtotal: decimal.Decimal
+    reserve: decimal.Decimal | None
+    active_item_count: int
+    version: int = gql.django.field(
+        description="Pass as `ifVersion` to skip reading it until it changes"
+    )
+
+    @gql.django.field
+    def owner(self, info: Info, root: List) -> UserType:
+        return cast(UserType, get_loaders(info).users.load(root.owner_id))
+
+    @gql.django.field
+    def participants(self, info: Info, root: List) -> list[UserType | None]:
+        return cast(list[UserType | None], get_loaders(info).participants_by_list.load(root.pk))
+
+    @gql.django.field
+    def items(
+        self,
+        info: Info,
+        root: List,
+        before: str | None = None,
+        after: str | None = None,
+        first: int | None = None,
+        last: int | None = None,
+    ) -> gql.relay.Connection[ItemType]:
+        loaders = get_loaders(info)
+        page = PageArgs(before=before, after=after, first=first, last=last)
+        connection = item_keyset.connection(
+            loaders.item_pages(page).load(root.pk),
+            page,
+            total_count=lambda: loaders.item_counts.load(root.pk),
+        )
+
+        return cast(gql.relay.Connection[ItemType], connection)
+
+
+@gql.type
+class ItemTombstoneType:
+    """An item removed from its list"""
+
+    id: gql.relay.GlobalID  # noqa: A003
+    removed_at: datetime.datetime
+
+
+@gql.type
+class ListChangesType:
+    """The changes of the items of a list since a cursor, for the clients to sync"""
+
+    changed: list[ItemType]
+    removed: list[ItemTombstoneType]
+    cursor: str | None = gql.field(description="Pass as `since` to get the next changes")
+    has_more: bool
+
+
+@gql.type
+class ListCacheStatsType:
+    hits: int
+    misses: int
+    invalidations: int
+    hit_rate: float
+
+
+@gql.type
+class ListUpdateType:
+    """The changes of a list committed together, only the items that changed"""
+
+    changed: list[ItemType] = gql.field(description="The items created or changed")
+    removed: list[ItemTombstoneType] = gql.field(description="The items removed or deleted")
+    participants_changed: bool
+    list: ListType | None = gql.field(  # noqa: A003
+        description="The list itself, when its own fields changed",
+        default=None,
+    )
@@ -0,0 +1,170 @@
+import collections
+import dataclasses
+import datetime
+import json
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterable, Mapping
+
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.base import hooks
+from api.base.pubsub import get_pubsub
+
+if TYPE_CHECKING:
+    from .models import List, ListItem
+
+Row = dict[str, Any]
+
+
+def channel(list_id: int) -> str:
+    return f"list:{list_id}"
+
+
+def _serialize(obj: models.Model) -> Row:
+    [row] = serializers.serialize("python", [obj])
+    # Computed by the database, not shown to the clients
+    row["fields"].pop("search_vector", None)
+    return row
+
+
+def _deserialize(rows: list[Row]) -> list[Any]:
+    return [d.object for d in serializers.deserialize("python", rows, ignorenonexistent=True)]
+
+
+@dataclasses.dataclass
+class ListUpdate:
+    """The changes of a list committed together"""
+
+    # The items created or changed, as they were saved
+    changed: list["ListItem"]
+    # The ids of the items removed or deleted, with when they were
+    removed: list[tuple[int, datetime.datetime]]
+    participants_changed: bool
+    # The list itself, when its own fields changed
+    list: "List | None" = None  # noqa: A003
+
+
+@dataclasses.dataclass
+class _Diff:
+    list: Row | None = None  # noqa: A003
+    changed: dict[int, Row] = dataclasses.field(default_factory=dict)
+    removed: dict[int, datetime.datetime] = dataclasses.field(default_factory=dict)
+    participants_changed: bool = False
+
+    def change(self, item: "ListItem"):
+        self.removed.pop(item.pk, None)
+        self.changed[item.pk] = _serialize(item)
+
+    def remove(self, item_id: int, removed_at: datetime.datetime):
+        self.changed.pop(item_id, None)
+        self.removed[item_id] = removed_at
+
+
+class _PendingUpdates:
+    """The diffs of the lists changed in a transaction, published once it commits"""
+
+    def __init__(self):
+        super().__init__()
+        self.diffs: dict[int, _Diff] = collections.defaultdict(_Diff)
+
+    def flush(self):
+        diffs, self.diffs = self.diffs, collections.defaultdict(_Diff)
+        pubsub = get_pubsub()
+        for list_id, diff in diffs.items():
+            message = {
+                "list": diff.list,
+                "changed": list(diff.changed.values()),
+                "removed": list(diff.removed.items()),
+                "participants_changed": diff.participants_changed,
+            }
+            pubsub.publish(channel(list_id), json.dumps(message, cls=DjangoJSONEncoder))
+
+
+def _record(list_ids: Iterable[int | None], record: Callable[[_Diff], None]):
+    pubsub = get_pubsub()
+    for list_id in list_ids:
+        # Nothing is serialized for the lists nobody is subscribed to
+        if list_id is None or not pubsub.has_subscribers(channel(list_id)):
+            continue
+
+        pending = hooks.commit_batch("list_updates", _PendingUpdates)
+        if pending is None:
+            pending = _PendingUpdates()
+            record(pending.diffs[list_id])
+            pending.flush()
+        else:
+            record(pending.diffs[list_id])
+
+
+def list_saved(obj: "List"):
+    def record(diff: _Diff):
+        diff.list = _serialize(obj)
+
+    _record([obj.pk], record)
+
+
+def items_saved(items: Iterable["ListItem"], *, previous_list_ids: Mapping[int, int] | None = None):
+    """Publish the items as saved, and as removed from the lists they were moved out of.
+
+    `previous_list_ids` are the lists the items were in before, by their ids.
+    """
+    previous_list_ids = previous_list_ids or {}
+    now = timezone.now()
+    # The items saved together are published together, once per list
+    changed: dict[int, list["ListItem"]] = collections.defaultdict(list)
+    removed: dict[int, list[tuple[int, datetime.datetime]]] = collections.defaultdict(list)
+    for item in items:
+        previous_list_id = previous_list_ids.get(item.pk)
+        if previous_list_id is not None and previous_list_id != item.list_id:
+            removed[previous_list_id].append((item.pk, now))
+
+        if item.is_active:
+            changed[item.list_id].append(item)
+        else:
+            removed[item.list_id].append((item.pk, item.updated_at or now))
+
+    def record(list_id: int) -> Callable[[_Diff], None]:
+        def record_list(diff: _Diff):
+            for item_id, removed_at in removed[list_id]:
+                diff.remove(item_id, removed_at)
+            for item in changed[list_id]:
+                diff.change(item)
+
+        return record_list
+
+    for list_id in changed.keys() | removed.keys():
+        _record([list_id], record(list_id))
+
+
+def items_removed(list_id: int, item_ids: Iterable[int]):
+    item_ids = list(item_ids)
+    now = timezone.now()
+
+    def record(diff: _Diff):
+        for item_id in item_ids:
+            diff.remove(item_id, now)
+
+    _record([list_id], record)
+
+
+def participants_changed(list_ids: Iterable[int | None]):
+    def record(diff: _Diff):
+        diff.participants_changed = True
+
+    _record(list_ids, record)
+
+
+async def list_updates(list_id: int) -> AsyncIterator[ListUpdate]:
+    """The updates of the list from now on, as the transactions changing it commit"""
+    async for message in get_pubsub().subscribe(channel(list_id)):
+        data = json.loads(message)
+        lists = _deserialize([data["list"]] if data["list"] is not None else [])
+        yield ListUpdate(
+            changed=_deserialize(data["changed"]),
+            removed=[(pk, parse_datetime(removed_at)) for pk, removed_at in data["removed"]],
+            participants_changed=data["participants_changed"],
+            list=lists[0] if lists else None,
+        )
@@ -0,0 +1,46 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from api.lib.dbutils import ensure_partitions
+
+
+class Command(BaseCommand):
+    help = "Create the monthly partitions of the partitioned tables ahead of time."  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            help="The first month to create, as YYYY-MM. Defaults to the previous month.",
+        )
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=3,
+            help="How many months ahead of the current one to create.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="The database to create the partitions in.",
+        )
+
+    def handle(
+        self,
+        *args,
+        start: str | None = None,
+        months: int = 3,
+        database: str = DEFAULT_DB_ALIAS,
+        **options,
+    ):
+        try:
+            start_date = datetime.datetime.strptime(start, "%Y-%m").date() if start else None
+        except ValueError:
+            raise CommandError(f"Invalid month: {start}")
+
+        created = ensure_partitions(start_date, months=months, using=database)
+        for partition in created:
+            self.stdout.write(f"Created {partition}")
+
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions"))
@@ -0,0 +1,94 @@
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.base import hooks
+
+
+def _work(**kwargs) -> int:
+    try:
+        return hooks.work(**kwargs)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run the deferred model hooks queued by the saves."  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="How many worker processes to run the hooks in.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="How many jobs each worker claims at a time.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="How many times a failing job runs before it is kept as failed.",
+        )
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=300,
+            help="How many seconds a job may run before another worker retries it.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="How many seconds to wait for new jobs when none is due.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no job is due, instead of waiting for new ones.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="The database of the queue.",
+        )
+
+    def handle(
+        self,
+        *args,
+        processes: int = 1,
+        batch_size: int = 100,
+        max_attempts: int = 5,
+        lease: int = 300,
+        poll_interval: float = 1.0,
+        once: bool = False,
+        database: str = DEFAULT_DB_ALIAS,
+        **options,
+    ):
+        kwargs = {
+            "once": once,
+            "poll_interval": poll_interval,
+            "limit": batch_size,
+            "max_attempts": max_attempts,
+            "lease": datetime.timedelta(seconds=lease),
+            "using": database,
+        }
+
+        if processes <= 1:
+            processed = hooks.work(**kwargs)
+        else:
+            # The forked workers open their own connections
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+                futures = [pool.submit(_work, **kwargs) for _ in range(processes)]
+                processed = sum(f.result() for f in futures)
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {processed} hook jobs"))
@@ -0,0 +1,44 @@
+# Generated by Django 4.0.5 on 2026-10-18 06:49
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HookJob',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated at')),
+                ('key', models.CharField(max_length=255, verbose_name='Idempotency key')),
+                ('hook', models.CharField(max_length=255, verbose_name='Hook')),
+                ('object_id', models.BigIntegerField(verbose_name='Object id')),
+                ('kwargs', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Arguments')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('failed', 'Failed')], default='pending', max_length=16, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='When the job is due, or when the lease of the worker running it expires', verbose_name='Run after')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last error')),
+            ],
+            options={
+                'verbose_name': 'hook job',
+                'verbose_name_plural': 'hook jobs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='hookjob',
+            index=models.Index(fields=['run_after'], name='hook_job_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hookjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('key',), name='hook_job_pending_key'),
+        ),
+    ]
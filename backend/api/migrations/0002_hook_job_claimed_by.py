@@ -0,0 +1,18 @@
+# Generated by Django 4.0.5 on 2026-10-18 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_hook_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hookjob',
+            name='claimed_by',
+            field=models.UUIDField(blank=True, editable=False, help_text='The claim of the worker running the job', null=True, verbose_name='Claimed by'),
+        ),
+    ]
@@ -0,0 +1,2 @@
+# The models of the api app itself live with the base classes
+from api.base.models import HookJob  # noqa: F401
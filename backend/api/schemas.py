@@ -1,8 +1,11 @@
 from strawberry import Schema
 from strawberry.tools import merge_types
 
+from api.base.persisted_queries import PersistedQueryExtension
+from api.list.loaders import ListLoadersExtension
 from api.list.schema import Mutation as ListMutation
 from api.list.schema import Query as ListQuery
+from api.list.schema import Subscription as ListSubscription
 from api.user.schema import Mutation as UserMutation
 from api.user.schema import Query as UserQuery
 
@@ -25,4 +28,9 @@ Mutation = merge_types(
 schema = Schema(
     query=Query,
     mutation=Mutation,
+    subscription=ListSubscription,
+    extensions=[
+        PersistedQueryExtension,
+        ListLoadersExtension,
+    ],
 )
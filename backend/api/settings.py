@@ -64,6 +64,7 @@ class _Base(Configuration):
 
     AUTHENTICATION_BACKENDS = (
         "django.contrib.auth.backends.ModelBackend",
+        "api.list.backends.ListMembershipBackend",
         "guardian.backends.ObjectPermissionBackend",
     )
 
@@ -147,6 +148,66 @@ class _Base(Configuration):
     DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
     AUTH_USER_MODEL = "user.User"
 
+    # Serve the GraphQL API with the async view, set by the ASGI application
+    GRAPHQL_ASYNC = os.getenv("GRAPHQL_ASYNC", "false").lower() == "true"
+    # The threads running the sync resolvers of the async view, each with its own database
+    # connection. With none they run in the thread of each request, one at a time
+    GRAPHQL_RESOLVER_THREADS = int(os.getenv("GRAPHQL_RESOLVER_THREADS", "8"))
+
+    # Persisted queries
+    # JSON object of the allowed queries keyed by their SHA-256 hash
+    PERSISTED_QUERIES_MANIFEST: str | Path | None = None
+    # Allow the clients to register the queries they send with their hash
+    PERSISTED_QUERIES_AUTO_REGISTER = True
+    # Reject the queries that are not in the manifest
+    PERSISTED_QUERIES_ONLY = False
+    # How many parsed and validated queries are kept in memory
+    PERSISTED_QUERIES_MAX_DOCUMENTS = 500
+
+    # Delta sync
+    # The changes of the last seconds are left for the next sync, so the ones of the
+    # transactions still running when a client syncs are not skipped
+    LIST_SYNC_LAG = 5
+
+    # Caches
+    # The list snapshots are kept in the local memory of each process by default, up to
+    # MAX_ENTRIES with the least recently used evicted first. To share them between the
+    # processes, point LIST_CACHE_BACKEND to django.core.cache.backends.filebased.FileBasedCache
+    # and LIST_CACHE_LOCATION to a directory, or to django.core.cache.backends.redis.RedisCache
+    # and a redis:// URL of any Redis-compatible server (OPTIONS are not used then)
+    LIST_CACHE_BACKEND = os.getenv(
+        "LIST_CACHE_BACKEND",
+        "django.core.cache.backends.locmem.LocMemCache",
+    )
+    # Lists with more items than this are cached without them
+    LIST_CACHE_MAX_ITEMS = 500
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        "lists": {
+            "BACKEND": LIST_CACHE_BACKEND,
+            "LOCATION": os.getenv("LIST_CACHE_LOCATION", "lists"),
+            "TIMEOUT": 300,
+            "OPTIONS": (
+                {} if LIST_CACHE_BACKEND.endswith("RedisCache") else {"MAX_ENTRIES": 10000}
+            ),
+        },
+    }
+
+    # Pub/sub
+    # The subscriptions only get the messages published by their own process by default.
+    # To broadcast them to all the processes, point PUBSUB_BACKEND to
+    # api.base.pubsub.RedisBroadcast and PUBSUB_URL to a redis:// URL
+    PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "api.base.pubsub.LocalBroadcast")
+    PUBSUB_OPTIONS = {"url": os.environ["PUBSUB_URL"]} if "PUBSUB_URL" in os.environ else {}
+    # How many messages a subscriber may fall behind before it is dropped
+    PUBSUB_MAX_PENDING = 1000
+
+    # Model hooks
+    # Dispatch the save hooks through the Django signals instead of `BaseModel.save`
+    MODEL_HOOKS_USE_SIGNALS = False
+
 
 class Local(_Base):
     DEBUG = True
@@ -163,6 +224,8 @@ class Local(_Base):
 class Tests(_Base):
     DEBUG = True
     RUNNING_TESTS = True
+    # The transaction of each test is only seen by its thread
+    GRAPHQL_RESOLVER_THREADS = 0
 
     DATABASES = {
         "default": {
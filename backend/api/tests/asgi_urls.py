@@ -0,0 +1,10 @@
+from django.urls import path
+from django.urls.resolvers import URLPattern, URLResolver
+
+from api.base.persisted_queries import AsyncPersistedQueryGraphQLView
+from api.schemas import schema
+
+# The urls served by the ASGI application
+urlpatterns: list[URLPattern | URLResolver] = [
+    path("api/graphql/", AsyncPersistedQueryGraphQLView.as_view(schema=schema)),
+]
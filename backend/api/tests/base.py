@@ -1,7 +1,10 @@
+import asyncio
 import contextlib
+import json
 import re
 from typing import Any
 
+from asgiref.sync import async_to_sync
 from django.db import models
 from strawberry.test import BaseGraphQLTestClient
 from strawberry.test.client import Response
@@ -64,6 +67,76 @@ class GqlTestClient(BaseGraphQLTestClient):
         self._client.logout()
 
 
+class AsyncGqlTestClient(GqlTestClient):
+    """Test client of the async view, served by the ASGI handler"""
+
+    def request(
+        self,
+        body: dict[str, object],
+        headers: dict[str, object] | None = None,
+        files: dict[str, object] | None = None,
+    ):
+        response = super().request(body, headers, files)
+
+        async def wait_response():
+            return await response
+
+        return async_to_sync(wait_response)()
+
+
+class GqlWebSocketClient:
+    """Client of the GraphQL WebSocket of an ASGI application, with graphql-transport-ws"""
+
+    def __init__(self, app, *, path: str = "/api/graphql/", headers: dict[str, str] | None = None):
+        super().__init__()
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+            "subprotocols": ["graphql-transport-ws"],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        self._received: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._sent: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    async def connect(self) -> dict[str, Any]:
+        """Open the WebSocket, returning the message accepting or closing it"""
+        self._task = asyncio.create_task(self.app(self.scope, self._received.get, self._sent.put))
+        await self._received.put({"type": "websocket.connect"})
+        return await self._next()
+
+    async def send(self, data: dict[str, Any]):
+        await self._received.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive(self, timeout: float = 5) -> dict[str, Any]:
+        message = await self._next(timeout)
+        assert message["type"] == "websocket.send", message
+        return json.loads(message["text"])
+
+    async def init(self):
+        assert (await self.connect())["type"] == "websocket.accept"
+        await self.send({"type": "connection_init"})
+        assert (await self.receive())["type"] == "connection_ack"
+
+    async def subscribe(self, id: str, query: str, variables: dict[str, Any] | None = None):
+        payload = {"query": query, "variables": variables or {}}
+        await self.send({"type": "subscribe", "id": id, "payload": payload})
+
+    async def close(self):
+        await self._received.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            await asyncio.wait_for(self._task, 5)
+
+    async def _next(self, timeout: float = 5) -> dict[str, Any]:
+        return await asyncio.wait_for(self._sent.get(), timeout)
+
+
 class BaseTest:
     def assert_created_object_model(
         self,
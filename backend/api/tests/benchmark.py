@@ -0,0 +1,291 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+import io
+import json
+import pathlib
+import time
+import tracemalloc
+from typing import Any, Callable, Iterable
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import GqlTestClient
+from api.tests.faker import SeedData
+
+
+@dataclasses.dataclass
+class Operation:
+    """A GraphQL operation with its query-count budget"""
+
+    name: str
+    query: str
+    max_queries: int
+    variables: Callable[[SeedData], dict[str, Any]] | None = None
+    fragments: str = ""
+
+
+@dataclasses.dataclass
+class OperationResult:
+    name: str
+    queries: int
+    max_queries: int
+    wall_time: float
+    peak_memory: int
+
+    @property
+    def within_budget(self) -> bool:
+        return self.queries <= self.max_queries
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}: {self.queries}/{self.max_queries} queries, "
+            f"{self.wall_time * 1000:.1f}ms, {self.peak_memory / 1024:.1f}KiB peak"
+        )
+
+
+class GqlBenchmarkClient(GqlTestClient):
+    def measure(self, operation: Operation, data: SeedData) -> OperationResult:
+        """Run the operation recording its query count, wall time and peak memory.
+
+        The wall time includes the tracemalloc overhead, so it is only meaningful when
+        compared with other measures taken by this client.
+        """
+        variables = operation.variables(data) if operation.variables else None
+
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                self.query(operation.query, variables=variables, fragments=operation.fragments)
+                wall_time = time.perf_counter() - start
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return OperationResult(
+            name=operation.name,
+            queries=len(ctx.captured_queries),
+            max_queries=operation.max_queries,
+            wall_time=wall_time,
+            peak_memory=peak_memory,
+        )
+
+
+@dataclasses.dataclass
+class LoadResult:
+    name: str
+    clients: int
+    wall_time: float
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.clients / self.wall_time
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}: {self.clients} clients, {self.wall_time * 1000:.1f}ms, "
+            f"{self.requests_per_second:.1f} req/s"
+        )
+
+
+@dataclasses.dataclass
+class QueryResult:
+    name: str
+    rows: int
+    runs: int
+    wall_time: float
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.rows} rows, {self.wall_time / self.runs * 1000:.2f}ms per run"
+
+
+def time_query(name: str, qs: Callable[[], Iterable[Any]], *, runs: int = 20) -> QueryResult:
+    """Fetch the rows of the queryset built by `qs` many times, timing the average run"""
+    rows: list[Any] = []
+    start = time.perf_counter()
+    for _ in range(runs):
+        rows = list(qs())
+    wall_time = time.perf_counter() - start
+
+    return QueryResult(name=name, rows=len(rows), runs=runs, wall_time=wall_time)
+
+
+@dataclasses.dataclass
+class CallResult:
+    name: str
+    runs: int
+    wall_time: float
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.wall_time / self.runs * 1_000_000:.1f}us per call"
+
+
+def time_calls(name: str, fn: Callable[[], Any], *, runs: int = 1000) -> CallResult:
+    """Call `fn` many times, timing the average call"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    wall_time = time.perf_counter() - start
+
+    return CallResult(name=name, runs=runs, wall_time=wall_time)
+
+
+@dataclasses.dataclass
+class SlowClient:
+    """A client that takes `upload_time` seconds to send the body of its request"""
+
+    path: str
+    body: bytes
+    upload_time: float
+    chunks: int = 10
+
+    def _chunks(self) -> list[bytes]:
+        size = -(-len(self.body) // self.chunks)
+        return [self.body[i : i + size] for i in range(0, len(self.body), size)]
+
+    async def asgi_request(self, app: ASGIHandler) -> int:
+        chunks = self._chunks()
+        status = 0
+
+        async def receive():
+            if not chunks:
+                # Wait for the response instead of disconnecting
+                await asyncio.Future()
+            await asyncio.sleep(self.upload_time / self.chunks)
+            return {"type": "http.request", "body": chunks.pop(0), "more_body": bool(chunks)}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(self.body)).encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        await app(scope, receive, send)
+        return status
+
+    def wsgi_request(self, app: WSGIHandler) -> int:
+        client = self
+
+        class SlowInput(io.RawIOBase):
+            def __init__(self):
+                super().__init__()
+                self._chunks = client._chunks()
+
+            def read(self, size: int = -1) -> bytes:
+                data = b""
+                while self._chunks and (size < 0 or len(data) < size):
+                    time.sleep(client.upload_time / client.chunks)
+                    data += self._chunks.pop(0)
+                return data
+
+        environ = {
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": self.path,
+            "SERVER_NAME": "testserver",
+            "SERVER_PORT": "80",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(self.body)),
+            "wsgi.input": SlowInput(),
+            "wsgi.url_scheme": "http",
+        }
+        status = 0
+
+        def start_response(value: str, headers: list[tuple[str, str]]):
+            nonlocal status
+            status = int(value.split()[0])
+
+        response = app(environ, start_response)
+        b"".join(response)
+        response.close()
+        return status
+
+
+def run_asgi_load(name: str, clients: list[SlowClient]) -> LoadResult:
+    """Serve all the clients concurrently from a single event loop"""
+    app = ASGIHandler()
+
+    async def run() -> list[int]:
+        return await asyncio.gather(*(c.asgi_request(app) for c in clients))
+
+    start = time.perf_counter()
+    statuses = asyncio.run(run())
+    wall_time = time.perf_counter() - start
+
+    assert set(statuses) == {200}, statuses
+    return LoadResult(name=name, clients=len(clients), wall_time=wall_time)
+
+
+def run_wsgi_load(name: str, clients: list[SlowClient], *, workers: int) -> LoadResult:
+    """Serve all the clients with a pool of worker threads"""
+    app = WSGIHandler()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        statuses = list(executor.map(lambda c: c.wsgi_request(app), clients))
+    wall_time = time.perf_counter() - start
+
+    assert set(statuses) == {200}, statuses
+    return LoadResult(name=name, clients=len(clients), wall_time=wall_time)
+
+
+@dataclasses.dataclass
+class Comparison:
+    """How many times faster `candidate` ran than `baseline`"""
+
+    name: str
+    baseline: str
+    candidate: str
+    speedup: float
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.candidate} {self.speedup:.1f}x faster than {self.baseline}"
+
+
+Result = OperationResult | LoadResult | QueryResult | CallResult | Comparison
+
+
+@dataclasses.dataclass
+class BenchmarkReport:
+    results: list[Result] = dataclasses.field(default_factory=list)
+
+    def add(self, result: Result):
+        self.results.append(result)
+
+    def compare(self, name: str, baseline: LoadResult, candidate: LoadResult) -> Comparison:
+        """Add both results, and how they compare, to the report"""
+        comparison = Comparison(
+            name=name,
+            baseline=baseline.name,
+            candidate=candidate.name,
+            speedup=baseline.wall_time / candidate.wall_time,
+        )
+        self.add(baseline)
+        self.add(candidate)
+        self.add(comparison)
+        return comparison
+
+    def write(self, path: str | pathlib.Path):
+        pathlib.Path(path).write_text(
+            json.dumps([dataclasses.asdict(r) for r in self.results], indent=2),
+        )
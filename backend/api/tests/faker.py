@@ -1,9 +1,12 @@
+import dataclasses
+import decimal
+import random
 from typing import Generic, TypeVar
 
 from django.contrib.auth.hashers import make_password
 import factory
 
-from api.list.models import List, ListItem
+from api.list.models import List, ListItem, ListMembership
 from api.user.models import User
 
 _T = TypeVar("_T")
@@ -19,6 +22,14 @@ class _BaseFactory(Generic[_T], factory.Factory):
     def create_batch(cls, size: int, **kwargs) -> list[_T]:
         return super().create_batch(size, **kwargs)
 
+    @classmethod
+    def build(cls, **kwargs) -> _T:
+        return super().build(**kwargs)
+
+    @classmethod
+    def build_batch(cls, size: int, **kwargs) -> list[_T]:
+        return super().build_batch(size, **kwargs)
+
 
 class _BaseDjangoFactory(factory.django.DjangoModelFactory, _BaseFactory[_T]):
     ...
@@ -63,3 +74,62 @@ class ListItemFactory(_BaseDjangoFactory[ListItem]):
     value = None
     weight = None
     is_active = True
+
+
+@dataclasses.dataclass
+class SeedData:
+    users: list[User]
+    lists: list[List]
+
+
+def seed(
+    *,
+    lists: int,
+    items_per_list: int,
+    participants_per_list: int,
+    users: int | None = None,
+    random_seed: int = 0,
+) -> SeedData:
+    """Create realistic volumes of users, lists, items and participants in bulk"""
+    rng = random.Random(random_seed)
+    # Hashing a password for each user would dominate the seeding time
+    password = make_password("foobar")
+
+    user_objs = UserFactory.build_batch(
+        users or max(lists, participants_per_list + 1),
+        password=password,
+    )
+    for i, user in enumerate(user_objs):
+        # Faker runs out of unique emails at these volumes
+        user.username = user.email = f"{i}.{user.email}"
+    User.objects.bulk_create(user_objs, batch_size=1000)
+    list_objs = List.objects.bulk_create(
+        [ListFactory.build(owner=rng.choice(user_objs)) for _ in range(lists)],
+        batch_size=1000,
+    )
+
+    memberships: list[ListMembership] = []
+    items: list[ListItem] = []
+    for obj in list_objs:
+        members = [obj.owner]
+        memberships.append(ListMembership(list=obj, user=obj.owner, role="owner"))
+        for user in rng.sample(user_objs, participants_per_list + 1):
+            if user != obj.owner and len(members) <= participants_per_list:
+                members.append(user)
+                memberships.append(ListMembership(list=obj, user=user, role="participant"))
+
+        for item in ListItemFactory.build_batch(items_per_list, list=obj, user=None):
+            item.user = rng.choice(members)
+            item.quantity = rng.randint(1, 5)
+            item.value = decimal.Decimal(rng.randint(100, 10000)) / 100
+            obj.subtotal_cached += item.total
+            obj.active_item_count += 1
+            items.append(item)
+
+    ListMembership.objects.bulk_create(memberships, batch_size=1000)
+    ListItem.objects.bulk_create(items, batch_size=1000)
+    List.objects.bulk_update(list_objs, ["subtotal_cached", "active_item_count"], batch_size=1000)
+    List.search_index.update(List.objects.all())
+    ListItem.search_index.update(ListItem.objects.all())
+
+    return SeedData(users=user_objs, lists=list_objs)
@@ -1,3 +1,4 @@
+import functools
 from typing import Any
 from unittest import mock
 
@@ -16,6 +17,7 @@ def no_chached_user_perm(func):
 
         return perm in get_perms(user, obj)
 
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         mock_module_perm_function = mock.patch(
             "guardian.backends.ObjectPermissionBackend.has_perm",
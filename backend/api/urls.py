@@ -4,10 +4,17 @@ from django.conf.urls import include
 from django.contrib import admin
 from django.urls import path
 from django.urls.resolvers import URLPattern, URLResolver
-from strawberry.django.views import GraphQLView
 
+from api.base.persisted_queries import (
+    AsyncPersistedQueryGraphQLView,
+    PersistedQueryGraphQLView,
+)
 from api.schemas import schema
 
+GraphQLView = (
+    AsyncPersistedQueryGraphQLView if settings.GRAPHQL_ASYNC else PersistedQueryGraphQLView
+)
+
 urlpatterns: list[URLPattern | URLResolver] = [
     path("listmanager-admin/", admin.site.urls),
     path(
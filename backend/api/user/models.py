@@ -1,7 +1,7 @@
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 
-from api.base.models import BaseModel, TimestampedMixin
+from api.base.models import BaseModel, TimestampedMixin, TimestampedQuerySet
 
 
 class _EmailField(models.EmailField):
@@ -9,6 +9,10 @@ class _EmailField(models.EmailField):
         return value if value else None
 
 
+class TimestampedUserManager(UserManager.from_queryset(TimestampedQuerySet)):  # type: ignore
+    """User manager which also stamps the bulk updates"""
+
+
 class User(BaseModel, TimestampedMixin, AbstractUser):
     """Default user in the app."""
 
@@ -16,7 +20,7 @@ class User(BaseModel, TimestampedMixin, AbstractUser):
         verbose_name = "user"
         verbose_name_plural = "users"
 
-    objects = UserManager["User"]()
+    objects = TimestampedUserManager["User"]()
 
     email = _EmailField(
         verbose_name="email",
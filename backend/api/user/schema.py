@@ -4,6 +4,7 @@ from django.core.exceptions import ValidationError
 from strawberry.types import Info
 from strawberry_django_plus import gql
 
+from api.base.resolvers import async_safe
 from api.list.models import List
 from api.list.types import ListType
 
@@ -23,11 +24,14 @@ class Query:
         return cast(UserType, user)
 
     @gql.connection
+    @async_safe
     def my_lists(self, info: Info) -> Iterable[ListType]:
         """The lists the user is participating in"""
         user = info.context.request.user
+        if not user.is_authenticated:
+            return cast(Iterable[ListType], List.objects.none())
 
-        lists = List.objects.filter(participants__in=user).order_by("created_at")
+        lists = List.objects.filter(membership__user=user).order_by("created_at")
 
         return cast(Iterable[ListType], lists)
 
@@ -43,6 +47,7 @@ class Query:
 @gql.type
 class Mutation:
     @gql.mutation
+    @async_safe
     def create_user(
         self,
         first_name: str,